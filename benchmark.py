@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Freshness Checker Benchmarks
+
+Times each stage of the freshness check separately at several catalog sizes:
+Nexus catalog load (JSON and compiled), per-package Nexus lookup, Cloudsmith
+fetches against the local mock server, compare_dates, and result output.
+Datasets are synthesized with generate_catalog.py and reused between runs.
+
+Results can be written as JSON and compared against a saved baseline; the
+script exits non-zero when any stage is slower than the baseline by more
+than the threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import logging
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+import freshness_checker
+from freshness_checker import (NexusCatalog, NexusClient, CloudsmithClient, RateLimiter, FreshnessResult,
+                               RESULT_SINKS, compile_catalog, compare_dates, compare_dates_vectorized,
+                               to_timestamp_array)
+from generate_catalog import FORMATS, CatalogGenerator, parse_size, write_catalog
+from mock_cloudsmith_server import MockCloudsmithAPI, FaultInjector, serve_in_background
+
+logger = logging.getLogger("freshness-benchmark")
+
+# Constants
+DEFAULT_SIZES = "1k,10k,100k"
+DEFAULT_REPEAT = 3
+# Individual Cloudsmith queries timed per size; per-package mode is too slow to run over a whole catalog
+DEFAULT_LOOKUP_SAMPLE = 200
+# Relative slowdown against the baseline reported as a regression
+DEFAULT_THRESHOLD = 0.25
+# Short stages are re-run until they have taken this long in total (up to MAX_RUNS), so their best time is stable
+MIN_MEASURE_SECONDS = 0.5
+MAX_RUNS = 100
+DATASET_SEED = 1
+IGNORE_TAG = "upstream"
+# The mock server has no rate limit; keep the client from adding one
+BENCHMARK_MAX_REQUESTS_PER_SECOND = 1_000_000.0
+
+
+def size_label(size: int) -> str:
+    """
+    Format a package count the way it is given on the command line.
+    
+    Args:
+        size: Number of packages
+    
+    Returns:
+        Label such as 10k or 1M
+    """
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}M"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def measure(results: Dict[str, Dict[str, Any]], stage: str, func: Callable[[], Any], operations: int,
+            repeat: int) -> Any:
+    """
+    Time a stage, keeping the fastest of at least `repeat` runs.
+    
+    Stages faster than MIN_MEASURE_SECONDS in total are re-run, up to
+    MAX_RUNS times, to keep timer and scheduling noise out of the result.
+    
+    Args:
+        results: Stage results to add to
+        stage: Stage name
+        func: Work to time; its return value from the last run is returned
+        operations: Items the work processes, for the per-second rate
+        repeat: Minimum number of timed runs
+    
+    Returns:
+        Return value of func
+    """
+    best = float('inf')
+    total = 0.0
+    runs = 0
+    value = None
+    while runs < repeat or (total < MIN_MEASURE_SECONDS and runs < MAX_RUNS):
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+    results[stage] = {
+        'seconds': best,
+        'operations': operations,
+        'per_second': operations / best if best > 0 else None,
+        'runs': runs,
+    }
+    logger.info(f"  {stage:<26} {best * 1000:10.2f} ms  {operations:>9} ops")
+    return value
+
+
+def ensure_dataset(work_dir: str, size: int, format_type: str) -> str:
+    """
+    Generate a benchmark dataset unless an identical one already exists.
+    
+    Args:
+        work_dir: Directory holding datasets
+        size: Nexus packages in the dataset
+        format_type: Package format
+    
+    Returns:
+        Dataset directory, laid out like fixtures/
+    """
+    dataset_dir = os.path.join(work_dir, f"{format_type}-{size_label(size)}")
+    parameters = {'packages': size, 'seed': DATASET_SEED}
+    manifest_path = os.path.join(dataset_dir, "manifest.json")
+    try:
+        with open(manifest_path) as f:
+            if json.load(f).get('parameters') == parameters:
+                return dataset_dir
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    logger.info(f"Generating {size_label(size)} {format_type} dataset in {dataset_dir}")
+    shutil.rmtree(dataset_dir, ignore_errors=True)
+    write_catalog(dataset_dir, [format_type], CatalogGenerator(size, seed=DATASET_SEED), parameters=parameters)
+    return dataset_dir
+
+
+def benchmark_catalog(dataset_dir: str, format_type: str, repeat: int,
+                      results: Dict[str, Dict[str, Any]]) -> Tuple[NexusClient, list, List[Optional[int]]]:
+    """
+    Time Nexus catalog loads and per-package lookups, from JSON and compiled catalogs.
+    
+    Returns:
+        Tuple of (client on the JSON catalog, package identities, Nexus dates)
+    """
+    catalog_file = os.path.join(dataset_dir, format_type, "packages.json")
+    compiled_file = os.path.join(dataset_dir, format_type, "packages.bin")
+    if os.path.exists(compiled_file):
+        os.remove(compiled_file)
+
+    count = NexusCatalog(dataset_dir).count(format_type)
+    client = measure(results, 'catalog_load', lambda: NexusClient(_loaded(dataset_dir, format_type)),
+                     count, repeat)
+    packages = list(client.iter_package_groups(format_type))
+    nexus_dates = measure(results, 'nexus_lookup',
+                          lambda: [client.get_last_updated_date(pkg, format_type=format_type) for pkg in packages],
+                          len(packages), repeat)
+
+    try:
+        measure(results, 'catalog_compile', lambda: compile_catalog(catalog_file, compiled_file, format_type),
+                count, repeat)
+        compiled = measure(results, 'catalog_load_compiled', lambda: NexusClient(_loaded(dataset_dir, format_type)),
+                           count, repeat)
+        measure(results, 'nexus_lookup_compiled',
+                lambda: [compiled.get_last_updated_date(pkg, format_type=format_type) for pkg in packages],
+                len(packages), repeat)
+    finally:
+        # The next run's catalog_load must read packages.json again
+        os.remove(compiled_file)
+    return client, packages, nexus_dates
+
+
+def _loaded(dataset_dir: str, format_type: str) -> NexusCatalog:
+    """Open a dataset's catalog and load one format."""
+    catalog = NexusCatalog(dataset_dir)
+    catalog.load(format_type)
+    return catalog
+
+
+def benchmark_cloudsmith(dataset_dir: str, format_type: str, nexus_client: NexusClient, packages: list,
+                         lookup_sample: int, repeat: int, results: Dict[str, Dict[str, Any]]) -> Dict[int, Optional[int]]:
+    """
+    Time Cloudsmith fetches against the mock server in bulk, batched and per-package modes.
+    
+    Returns:
+        Cloudsmith dates keyed by Nexus key ID (see NexusCatalog.join_dates)
+    """
+    api = MockCloudsmithAPI.from_file(os.path.join(dataset_dir, "cloudsmith", "groups.json"))
+    server = serve_in_background(api, FaultInjector())
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    client = CloudsmithClient(base_url=base_url,
+                              rate_limiter=RateLimiter(max_rate=BENCHMARK_MAX_REQUESTS_PER_SECOND))
+    try:
+        dates = measure(results, 'cloudsmith_bulk',
+                        lambda: client.get_last_updated_dates(format_type, ignore_tag=IGNORE_TAG),
+                        len(api.groups), repeat)
+        step = max(1, len(packages) // lookup_sample)
+        sample = packages[::step][:lookup_sample]
+        measure(results, 'cloudsmith_batched',
+                lambda: client.get_last_updated_dates_batched(sample, format_type, ignore_tag=IGNORE_TAG),
+                len(sample), repeat)
+        measure(results, 'cloudsmith_lookup',
+                lambda: [client.get_last_updated_date(pkg, format_type=format_type, ignore_tag=IGNORE_TAG)
+                         for pkg in sample],
+                len(sample), repeat)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+    return nexus_client.join_dates(dates, format_type)
+
+
+def benchmark_compare(nexus_client: NexusClient, format_type: str, packages: list, nexus_dates: List[Optional[int]],
+                      cloudsmith_by_key: Dict[int, Optional[int]], repeat: int,
+                      results: Dict[str, Dict[str, Any]]) -> List[FreshnessResult]:
+    """
+    Time compare_dates over a whole format, and its vectorized form when numpy is installed.
+    
+    Returns:
+        Result records for the output stages
+    """
+    cloudsmith_dates = [cloudsmith_by_key.get(nexus_client.key_id(pkg, format_type)) for pkg in packages]
+    compared = measure(results, 'compare_dates',
+                       lambda: [compare_dates(nexus, cloudsmith)
+                                for nexus, cloudsmith in zip(nexus_dates, cloudsmith_dates)],
+                       len(packages), repeat)
+    if freshness_checker.numpy is not None:
+        nexus_array = to_timestamp_array(nexus_dates)
+        cloudsmith_array = to_timestamp_array(cloudsmith_dates)
+        measure(results, 'compare_dates_vectorized',
+                lambda: compare_dates_vectorized(nexus_array, cloudsmith_array), len(packages), repeat)
+
+    return [FreshnessResult(format_type, freshness_checker.package_display_name(pkg, format_type),
+                            nexus, cloudsmith, freshness, source)
+            for pkg, nexus, cloudsmith, (freshness, source) in zip(packages, nexus_dates, cloudsmith_dates, compared)]
+
+
+def benchmark_output(records: List[FreshnessResult], repeat: int, results: Dict[str, Dict[str, Any]]) -> None:
+    """Time writing the result records through each available result sink."""
+    output_dir = tempfile.mkdtemp(prefix="freshness-benchmark-")
+    try:
+        for extension, sink_class in RESULT_SINKS.items():
+            path = os.path.join(output_dir, f"results{extension}")
+
+            def write_all():
+                sink = sink_class(path)
+                try:
+                    for record in records:
+                        sink.write(record)
+                finally:
+                    sink.close()
+
+            try:
+                measure(results, f"output_{extension.lstrip('.')}", write_all, len(records), repeat)
+            except RuntimeError as e:
+                logger.info(f"  Skipping {extension} output: {e}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def run_benchmarks(sizes: List[int], format_type: str, work_dir: str, repeat: int,
+                   lookup_sample: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Benchmark every stage at each catalog size.
+    
+    Args:
+        sizes: Nexus catalog sizes to benchmark
+        format_type: Package format
+        work_dir: Directory holding generated datasets
+        repeat: Timed runs per stage (the fastest is kept)
+        lookup_sample: Packages queried individually against Cloudsmith
+    
+    Returns:
+        Stage results by size label, then stage name
+    """
+    all_results = {}
+    for size in sizes:
+        dataset_dir = ensure_dataset(work_dir, size, format_type)
+        logger.info(f"Benchmarking {size_label(size)} {format_type} packages")
+        results = all_results[size_label(size)] = {}
+        nexus_client, packages, nexus_dates = benchmark_catalog(dataset_dir, format_type, repeat, results)
+        cloudsmith_by_key = benchmark_cloudsmith(dataset_dir, format_type, nexus_client, packages,
+                                                 lookup_sample, repeat, results)
+        records = benchmark_compare(nexus_client, format_type, packages, nexus_dates, cloudsmith_by_key,
+                                    repeat, results)
+        benchmark_output(records, repeat, results)
+    return all_results
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Dict[str, Any]]], baseline: Dict[str, Dict[str, Dict[str, Any]]],
+                        threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare stage timings with a baseline run.
+    
+    Args:
+        results: Stage results by size label, then stage name
+        baseline: Results of the baseline run, in the same layout
+        threshold: Relative slowdown reported as a regression (0.2 = 20% slower)
+    
+    Returns:
+        One row per stage present in both runs, with the time ratio and a status
+        of "regression", "improvement" or "ok"
+    """
+    rows = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not previous or not previous.get('seconds'):
+                continue
+            ratio = current['seconds'] / previous['seconds']
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append({'size': size, 'stage': stage, 'baseline_seconds': previous['seconds'],
+                         'seconds': current['seconds'], 'ratio': ratio, 'status': status})
+    return rows
+
+
+def log_comparison(rows: List[Dict[str, Any]]) -> None:
+    """Log a baseline comparison as a table."""
+    logger.info(f"{'Size':>6}  {'Stage':<26} {'Baseline ms':>12} {'Current ms':>12} {'Ratio':>7}  Status")
+    for row in rows:
+        logger.info(f"{row['size']:>6}  {row['stage']:<26} {row['baseline_seconds'] * 1000:12.2f} "
+                    f"{row['seconds'] * 1000:12.2f} {row['ratio']:7.2f}  {row['status']}")
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the interpreter and optional dependencies the results were measured with."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': getattr(freshness_checker.numpy, '__version__', None),
+        'pyarrow': getattr(freshness_checker.pyarrow, '__version__', None),
+    }
+
+
+def main():
+    """Main function to run the benchmarks."""
+    parser = argparse.ArgumentParser(description='Benchmark each stage of the freshness check')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                      help=f'Comma-separated catalog sizes, e.g. 10k,100k,1M (default: {DEFAULT_SIZES})')
+    parser.add_argument('--format', choices=FORMATS, default='maven',
+                      help='Package format to benchmark (default: maven)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                      help=f'Timed runs per stage; the fastest is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--lookup-sample', type=int, default=DEFAULT_LOOKUP_SAMPLE,
+                      help='Packages queried individually and in batches against the mock Cloudsmith server '
+                           f'(default: {DEFAULT_LOOKUP_SAMPLE})')
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), "freshness-benchmark"),
+                      help='Directory to generate and keep datasets in (default: a directory under the system temp dir)')
+    parser.add_argument('--output', default=None,
+                      help='Write results as JSON to this file (use it as a later --baseline)')
+    parser.add_argument('--baseline', default=None,
+                      help='Compare with results previously written by --output')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help='Relative slowdown reported as a regression '
+                           f'(default: {DEFAULT_THRESHOLD}, i.e. {DEFAULT_THRESHOLD:.0%} slower)')
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    # Per-load and per-request log lines would dominate the output
+    logging.getLogger("freshness-checker").setLevel(logging.WARNING)
+    logging.getLogger("catalog-generator").setLevel(logging.WARNING)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = run_benchmarks(sizes, args.format, args.work_dir, args.repeat, args.lookup_sample)
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'format': args.format,
+        'repeat': args.repeat,
+        'lookup_sample': args.lookup_sample,
+        'environment': environment(),
+        'results': results,
+    }
+
+    regressions = 0
+    if baseline is not None:
+        if baseline.get('environment') != report['environment']:
+            logger.warning("Baseline was recorded in a different environment; timings may not be comparable")
+        rows = compare_to_baseline(results, baseline.get('results', {}), args.threshold)
+        log_comparison(rows)
+        regressions = sum(1 for row in rows if row['status'] == "regression")
+        report['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold, 'stages': rows}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote benchmark results to {args.output}")
+
+    if regressions:
+        logger.error(f"{regressions} stage(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
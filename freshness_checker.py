@@ -10,14 +10,47 @@ the correct freshness date for each package group.
 import os
 import sys
 import json
+import csv
 import argparse
 import logging
-import re
-from datetime import datetime
+import time
+import math
+import functools
+import mmap
+import struct
+import sqlite3
+import random
+import hashlib
+import asyncio
+import threading
+from array import array
+from itertools import islice
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import requests
-from typing import Dict, List, Optional, Tuple, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple, Any, Iterable, Iterator, AsyncIterator, Callable
 from dotenv import load_dotenv
 
+try:
+    import aiohttp
+except ImportError:  # Optional: only required for --concurrency
+    aiohttp = None
+
+try:
+    import numpy
+except ImportError:  # Optional: only required for the vectorized batch API
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Optional: only required for .parquet / .arrow output
+    pyarrow = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,325 +58,3575 @@ logging.basicConfig(
 )
 logger = logging.getLogger("freshness-checker")
 
-# Load environment variables
-load_dotenv()
+# Load environment variables
+load_dotenv()
+
+# Environment variables
+CLOUDSMITH_BASE_URL = os.getenv("CLOUDSMITH_BASE_URL", "https://api.cloudsmith.io")
+CLOUDSMITH_API_KEY = os.getenv("CLOUDSMITH_API_KEY")
+CLOUDSMITH_ORG = os.getenv("CLOUDSMITH_ORG", "customer-org")
+CLOUDSMITH_REPO = os.getenv("CLOUDSMITH_REPO", "maven-repo")
+
+# Constants
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_MAX_REQUESTS_PER_SECOND = 50.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BATCH_SIZE = 50
+# Raw query characters per request; keeps the URL well under common 8 KiB limits once encoded
+DEFAULT_MAX_QUERY_LENGTH = 2000
+# Largest page size requested from the groups API. The server may serve smaller
+# pages than requested, so paging follows X-Pagination-PageTotal, not page length
+MAX_PAGE_SIZE = 1000
+# Lookup modes that list a whole format from Cloudsmith up front
+PREFETCH_MODES = ('bulk', 'incremental')
+DEFAULT_CACHE_DIR = os.getenv("FRESHNESS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "freshness-checker"))
+# Short enough that a nightly run always refetches, long enough to make same-day re-runs free
+DEFAULT_CACHE_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_CACHE_MAX_ENTRIES = 1_000_000
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+# Formatted dates kept by format_date_for_display; many packages share a lastUpdated
+DISPLAY_CACHE_SIZE = 4096
+DEFAULT_PROGRESS_INTERVAL = 10.0
+# Steps of a run timed by StageTimings, in report order
+TIMED_STAGES = {
+    'nexus_listing': "Step 1: Nexus listing",
+    'nexus_lookup': "Step 2: Nexus date lookup",
+    'cloudsmith_query': "Step 3: Cloudsmith query",
+    'comparison': "Step 4: Comparison",
+    'output': "Step 5: Output",
+}
+TIMING_PERCENTILES = (50, 95, 99)
+# Stage latencies go into log-spaced buckets, each TIMING_BUCKET_GROWTH times wider
+# than the last, so memory is fixed and percentiles are within 1% of the exact value
+TIMING_MIN_SECONDS = 1e-7
+TIMING_MAX_SECONDS = 1e4
+TIMING_BUCKET_GROWTH = 1.01
+# Prometheus textfile metrics (see RunMetrics)
+METRICS_PREFIX = "freshness_checker"
+REQUEST_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Characters read per step when streaming a JSON array file
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+# Compiled catalog layout: header, (B+1) key block offsets, N timestamps,
+# M listing entries, prefix-compressed key blocks. Integers are little-endian;
+# see compile_catalog().
+CATALOG_MAGIC = b"NXCATLG\x02"
+CATALOG_HEADER = struct.Struct("<8sQQQ")
+CATALOG_KEY_ENTRY = struct.Struct("<HH")
+CATALOG_MAX_SHARED_PREFIX = 0xFFFF
+# Prefix and suffix lengths are stored as uint16, which bounds the encoded key size
+CATALOG_MAX_KEY_LENGTH = 0xFFFF
+CATALOG_BLOCK_SIZE = 16
+CATALOG_LISTING_CHUNK = 16 * 1024
+
+# Vectorized batch API: missing dates in int64 arrays, and compact source codes
+MISSING_TIMESTAMP = -(2 ** 63)
+SOURCE_UNKNOWN = 0
+SOURCE_NEXUS = 1
+SOURCE_CLOUDSMITH = 2
+SOURCE_NAMES = {SOURCE_UNKNOWN: "unknown", SOURCE_NEXUS: "nexus", SOURCE_CLOUDSMITH: "cloudsmith"}
+BACKOFF_BASE_SECONDS = 0.5
+# Successful responses after which a throttled rate limiter steps its rate back up,
+# and the step as a fraction of the maximum rate (additive increase)
+RATE_RECOVERY_SUCCESSES = 10
+RATE_RECOVERY_STEP = 0.1
+# Seconds to wait for a Cloudsmith connection or response before retrying
+DEFAULT_REQUEST_TIMEOUT = 30.0
+BACKOFF_MAX_SECONDS = 60.0
+
+def package_key(identifier: Dict[str, str], format_type: str) -> Optional[Tuple[str, ...]]:
+    """
+    Build the hashable identity of a package group.
+    
+    Args:
+        identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        (groupId, artifactId) for Maven, (name,) for npm/python, None for unsupported formats
+    """
+    if format_type == "maven":
+        return (identifier.get("groupId"), identifier.get("artifactId"))
+    elif format_type in ["npm", "python"]:
+        return (identifier.get("name"),)
+    return None
+
+
+def identifier_from_key(key: Tuple[str, ...], format_type: str) -> Dict[str, str]:
+    """
+    Rebuild a package identifier from its package key (inverse of package_key).
+    
+    Args:
+        key: (groupId, artifactId) for Maven, (name,) for npm/python
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        Package identifier dictionary
+    """
+    if format_type == "maven":
+        return {"groupId": key[0], "artifactId": key[1]}
+    return {"name": key[0]}
+
+
+def intern_string(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string so repeated values share one object.
+    
+    Args:
+        value: String to intern, or None
+    
+    Returns:
+        The interned string, or None
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PackageIdentity:
+    """
+    Compact identity of a Nexus package group.
+    
+    Stands in for the per-package identifier dict: fields live in __slots__ and
+    strings are interned, so a groupId shared by many Maven artifacts is stored
+    once. get() accepts the dict field names (groupId, artifactId, name), so
+    helpers written against identifier dicts accept either.
+    
+    Identities listed from a NexusCatalog also carry their catalog key ID and
+    the index that assigned it, so per-package lookups in that index use the
+    ID instead of hashing the strings again. Neither is part of equality or
+    hashing.
+    """
+    __slots__ = ('group_id', 'artifact_id', 'name', 'key_id', 'key_index')
+
+    FIELDS = {'groupId': 'group_id', 'artifactId': 'artifact_id', 'name': 'name'}
+
+    def __init__(self, group_id: Optional[str] = None, artifact_id: Optional[str] = None, name: Optional[str] = None,
+                 key_id: Optional[int] = None, key_index: Any = None):
+        self.group_id = intern_string(group_id)
+        self.artifact_id = intern_string(artifact_id)
+        self.name = intern_string(name)
+        self.key_id = key_id
+        self.key_index = key_index
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any], format_type: str) -> "PackageIdentity":
+        """
+        Build an identity from a catalog entry or identifier dict.
+        
+        Args:
+            entry: Dictionary with groupId/artifactId (Maven) or name (npm/python)
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Package identity
+        """
+        if format_type == "maven":
+            return cls(group_id=entry.get("groupId"), artifact_id=entry.get("artifactId"))
+        return cls(name=entry.get("name"))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Return a field by its identifier dict name (groupId, artifactId or name)."""
+        attribute = self.FIELDS.get(field)
+        value = getattr(self, attribute) if attribute else None
+        return default if value is None else value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackageIdentity):
+            return NotImplemented
+        return (self.group_id, self.artifact_id, self.name) == (other.group_id, other.artifact_id, other.name)
+
+    def __hash__(self) -> int:
+        return hash((self.group_id, self.artifact_id, self.name))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={self.get(field)!r}" for field in self.FIELDS if self.get(field) is not None)
+        return f"PackageIdentity({fields})"
+
+
+
+def group_key(group: Dict[str, Any], format_type: str) -> Optional[Tuple[str, ...]]:
+    """
+    Build the identity of a Cloudsmith package group, matching package_key().
+    
+    Args:
+        group: Package group as returned by the Cloudsmith groups API
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        (maven_group_id, name) for Maven, (name,) for npm/python, None for unsupported formats
+    """
+    if format_type == "maven":
+        return (group.get("maven_group_id"), group.get("name"))
+    elif format_type in ["npm", "python"]:
+        return (group.get("name"),)
+    return None
+
+
+def parse_timestamp(date_str: Optional[str]) -> Optional[int]:
+    """
+    Convert a YYYYMMDDHHMMSS date string (UTC) into epoch seconds.
+    
+    Dates are parsed once when they enter the checker and carried as integers
+    until they are formatted for output.
+    
+    Args:
+        date_str: Date in format YYYYMMDDHHMMSS
+    
+    Returns:
+        Epoch seconds, or None if the date is empty or malformed
+    """
+    if not date_str:
+        return None
+    # With exactly 14 digits every field is two digits wide (four for the year),
+    # so strptime can't misalign them; it rejects out-of-range fields
+    if len(date_str) != 14 or not date_str.isdigit():
+        logger.warning(f"Ignoring malformed date: {date_str}")
+        return None
+    try:
+        parsed = datetime.strptime(date_str, "%Y%m%d%H%M%S")
+    except ValueError:
+        logger.warning(f"Ignoring malformed date: {date_str}")
+        return None
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+def format_timestamp(epoch: Optional[int]) -> Optional[str]:
+    """
+    Convert epoch seconds back into a YYYYMMDDHHMMSS date string (UTC).
+    
+    Args:
+        epoch: Epoch seconds
+    
+    Returns:
+        Date string in format YYYYMMDDHHMMSS, or None if epoch is None
+    """
+    if epoch is None:
+        return None
+    return time.strftime("%Y%m%d%H%M%S", time.gmtime(epoch))
+
+
+def parse_last_push(last_push: Optional[str]) -> Optional[int]:
+    """
+    Convert a Cloudsmith last_push timestamp into epoch seconds.
+    
+    Args:
+        last_push: ISO 8601 timestamp from the groups API (UTC if no offset is given)
+    
+    Returns:
+        Epoch seconds, or None if last_push is empty or malformed
+    """
+    if not last_push:
+        return None
+    try:
+        pushed_at = datetime.fromisoformat(last_push)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed last_push: {last_push}")
+        return None
+    if pushed_at.tzinfo is None:
+        pushed_at = pushed_at.replace(tzinfo=timezone.utc)
+    return int(pushed_at.timestamp())
+
+def package_group_clause(identifier: Dict[str, str], format_type: str) -> str:
+    """
+    Build the query clause that identifies a single package group.
+    
+    Args:
+        identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        Cloudsmith search query clause
+    """
+    if format_type == "maven":
+        group_id = identifier.get("groupId")
+        artifact_id = identifier.get("artifactId")
+        return f'maven_group_id:^{group_id}$ AND name:^{artifact_id}$'
+    name = identifier.get("name")
+    return f'name:^{name}$'
+
+
+def package_group_query(identifier: Dict[str, str], format_type: str, ignore_tag: str) -> str:
+    """
+    Build the Cloudsmith groups query that matches exactly one package group.
+    
+    Args:
+        identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+        format_type: Package format (maven, npm, or python)
+        ignore_tag: Tag to ignore when fetching the last updated date
+    
+    Returns:
+        Cloudsmith search query string
+    """
+    pakage_query = package_group_clause(identifier, format_type)
+    return f"format:{format_type} AND {pakage_query} AND NOT tag:{ignore_tag}"
+
+
+def batched_group_queries(identifiers: List[Dict[str, str]], format_type: str, ignore_tag: str,
+                          batch_size: int = DEFAULT_BATCH_SIZE,
+                          max_query_length: int = DEFAULT_MAX_QUERY_LENGTH) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+    """
+    Pack package group clauses into OR-combined queries.
+    
+    Each query holds at most `batch_size` identities and stays within
+    `max_query_length` characters; an identity whose clause alone exceeds the
+    limit is sent in a query of its own.
+    
+    Args:
+        identifiers: Package identifiers to look up
+        format_type: Package format (maven, npm, or python)
+        ignore_tag: Tag to ignore when fetching the last updated date
+        batch_size: Maximum identities per query
+        max_query_length: Maximum query length in characters
+    
+    Yields:
+        Tuples of (query, identifiers covered by the query)
+    """
+    prefix = f"format:{format_type} AND ("
+    suffix = f") AND NOT tag:{ignore_tag}"
+    separator = " OR "
+
+    batch, clauses = [], []
+    length = len(prefix) + len(suffix)
+    for identifier in identifiers:
+        clause = f"({package_group_clause(identifier, format_type)})"
+        extra = len(clause) + (len(separator) if clauses else 0)
+        if clauses and (len(batch) >= batch_size or length + extra > max_query_length):
+            yield prefix + separator.join(clauses) + suffix, batch
+            batch, clauses = [], []
+            length = len(prefix) + len(suffix)
+            extra = len(clause)
+        batch.append(identifier)
+        clauses.append(clause)
+        length += extra
+
+    if batch:
+        yield prefix + separator.join(clauses) + suffix, batch
+
+
+def dates_from_batch_response(response: Dict, identifiers: List[Dict[str, str]], format_type: str) -> Dict[Tuple[str, ...], Optional[int]]:
+    """
+    Split a batched query response back out per identity.
+    
+    Args:
+        response: Decoded groups API response
+        identifiers: Identities the query was built from
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        Mapping of package key to last updated date; identities that matched nothing map to None
+    """
+    found = {}
+    for group in response.get("results", []):
+        found.setdefault(group_key(group, format_type), parse_last_push(group.get("last_push")))
+    return {package_key(identifier, format_type): found.get(package_key(identifier, format_type))
+            for identifier in identifiers}
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split items into consecutive chunks of at most `size` elements.
+    
+    Args:
+        items: Items to split
+        size: Maximum chunk size
+    
+    Yields:
+        Lists of consecutive items
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_json_array(path: str, chunk_size: int = JSON_STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Stream the elements of a file holding a top-level JSON array.
+    
+    The file is read in chunks and decoded one element at a time, so only the
+    current chunk and element are held in memory however long the array is.
+    
+    Args:
+        path: Path of the JSON file
+        chunk_size: Characters to read from the file at a time
+    
+    Yields:
+        Decoded array elements in file order
+    
+    Raises:
+        json.JSONDecodeError: If the file is not a well-formed JSON array, or
+            anything but whitespace follows it
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def extend() -> None:
+            # Drop consumed input and append the next chunk
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+
+        def peek() -> str:
+            # Skip whitespace and return the next character ('' at end of file)
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos:pos + 1]
+                extend()
+
+        def close() -> None:
+            # Consume the closing bracket; only whitespace may follow it
+            nonlocal pos
+            pos += 1
+            if peek():
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+
+        if peek() != '[':
+            raise json.JSONDecodeError("Expecting '['", buffer, pos)
+        pos += 1
+        if peek() == ']':
+            close()
+            return
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                extend()
+                continue
+            if not eof and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                # A number cut at the chunk boundary may continue in the next chunk
+                extend()
+                continue
+            pos = end
+            yield value
+
+            delimiter = peek()
+            if delimiter == ']':
+                close()
+                return
+            if delimiter != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            peek()
+
+
+def encode_catalog_key(key: Tuple[str, ...]) -> bytes:
+    """
+    Encode a package key for the compiled catalog's key table.
+    
+    Parts are NUL-joined UTF-8, so byte order matches tuple order.
+    
+    Args:
+        key: Package key from package_key()
+    
+    Returns:
+        Encoded key
+    """
+    return "\0".join(part or "" for part in key).encode("utf-8")
+
+
+def shared_prefix_length(a: bytes, b: bytes) -> int:
+    """
+    Length of the common prefix of two byte strings.
+    
+    Args:
+        a: First byte string
+        b: Second byte string
+    
+    Returns:
+        Number of leading bytes a and b share
+    """
+    limit = min(len(a), len(b), CATALOG_MAX_SHARED_PREFIX)
+    length = 0
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def compile_catalog(source: str, destination: str, format_type: str) -> int:
+    """
+    Compile a JSON package listing into a binary catalog for BinaryCatalog.
+    
+    The file holds a sorted, prefix-compressed key table, packed int64
+    lastUpdated timestamps aligned with it, and the listing order as uint32
+    key indices. Keys are stored in blocks of CATALOG_BLOCK_SIZE: the first key
+    of a block in full, each following key as the length of the prefix it
+    shares with its predecessor plus the remaining suffix. An offsets index
+    points at the start of each block. As in NexusCatalog, the first entry for
+    a duplicated key wins. The file is written atomically.
+    
+    Args:
+        source: JSON array file (fixtures/{format}/packages.json or a Nexus export)
+        destination: Path of the compiled catalog
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        Number of listing entries compiled
+    
+    Raises:
+        OSError: If the source cannot be read or the destination written
+        json.JSONDecodeError: If the source is not a well-formed JSON array
+        ValueError: If a package key is longer than CATALOG_MAX_KEY_LENGTH bytes
+    """
+    key_ids: Dict[bytes, int] = {}
+    timestamps = array('q')
+    listing = array('I')
+    for pkg in iter_json_array(source):
+        key = encode_catalog_key(package_key(pkg, format_type))
+        if len(key) > CATALOG_MAX_KEY_LENGTH:
+            raise ValueError(f"Package key {key[:64].decode('utf-8', 'replace')!r}... is {len(key)} bytes; "
+                             f"compiled catalogs hold keys of at most {CATALOG_MAX_KEY_LENGTH} bytes")
+        key_id = key_ids.get(key)
+        if key_id is None:
+            key_id = key_ids[key] = len(timestamps)
+            timestamp = parse_timestamp(pkg.get("lastUpdated"))
+            timestamps.append(MISSING_TIMESTAMP if timestamp is None else timestamp)
+        listing.append(key_id)
+
+    keys = sorted(key_ids)
+    rank = array('I', bytes(4 * len(keys)))
+    sorted_timestamps = array('q')
+    block_offsets = array('Q')
+    blob = bytearray()
+    previous = b""
+    for position, key in enumerate(keys):
+        key_id = key_ids[key]
+        rank[key_id] = position
+        sorted_timestamps.append(timestamps[key_id])
+        if position % CATALOG_BLOCK_SIZE == 0:
+            block_offsets.append(len(blob))
+            shared = 0
+        else:
+            shared = shared_prefix_length(previous, key)
+        blob += CATALOG_KEY_ENTRY.pack(shared, len(key) - shared)
+        blob += key[shared:]
+        previous = key
+    block_offsets.append(len(blob))
+    listing = array('I', (rank[key_id] for key_id in listing))
+    if sys.byteorder != "little":
+        for table in (block_offsets, sorted_timestamps, listing):
+            table.byteswap()
+
+    tmp_path = f"{destination}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CATALOG_HEADER.pack(CATALOG_MAGIC, len(keys), len(listing), len(blob)))
+        block_offsets.tofile(f)
+        sorted_timestamps.tofile(f)
+        listing.tofile(f)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, destination)
+    raw_size = sum(len(key) for key in keys)
+    logger.info(f"Compiled {len(listing)} {format_type} packages ({len(keys)} unique) into {destination}; "
+                f"key table {len(blob)} bytes ({raw_size} uncompressed)")
+    return len(listing)
+
+
+class BinaryCatalog:
+    """
+    Read-only view of a catalog compiled by compile_catalog().
+    
+    The file is memory-mapped, so opening it costs the same whatever its size
+    and its pages are shared by every process mapping it. Lookups
+    binary-search the first keys of the prefix-compressed blocks (O(log N))
+    and then decode at most one block. Keys are addressed by their position in
+    the sorted table, which also serves as the package's integer key ID.
+    """
+    def __init__(self, path: str):
+        """
+        Open a compiled catalog.
+        
+        Args:
+            path: Path of the compiled catalog
+        
+        Raises:
+            OSError: If the file cannot be opened
+            ValueError: If the file is empty, truncated or not a compiled catalog
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < CATALOG_HEADER.size:
+            raise ValueError(f"Not a compiled catalog: {path}")
+        magic, self.key_count, self.listing_count, keys_size = CATALOG_HEADER.unpack_from(self._mm, 0)
+        if magic != CATALOG_MAGIC:
+            raise ValueError(f"Not a compiled catalog (or an older format, re-run --compile-catalog): {path}")
+        self.block_count = -(-self.key_count // CATALOG_BLOCK_SIZE)
+        self._offsets = CATALOG_HEADER.size
+        self._timestamps = self._offsets + 8 * (self.block_count + 1)
+        self._listing = self._timestamps + 8 * self.key_count
+        self._keys = self._listing + 4 * self.listing_count
+        if self._keys + keys_size != len(self._mm):
+            raise ValueError(f"Truncated compiled catalog: {path}")
+        # Last decoded block, as (block number, keys); listings are often in key order
+        self._block_cache: Tuple[int, List[bytes]] = (-1, [])
+
+    def __len__(self) -> int:
+        return self.key_count
+
+    def _block_keys(self, block: int) -> List[bytes]:
+        """Decode the keys of one prefix-compressed block."""
+        cached_block, cached_keys = self._block_cache
+        if cached_block == block:
+            return cached_keys
+        start, end = struct.unpack_from("<QQ", self._mm, self._offsets + 8 * block)
+        pos, end = self._keys + start, self._keys + end
+        keys = []
+        previous = b""
+        while pos < end:
+            shared, suffix_length = CATALOG_KEY_ENTRY.unpack_from(self._mm, pos)
+            pos += CATALOG_KEY_ENTRY.size
+            previous = previous[:shared] + self._mm[pos:pos + suffix_length]
+            pos += suffix_length
+            keys.append(previous)
+        self._block_cache = (block, keys)
+        return keys
+
+    def _first_key(self, block: int) -> bytes:
+        """Read the first key of a block, which is stored uncompressed."""
+        (start,) = struct.unpack_from("<Q", self._mm, self._offsets + 8 * block)
+        _, length = CATALOG_KEY_ENTRY.unpack_from(self._mm, self._keys + start)
+        start = self._keys + start + CATALOG_KEY_ENTRY.size
+        return self._mm[start:start + length]
+
+    def key_id(self, key: Tuple[str, ...]) -> Optional[int]:
+        """
+        Find the position of a package key in the sorted table.
+        
+        Args:
+            key: Package key from package_key()
+        
+        Returns:
+            Key ID (sorted position), or None if the key is absent
+        """
+        target = encode_catalog_key(key)
+        # Last block whose first key is <= target
+        low, high = 0, self.block_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._first_key(middle) <= target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+        block = low - 1
+        for offset, candidate in enumerate(self._block_keys(block)):
+            if candidate == target:
+                return block * CATALOG_BLOCK_SIZE + offset
+            if candidate > target:
+                break
+        return None
+
+    def key_at(self, key_id: int) -> Tuple[str, ...]:
+        """
+        Decode the package key stored at a position of the sorted table.
+        
+        Args:
+            key_id: Key ID (sorted position)
+        
+        Returns:
+            Package key
+        """
+        block, offset = divmod(key_id, CATALOG_BLOCK_SIZE)
+        return tuple(self._block_keys(block)[offset].decode("utf-8").split("\0"))
+
+    def timestamp_at(self, key_id: int) -> Optional[int]:
+        """
+        Read the lastUpdated timestamp stored for a key ID.
+        
+        Args:
+            key_id: Key ID (sorted position)
+        
+        Returns:
+            lastUpdated as epoch seconds, or None if the entry has no date
+        """
+        (timestamp,) = struct.unpack_from("<q", self._mm, self._timestamps + 8 * key_id)
+        return None if timestamp == MISSING_TIMESTAMP else timestamp
+
+    def __contains__(self, key: Tuple[str, ...]) -> bool:
+        return self.key_id(key) is not None
+
+    def get(self, key: Tuple[str, ...], default: Optional[int] = None) -> Optional[int]:
+        """
+        Look up the lastUpdated timestamp for a package key.
+        
+        Args:
+            key: Package key from package_key()
+            default: Value returned if the key is absent
+        
+        Returns:
+            lastUpdated as epoch seconds (None if the entry has no date), or default
+        """
+        key_id = self.key_id(key)
+        if key_id is None:
+            return default
+        return self.timestamp_at(key_id)
+
+    def iter_listing(self) -> Iterator[int]:
+        """
+        Stream the key IDs of the original listing, in order.
+        
+        Yields:
+            Key IDs, including duplicated entries
+        """
+        end = self._listing + 4 * self.listing_count
+        for start in range(self._listing, end, 4 * CATALOG_LISTING_CHUNK):
+            chunk = self._mm[start:min(start + 4 * CATALOG_LISTING_CHUNK, end)]
+            for (key_id,) in struct.iter_unpack("<I", chunk):
+                yield key_id
+
+    def iter_keys(self) -> Iterator[Tuple[str, ...]]:
+        """
+        Stream package keys in the original listing order.
+        
+        Yields:
+            Package keys, including duplicated entries
+        """
+        for key_id in self.iter_listing():
+            yield self.key_at(key_id)
+
+
+class SymbolTable:
+    """
+    Interning table mapping strings to dense integer symbol IDs.
+    
+    Each distinct string (a groupId, artifactId or package name) is stored
+    once, and keys built from symbol IDs compare as integers. IDs are never
+    reused or removed, so they stay valid for the life of the table.
+    """
+    def __init__(self):
+        self._ids: Dict[Optional[str], int] = {}
+        self._values: List[Optional[str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Optional[str]) -> int:
+        """
+        Return the symbol ID of a string, adding it if it is new.
+        
+        Args:
+            value: String to intern (None is a valid symbol)
+        
+        Returns:
+            Symbol ID
+        """
+        symbol = self._ids.get(value)
+        if symbol is None:
+            with self._lock:
+                symbol = self._ids.get(value)
+                if symbol is None:
+                    symbol = len(self._values)
+                    self._values.append(intern_string(value))
+                    self._ids[self._values[symbol]] = symbol
+        return symbol
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        """
+        Return the symbol ID of a string without adding it.
+        
+        Args:
+            value: String to look up
+        
+        Returns:
+            Symbol ID, or None if the string is unknown
+        """
+        return self._ids.get(value)
+
+    def value(self, symbol: int) -> Optional[str]:
+        """
+        Return the string for a symbol ID.
+        
+        Args:
+            symbol: Symbol ID
+        
+        Returns:
+            Interned string
+        """
+        return self._values[symbol]
+
+
+def list_groups_params(format_type: str, ignore_tag: Optional[str], page_size: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Build the first-page parameters for listing all package groups of a format.
+    
+    Args:
+        format_type: Package format (maven, npm, or python)
+        ignore_tag: Tag to ignore when listing package groups
+        page_size: Groups per page
+    
+    Returns:
+        Query parameters for the groups endpoint
+    """
+    return {
+        "page": 1,
+        "page_size": page_size,
+        "query": f"format:{format_type} AND NOT tag:{ignore_tag}",
+        "sort": "-last_push"
+    }
+
+
+def last_push_from_response(response: Dict, query: str) -> Optional[int]:
+    """
+    Extract the last push date from a single-group query response.
+    
+    Args:
+        response: Decoded groups API response
+        query: Query the response was produced for (used in the error message)
+    
+    Returns:
+        Last updated date as epoch seconds, or None if no group matched
+    """
+    results = response.get("results", [])
+    assert len(results) <= 1, f"Expected at most one package for query: {query}"
+    if results:
+        return parse_last_push(results[0].get("last_push"))
+    return None
+
+class NexusCatalog:
+    """
+    In-memory catalog of Nexus package groups.
+    
+    Each format's packages.json is streamed once and indexed by package key, so
+    lookups are O(1) instead of re-reading and scanning the file per package.
+    Key parts (groupId, artifactId, name) are interned in a SymbolTable and the
+    index is keyed by integer key IDs packed from their symbol IDs, so each
+    distinct string is stored once and joins compare integers.
+    Only the key-to-date index and the key IDs in file order are kept, so the
+    raw entries are never all held in memory: iter_identities() rebuilds the
+    listing from the same snapshot as the index, and iter_packages() streams
+    the raw entries from the file again.
+    If an up-to-date compiled catalog (packages.bin, see compile_catalog()) sits
+    next to packages.json, it is memory-mapped instead of parsing the JSON.
+    Call invalidate() or reload() to pick up new catalog data.
+    """
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        """
+        Initialize the catalog.
+        
+        Args:
+            fixtures_dir: Directory containing {format}/packages.json files
+        """
+        self.fixtures_dir = fixtures_dir
+        self._counts: Dict[str, int] = {}
+        self._index: Dict[str, Dict[int, Optional[int]] | BinaryCatalog] = {}
+        # Key IDs in file order, for catalogs indexed from JSON
+        self._listings: Dict[str, array] = {}
+        self.symbols = SymbolTable()
+        # Guards loading and invalidation; lookups on a loaded index are lock-free
+        self._lock = threading.RLock()
+
+    def load(self, format_type: str) -> bool:
+        """
+        Load and index a format's catalog unless it is already loaded.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            True if the catalog is available, False if it could not be loaded
+        """
+        if format_type in self._index:
+            return True
+
+        with self._lock:
+            if format_type in self._index:
+                return True
+
+            compiled_file = self.compiled_file(format_type)
+            if self.has_current_compiled(format_type):
+                try:
+                    compiled = BinaryCatalog(compiled_file)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring compiled catalog {compiled_file}: {e}")
+                else:
+                    logger.info(f"Opened compiled catalog with {compiled.listing_count} {format_type} packages")
+                    self._counts[format_type] = compiled.listing_count
+                    self._index[format_type] = compiled
+                    return True
+
+            fixtures_file = self.fixtures_file(format_type)
+            index = {}
+            listing = array('Q')
+            try:
+                for pkg in iter_json_array(fixtures_file):
+                    # First entry wins, matching the previous linear scan
+                    key_id = self._symbol_key(package_key(pkg, format_type), add=True)
+                    listing.append(key_id)
+                    if key_id not in index:
+                        index[key_id] = parse_timestamp(pkg.get("lastUpdated"))
+            except FileNotFoundError:
+                logger.error(f"Fixtures file not found: {fixtures_file}")
+                return False
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse fixtures file: {fixtures_file}")
+                return False
+            logger.info(f"Loaded {len(listing)} {format_type} packages from fixtures")
+
+            self._counts[format_type] = len(listing)
+            self._listings[format_type] = listing
+            self._index[format_type] = index
+            return True
+
+    def fixtures_file(self, format_type: str) -> str:
+        """
+        Path of a format's catalog file.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Path of {fixtures_dir}/{format}/packages.json
+        """
+        return os.path.join(self.fixtures_dir, format_type, "packages.json")
+
+    def compiled_file(self, format_type: str) -> str:
+        """
+        Path of a format's compiled catalog.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Path of {fixtures_dir}/{format}/packages.bin
+        """
+        return os.path.join(self.fixtures_dir, format_type, "packages.bin")
+
+    def has_current_compiled(self, format_type: str) -> bool:
+        """
+        Check for a compiled catalog at least as new as packages.json.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            True if the compiled catalog should be used
+        """
+        try:
+            compiled_mtime = os.path.getmtime(self.compiled_file(format_type))
+        except OSError:
+            return False
+        try:
+            return compiled_mtime >= os.path.getmtime(self.fixtures_file(format_type))
+        except OSError:
+            return True
+
+    def fingerprint(self, format_type: str) -> Optional[str]:
+        """
+        Identify the current version of a format's catalog file.
+        
+        The fingerprint changes whenever the file is rewritten or replaced, so
+        a checkpoint can tell whether its listing positions still apply.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            "<size>-<mtime in ns>" of packages.json (of packages.bin if only the
+            compiled catalog exists), or None if neither exists
+        """
+        for path in (self.fixtures_file(format_type), self.compiled_file(format_type)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            return f"{stat.st_size}-{stat.st_mtime_ns}"
+        return None
+
+    def invalidate(self, format_type: Optional[str] = None) -> None:
+        """
+        Drop cached catalog data so the next access re-reads it from disk.
+        
+        Args:
+            format_type: Format to invalidate, or None to invalidate all formats
+        """
+        with self._lock:
+            if format_type is None:
+                self._counts.clear()
+                self._listings.clear()
+                self._index.clear()
+            else:
+                self._counts.pop(format_type, None)
+                self._listings.pop(format_type, None)
+                self._index.pop(format_type, None)
+
+    def reload(self, format_type: str) -> bool:
+        """
+        Invalidate and immediately re-load a format's catalog.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            True if the catalog was re-loaded successfully
+        """
+        with self._lock:
+            self.invalidate(format_type)
+            return self.load(format_type)
+
+    def iter_packages(self, format_type: str) -> Iterator[Dict[str, str]]:
+        """
+        Stream the raw catalog entries for a format.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Yields:
+            Catalog entries in file order (identifiers only, when served from a
+            compiled catalog), none if the catalog could not be loaded
+        """
+        if not self.load(format_type):
+            return
+        index = self._index[format_type]
+        if isinstance(index, BinaryCatalog):
+            for key in index.iter_keys():
+                yield identifier_from_key(key, format_type)
+        else:
+            yield from iter_json_array(self.fixtures_file(format_type))
+
+    def iter_identities(self, format_type: str) -> Iterator[PackageIdentity]:
+        """
+        Stream a format's package identities with their key IDs resolved.
+        
+        Identities are rebuilt from the key IDs recorded when the index was
+        loaded, so they always match it even if the file has changed since,
+        and later lookups of the identity (key_id(), join_dates() results,
+        get_last_updated_date()) are plain integer lookups.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Yields:
+            Package identities in file order, none if the catalog could not be loaded
+        """
+        with self._lock:
+            if not self.load(format_type):
+                return
+            index = self._index[format_type]
+            listing = self._listings.get(format_type)
+        if isinstance(index, BinaryCatalog):
+            key_ids, key_at = index.iter_listing(), index.key_at
+        else:
+            key_ids, key_at = listing, functools.partial(self._key_at, format_type=format_type)
+        for key_id in key_ids:
+            identity = PackageIdentity.from_entry(identifier_from_key(key_at(key_id), format_type), format_type)
+            identity.key_id, identity.key_index = key_id, index
+            yield identity
+
+    def packages(self, format_type: str) -> List[Dict[str, str]]:
+        """
+        Return the raw catalog entries for a format.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            List of catalog entries, empty if the catalog could not be loaded
+        """
+        return list(self.iter_packages(format_type))
+
+    def count(self, format_type: str) -> int:
+        """
+        Return the number of catalog entries for a format.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Number of entries, 0 if the catalog could not be loaded
+        """
+        if not self.load(format_type):
+            return 0
+        return self._counts[format_type]
+
+    def _symbol_key(self, key: Tuple[str, ...], add: bool = False) -> Optional[int]:
+        """Pack a package key's symbol IDs into one integer key ID (None if a part is unknown)."""
+        key_id = 0
+        for part in key:
+            symbol = self.symbols.intern(part) if add else self.symbols.lookup(part)
+            if symbol is None:
+                return None
+            key_id = (key_id << 32) | symbol
+        return key_id
+
+    def _key_at(self, key_id: int, format_type: str) -> Tuple[str, ...]:
+        """Unpack a key ID from _symbol_key() back into its package key."""
+        parts = 2 if format_type == "maven" else 1
+        return tuple(self.symbols.value((key_id >> (32 * shift)) & 0xFFFFFFFF) for shift in reversed(range(parts)))
+
+    def _find(self, key: Tuple[str, ...], format_type: str) -> Tuple[Any, Optional[int]]:
+        """Return a format's loaded index and the key ID of a package key in it (None if absent)."""
+        if key is None or not self.load(format_type):
+            return None, None
+        index = self._index[format_type]
+        if isinstance(index, BinaryCatalog):
+            return index, index.key_id(key)
+        key_id = self._symbol_key(key)
+        return index, key_id if key_id in index else None
+
+    def _locate(self, identifier: Dict[str, str], format_type: str) -> Tuple[Any, Optional[int]]:
+        """Like _find(), but use the key ID already resolved on a PackageIdentity listed from this index."""
+        key_id = getattr(identifier, 'key_id', None)
+        # Key IDs from another catalog, format or a since reloaded index don't apply
+        if key_id is not None and getattr(identifier, 'key_index', None) is self._index.get(format_type):
+            return self._index[format_type], key_id
+        return self._find(package_key(identifier, format_type), format_type)
+
+    def key_id(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """
+        Look up the integer key ID of a package group.
+        
+        Key IDs are only meaningful within this catalog and format, and are the
+        keys of the mappings returned by join_dates(). Identities from
+        iter_identities() already carry theirs, which is returned directly.
+        
+        Args:
+            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Key ID, or None if the package group is not in the catalog
+        """
+        return self._locate(identifier, format_type)[1]
+
+    def join_dates(self, dates: Dict[Tuple[str, ...], Optional[int]], format_type: str) -> Dict[int, Optional[int]]:
+        """
+        Re-key dates fetched by package key (e.g. a Cloudsmith listing) by key ID.
+        
+        Groups that are not in the catalog are dropped, since no package will
+        look them up.
+        
+        Args:
+            dates: Dates keyed by package key
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Dates keyed by key ID
+        """
+        joined = {}
+        for key, date in dates.items():
+            key_id = self._find(key, format_type)[1]
+            if key_id is not None:
+                joined[key_id] = date
+        return joined
+
+    def get_last_updated_date(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """
+        Look up the lastUpdated date for a package group.
+        
+        Args:
+            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            lastUpdated date as epoch seconds, or None if not found
+        """
+        index, key_id = self._locate(identifier, format_type)
+        if key_id is None:
+            return None
+        return index.timestamp_at(key_id) if isinstance(index, BinaryCatalog) else index[key_id]
+
+    def has_package(self, identifier: Dict[str, str], format_type: str) -> bool:
+        """
+        Check whether a package group exists in the catalog.
+        
+        Args:
+            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            True if the package group is present
+        """
+        return self.key_id(identifier, format_type) is not None
+
+
+class NexusClient:
+    """
+    Client for interacting with Nexus repositories.
+    For testing purposes, this mocks the Nexus API responses.
+    """
+    def __init__(self, catalog: Optional[NexusCatalog] = None):
+        """
+        Initialize the Nexus client.
+        
+        Args:
+            catalog: Catalog to serve package data from (a new one is created if omitted)
+        """
+        self.catalog = catalog if catalog is not None else NexusCatalog()
+
+    def list_package_groups(self, format_type: str) -> List[PackageIdentity]:
+        """
+        List all package groups (versionless packages) from Nexus.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            List of package identities.
+        """
+        return list(self.iter_package_groups(format_type))
+
+    def iter_package_groups(self, format_type: str) -> Iterator[PackageIdentity]:
+        """
+        Stream package groups (versionless packages) from Nexus one at a time.
+        
+        Memory use stays constant however large the listing is.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Yields:
+            Package identities.
+        """
+        if format_type not in ["maven", "npm", "python"]:
+            logger.warning(f"Unsupported format type: {format_type}")
+            return
+
+        yield from self.catalog.iter_identities(format_type)
+
+    def count_package_groups(self, format_type: str) -> int:
+        """
+        Count the package groups Nexus lists for a format.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            Number of package groups
+        """
+        if format_type not in ["maven", "npm", "python"]:
+            return 0
+        return self.catalog.count(format_type)
+
+    def key_id(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """See NexusCatalog.key_id."""
+        return self.catalog.key_id(identifier, format_type)
+
+    def join_dates(self, dates: Dict[Tuple[str, ...], Optional[int]], format_type: str) -> Dict[int, Optional[int]]:
+        """See NexusCatalog.join_dates."""
+        return self.catalog.join_dates(dates, format_type)
+
+    def get_last_updated_date(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """
+        Get the lastUpdated date for a specific package group.
+        
+        Args:
+            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            lastUpdated date as epoch seconds
+        """
+        if format_type not in ["maven", "npm", "python"]:
+            logger.warning(f"Unsupported format type: {format_type}")
+            return None
+
+        if not self.catalog.has_package(identifier, format_type):
+            logger.warning(f"Package not found in Nexus fixtures")
+            return None
+        return self.catalog.get_last_updated_date(identifier, format_type)
+
+
+class RateLimiter:
+    """
+    Client-side token bucket that adapts to Cloudsmith's rate-limit headers.
+    
+    The bucket refills at `rate` requests per second and holds at most about
+    one second of requests. After each response, update_from_headers()
+    spreads the remaining request budget evenly over the rest of the
+    rate-limit window and caps the bucket at that budget, so throughput tracks
+    the server's limit without tripping it. Once the budget is spent, requests
+    wait for the window to reset; a new window starts back at max_rate until
+    its first response reports the new budget. A 429 halves the rate and
+    pauses until Retry-After; without rate-limit headers, every
+    RATE_RECOVERY_SUCCESSES successful responses raise it again by
+    RATE_RECOVERY_STEP of max_rate. Waiting callers re-check the bucket after
+    each sleep, so a rate change applies to them immediately. Safe to share
+    across threads and asyncio tasks.
+    """
+    def __init__(self, max_rate: float = DEFAULT_MAX_REQUESTS_PER_SECOND, min_rate: float = 0.1):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            max_rate: Upper bound on requests per second (also the starting rate)
+            min_rate: Lower bound on requests per second
+        """
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.capacity = max(1.0, max_rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        # Monotonic time the server's current rate-limit window resets, if known
+        self.window_reset: Optional[float] = None
+        # Set once the server reports its budget; the headers then drive the rate
+        self.header_limited = False
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def _set_rate(self, rate: float) -> None:
+        """Set the refill rate and scale the bucket with it. Caller holds the lock."""
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.capacity = max(1.0, self.rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last refill. Caller holds the lock."""
+        if self.window_reset is not None and now >= self.window_reset:
+            # The budget the rate was derived from has reset; the new window's
+            # budget is unknown until the next response, so go back to max_rate
+            self.tokens = min(self.capacity, self.tokens + max(0.0, self.window_reset - self.updated) * self.rate)
+            self.updated = max(self.updated, self.window_reset)
+            self.window_reset = None
+            self._set_rate(self.max_rate)
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+        
+        Returns:
+            0 if a token was taken, otherwise seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            wait = (1 - self.tokens) / self.rate
+            # The rate goes back up when the window resets, so don't sleep past it
+            if self.window_reset is not None:
+                wait = min(wait, self.window_reset - now)
+            return wait
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        wait = self._try_acquire()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._try_acquire()
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a request may be sent."""
+        wait = self._try_acquire()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._try_acquire()
+
+    def update_from_headers(self, headers: Any) -> None:
+        """
+        Adjust the rate from X-RateLimit-Remaining / X-RateLimit-Reset headers.
+        
+        Args:
+            headers: Case-insensitive response headers mapping
+        """
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        window = max(reset - time.time(), 1.0)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.header_limited = True
+            self.window_reset = now + window
+            if remaining <= 0:
+                self.paused_until = max(self.paused_until, self.window_reset)
+            self._set_rate(remaining / window)
+            # Never hold more tokens than the server has budget left
+            self.tokens = min(self.tokens, max(remaining, 0))
+
+    def record_success(self) -> None:
+        """
+        Count a successful response, stepping a throttled rate back up.
+        
+        Only applies while the server sends no rate-limit headers; otherwise
+        update_from_headers() sets the rate.
+        """
+        with self._lock:
+            if self.header_limited or self.rate >= self.max_rate:
+                self._successes = 0
+                return
+            self._successes += 1
+            if self._successes >= RATE_RECOVERY_SUCCESSES:
+                self._successes = 0
+                self._set_rate(self.rate + self.max_rate * RATE_RECOVERY_STEP)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Back off after a 429 response.
+        
+        Args:
+            retry_after: Seconds from the Retry-After header, if present
+        """
+        with self._lock:
+            self._successes = 0
+            self._set_rate(self.rate / 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+def is_retryable_status(status: int) -> bool:
+    """Return True for responses worth retrying (429 and 5xx)."""
+    return status == 429 or status >= 500
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds.
+    
+    Args:
+        headers: Case-insensitive response headers mapping
+    
+    Returns:
+        Seconds to wait, or None if the header is missing or not numeric
+    """
+    try:
+        return max(0.0, float(headers["Retry-After"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def parse_page_total(headers: Any) -> Optional[int]:
+    """
+    Parse the X-Pagination-PageTotal header of a listing response.
+    
+    Args:
+        headers: Case-insensitive response headers mapping
+    
+    Returns:
+        Number of pages in the listing, or None if the header is missing or not numeric
+    """
+    try:
+        return int(headers["X-Pagination-PageTotal"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Compute a jittered exponential backoff delay.
+    
+    Args:
+        attempt: Zero-based retry attempt
+        retry_after: Server-requested delay, used as a floor when present
+    
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    if retry_after is not None:
+        delay += retry_after
+    return delay
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of Cloudsmith package group lookups.
+    
+    Entries are keyed by org/repo/format/query and store the resolved
+    last_push as epoch seconds (None for groups that matched nothing) with the time it was
+    fetched. Entries older than `ttl` are ignored, and the store is pruned to
+    `max_entries` by evicting the oldest fetches first. Safe to share across
+    threads.
+    """
+    # Writes are committed (and the store pruned) in batches of this many puts
+    COMMIT_INTERVAL = 500
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_CACHE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        """
+        Open (or create) the cache.
+        
+        Args:
+            cache_dir: Directory holding the cache database
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries kept on disk
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "cloudsmith-groups.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS group_epochs ("
+            "key TEXT PRIMARY KEY, last_push INTEGER, fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS group_epochs_fetched_at ON group_epochs (fetched_at)")
+        self._conn.commit()
+        # Upper bound on the stored entries: put() counts replaced keys as new,
+        # so the table is only recounted once the bound passes max_entries
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM group_epochs").fetchone()
+
+    @staticmethod
+    def key(org: str, repo: str, format_type: str, query: str) -> str:
+        """Build the cache key for a query."""
+        return f"{org}/{repo}/{format_type}/{query}"
+
+    def get(self, key: str) -> Tuple[bool, Optional[int]]:
+        """
+        Look up a cached date.
+        
+        Args:
+            key: Cache key from key()
+        
+        Returns:
+            Tuple of (hit, last updated date); the date may be None on a hit
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_push FROM group_epochs WHERE key = ? AND fetched_at >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, row[0]
+
+    def put(self, key: str, last_push: Optional[int]) -> None:
+        """
+        Store a date (None records that the query matched nothing).
+        
+        Args:
+            key: Cache key from key()
+            last_push: Last updated date as epoch seconds, or None
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO group_epochs (key, last_push, fetched_at) VALUES (?, ?, ?)",
+                (key, last_push, time.time())
+            )
+            self._pending_writes += 1
+            self._entries += 1
+            if self._pending_writes >= self.COMMIT_INTERVAL:
+                self._flush()
+
+    def get_dates(self, org: str, repo: str, format_type: str, ignore_tag: str,
+                  identifiers: List[Dict[str, str]]) -> Tuple[Dict[Tuple[str, ...], Optional[int]], List[Dict[str, str]]]:
+        """
+        Resolve as many package identities as possible from the cache.
+        
+        Args:
+            org: Organization name
+            repo: Repository name
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag ignored by the lookups
+            identifiers: Package identifiers to resolve
+        
+        Returns:
+            Tuple of (dates by package key for cache hits, identifiers that missed)
+        """
+        dates, misses = {}, []
+        for identifier in identifiers:
+            hit, last_push = self.get(self.key(org, repo, format_type, package_group_query(identifier, format_type, ignore_tag)))
+            if hit:
+                dates[package_key(identifier, format_type)] = last_push
+            else:
+                misses.append(identifier)
+        return dates, misses
+
+    def put_dates(self, org: str, repo: str, format_type: str, ignore_tag: str,
+                  identifiers: List[Dict[str, str]], dates: Dict[Tuple[str, ...], Optional[int]]) -> None:
+        """
+        Store the dates resolved for a set of package identities.
+        
+        Args:
+            org: Organization name
+            repo: Repository name
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag ignored by the lookups
+            identifiers: Package identifiers that were resolved
+            dates: Dates by package key
+        """
+        for identifier in identifiers:
+            self.put(self.key(org, repo, format_type, package_group_query(identifier, format_type, ignore_tag)),
+                     dates.get(package_key(identifier, format_type)))
+
+    def _flush(self) -> None:
+        """Commit pending writes and evict expired and excess entries. Caller holds the lock."""
+        expired = self._conn.execute("DELETE FROM group_epochs WHERE fetched_at < ?", (time.time() - self.ttl,))
+        self._entries -= expired.rowcount
+        if self._entries > self.max_entries:
+            (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM group_epochs").fetchone()
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                # Walks only the oldest `excess` rows of the fetched_at index
+                self._conn.execute(
+                    "DELETE FROM group_epochs WHERE key IN ("
+                    "SELECT key FROM group_epochs ORDER BY fetched_at LIMIT ?)",
+                    (excess,)
+                )
+                self._entries = self.max_entries
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def close(self) -> None:
+        """Flush pending writes and close the database."""
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class RunMetrics:
+    """
+    Run metrics for the node-exporter textfile collector.
+    
+    Counts results by format and source and records every Cloudsmith HTTP
+    attempt (status and latency histogram), retries and 429s. write()
+    renders them with the response cache hit ratio and the run duration in
+    the Prometheus text format. Values describe the last run, so they are
+    exported as gauges. Safe to share across threads and asyncio tasks.
+    """
+    def __init__(self, formats: Iterable[str] = ()):
+        """
+        Initialize the metrics.
+        
+        Args:
+            formats: Formats the run checks; their package series are exported even when zero
+        """
+        self.started = time.monotonic()
+        self.packages: Dict[Tuple[str, str], int] = {
+            (format_type, source): 0 for format_type in formats for source in SOURCE_NAMES.values()
+        }
+        self.requests: Dict[str, int] = {}
+        self.retries = 0
+        self.throttled = 0
+        self.bucket_counts = [0] * len(REQUEST_DURATION_BUCKETS)
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self._lock = threading.Lock()
+
+    def observe_request(self, status: Any, seconds: float) -> None:
+        """
+        Record one Cloudsmith HTTP attempt.
+        
+        Args:
+            status: HTTP status code, or "error" if no response was received
+            seconds: Time until the response (or failure)
+        """
+        with self._lock:
+            self.requests[str(status)] = self.requests.get(str(status), 0) + 1
+            if status == 429:
+                self.throttled += 1
+            self.duration_sum += seconds
+            self.duration_count += 1
+            for index, bound in enumerate(REQUEST_DURATION_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[index] += 1
+                    break
+
+    def record_retry(self) -> None:
+        """Count a Cloudsmith request that is retried."""
+        with self._lock:
+            self.retries += 1
+
+    def record_result(self, result: "FreshnessResult") -> None:
+        """Count a result record by format and date source."""
+        key = (result.format, result.source)
+        with self._lock:
+            self.packages[key] = self.packages.get(key, 0) + 1
+
+    def render(self, cache: Optional[ResponseCache] = None, success: bool = True) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        
+        Args:
+            cache: Response cache whose hits and misses to export, if caching was enabled
+            success: Whether the run completed
+        
+        Returns:
+            Metrics text
+        """
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {METRICS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                lines.append(f"{METRICS_PREFIX}_{name}{suffix}{{{label_text}}} {value}" if label_text
+                             else f"{METRICS_PREFIX}_{name}{suffix} {value}")
+
+        with self._lock:
+            family("packages", "gauge", "Packages checked in the last run, by format and freshness date source",
+                   [("", (("format", format_type), ("source", source)), count)
+                    for (format_type, source), count in sorted(self.packages.items())])
+            family("cloudsmith_requests", "gauge", "Cloudsmith API requests in the last run, by HTTP status",
+                   [("", (("status", status),), count) for status, count in sorted(self.requests.items())])
+            buckets, cumulative = [], 0
+            for bound, count in zip(REQUEST_DURATION_BUCKETS, self.bucket_counts):
+                cumulative += count
+                buckets.append(("_bucket", (("le", f"{bound:g}"),), cumulative))
+            buckets.append(("_bucket", (("le", "+Inf"),), self.duration_count))
+            family("cloudsmith_request_duration_seconds", "histogram", "Cloudsmith API request latency in the last run",
+                   buckets + [("_sum", (), f"{self.duration_sum:.6f}"), ("_count", (), self.duration_count)])
+            family("cloudsmith_retries", "gauge", "Cloudsmith API requests retried in the last run",
+                   [("", (), self.retries)])
+            family("cloudsmith_throttled", "gauge", "Cloudsmith API 429 responses in the last run",
+                   [("", (), self.throttled)])
+
+        if cache is not None:
+            lookups = cache.hits + cache.misses
+            family("cache_hits", "gauge", "Cloudsmith response cache hits in the last run", [("", (), cache.hits)])
+            family("cache_misses", "gauge", "Cloudsmith response cache misses in the last run",
+                   [("", (), cache.misses)])
+            # Bulk and incremental runs never consult the cache; a ratio of 0 would read as all misses
+            if lookups:
+                family("cache_hit_ratio", "gauge", "Share of Cloudsmith lookups served from the response cache",
+                       [("", (), f"{cache.hits / lookups:.6f}")])
+        family("run_duration_seconds", "gauge", "Duration of the last run",
+               [("", (), f"{time.monotonic() - self.started:.3f}")])
+        family("last_run_timestamp_seconds", "gauge", "Time the last run finished",
+               [("", (), f"{time.time():.3f}")])
+        family("last_run_success", "gauge", "Whether the last run completed (1) or failed (0)",
+               [("", (), int(success))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, cache: Optional[ResponseCache] = None, success: bool = True) -> None:
+        """
+        Write the metrics to a textfile collector file.
+        
+        The file is written under a temporary name and renamed into place, so
+        node-exporter never reads a partial file.
+        
+        Args:
+            path: Output file, conventionally ending in .prom
+            cache: Response cache whose hits and misses to export, if caching was enabled
+            success: Whether the run completed
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.render(cache, success))
+        os.replace(temp_path, path)
+
+
+class CloudsmithClientBase:
+    """
+    Request building and response handling shared by the Cloudsmith clients.
+    
+    CloudsmithClient and AsyncCloudsmithClient only differ in how a request is
+    sent and how they wait between retries; paging, the response cache,
+    batching, metrics and retry decisions live here, so both behave the same.
+    """
+    def __init__(self, base_url: str, api_key: str, org: str, repo: str, rate_limiter: Optional[RateLimiter],
+                 max_retries: int, batch_size: int, max_query_length: int, cache: Optional[ResponseCache],
+                 metrics: Optional[RunMetrics], timeout: float, page_size: int):
+        """Store the settings shared by both clients (see CloudsmithClient.__init__)."""
+        self.base_url = base_url
+        self.api_key = api_key
+        self.org = org
+        self.repo = repo
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.max_query_length = max_query_length
+        self.cache = cache
+        self.metrics = metrics
+        self.timeout = timeout
+        self.page_size = page_size
+
+    @property
+    def groups_endpoint(self) -> str:
+        """Path of the package groups endpoint of the repository."""
+        return f"/packages/{self.org}/{self.repo}/groups/"
+
+    def _url(self, endpoint: str) -> str:
+        """Build the full URL of an API endpoint path."""
+        return f"{self.base_url}/v1{endpoint}"
+
+    @staticmethod
+    def _next_page(response: Dict, headers: Any, params: Dict[str, Any]) -> Tuple[List[Dict], bool]:
+        """
+        Return a listing page's groups and whether another page follows, advancing `params` to it.
+        
+        The server may clamp page_size, so a short page doesn't end the
+        listing: X-Pagination-PageTotal does, or without it the first empty page.
+        """
+        results = response.get("results", [])
+        page_total = parse_page_total(headers)
+        has_more = bool(results) and (page_total is None or params["page"] < page_total)
+        if has_more:
+            params["page"] += 1
+        return results, has_more
+
+    @staticmethod
+    def _index_group(dates: Dict[Tuple[str, ...], int], group: Dict, format_type: str, since: Optional[int]) -> bool:
+        """Add a listed group to `dates`; returns False once groups are older than `since`."""
+        last_push = parse_last_push(group.get("last_push"))
+        if since is not None and last_push is not None and last_push < since:
+            return False
+        # Groups are sorted by -last_push, so the first occurrence is the latest
+        dates.setdefault(group_key(group, format_type), last_push)
+        return True
+
+    def _cached_date(self, format_type: str, query: str) -> Tuple[bool, Optional[int]]:
+        """Look a single-group query up in the response cache, returning (hit, last push)."""
+        if self.cache is None:
+            return False, None
+        return self.cache.get(self.cache.key(self.org, self.repo, format_type, query))
+
+    def _date_from_response(self, response: Dict, format_type: str, query: str) -> Optional[int]:
+        """Extract the last push date from a single-group query response and cache it."""
+        last_push = last_push_from_response(response, query)
+        if self.cache is not None:
+            self.cache.put(self.cache.key(self.org, self.repo, format_type, query), last_push)
+        return last_push
+
+    def _cached_batch_dates(self, identifiers: List[Dict[str, str]], format_type: str,
+                            ignore_tag: str) -> Tuple[Dict[Tuple[str, ...], Optional[int]], List[Dict[str, str]]]:
+        """Split identifiers into cached dates and the identifiers still to query."""
+        if self.cache is None:
+            return {}, identifiers
+        return self.cache.get_dates(self.org, self.repo, format_type, ignore_tag, identifiers)
+
+    def _batch_queries(self, identifiers: List[Dict[str, str]], format_type: str,
+                       ignore_tag: str) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, str]]]]:
+        """
+        Yield (first-page parameters, batch) for the OR-combined queries covering `identifiers`.
+        
+        Each identity matches at most one group, so a batch has at most
+        len(batch) matches; callers page until they have that many or the
+        listing ends, in case the server serves smaller pages than requested.
+        """
+        for query, batch in batched_group_queries(identifiers, format_type, ignore_tag,
+                                                  self.batch_size, self.max_query_length):
+            yield {"query": query, "page": 1, "page_size": len(batch)}, batch
+
+    def _dates_from_batch_response(self, groups: List[Dict], batch: List[Dict[str, str]], format_type: str,
+                                   ignore_tag: str) -> Dict[Tuple[str, ...], Optional[int]]:
+        """Join the groups matched by a batched query back to its batch and cache the dates."""
+        batch_dates = dates_from_batch_response({"results": groups}, batch, format_type)
+        if self.cache is not None:
+            self.cache.put_dates(self.org, self.repo, format_type, ignore_tag, batch, batch_dates)
+        return batch_dates
+
+    def _check_response(self, attempt: int, status: int, headers: Any, seconds: float) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Record a response and decide whether to retry the request.
+        
+        Args:
+            attempt: Zero-based attempt number
+            status: HTTP status code
+            headers: Response headers
+            seconds: Time the request took
+        
+        Returns:
+            (failure description, Retry-After seconds) if the request should be
+            retried, or None if the response is final
+        """
+        if self.metrics is not None:
+            self.metrics.observe_request(status, seconds)
+        self.rate_limiter.update_from_headers(headers)
+        if not is_retryable_status(status) or attempt == self.max_retries:
+            return None
+        retry_after = parse_retry_after(headers)
+        if status == 429:
+            self.rate_limiter.throttle(retry_after)
+        return f"returned {status}", retry_after
+
+    def _check_error(self, error: Exception, seconds: float) -> Tuple[str, Optional[float]]:
+        """Record a connection error or timeout, returning (failure description, Retry-After seconds)."""
+        if self.metrics is not None:
+            self.metrics.observe_request("error", seconds)
+        return f"request failed ({type(error).__name__})", None
+
+    def _retry_delay(self, attempt: int, failure: str, retry_after: Optional[float]) -> float:
+        """Record a retry and return the backoff to wait before it."""
+        if self.metrics is not None:
+            self.metrics.record_retry()
+        delay = backoff_delay(attempt, retry_after)
+        logger.warning(f"Cloudsmith API {failure}, retrying in {delay:.1f}s "
+                       f"(attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+
+class CloudsmithClient(CloudsmithClientBase):
+    """
+    Client for interacting with Cloudsmith API.
+    """
+    
+    def __init__(self, base_url: str = CLOUDSMITH_BASE_URL, api_key: str = CLOUDSMITH_API_KEY, org: str = CLOUDSMITH_ORG, repo: str = CLOUDSMITH_REPO, mock_api: Optional[Any] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_query_length: int = DEFAULT_MAX_QUERY_LENGTH,
+                 cache: Optional[ResponseCache] = None, metrics: Optional[RunMetrics] = None,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT, page_size: int = MAX_PAGE_SIZE):
+        """
+        Initialize the Cloudsmith client.
+        
+        Args:
+            base_url: Base URL for Cloudsmith API
+            api_key: Cloudsmith API key
+            org: Organization name
+            repo: Repository name
+            mock_api: Answer requests in-process from this object instead of the real API; it
+                needs a request(endpoint, params) method returning (status, headers, body),
+                e.g. mock_cloudsmith_server.MockCloudsmithAPI.from_file()
+            pool_size: Number of per-host connection pools to keep
+            max_connections_per_host: Maximum concurrent keep-alive connections to a single host
+            rate_limiter: Shared rate limiter (a new one is created if omitted)
+            max_retries: Retries for 429 and 5xx responses, connection errors and timeouts before giving up
+            batch_size: Maximum package identities per batched query
+            max_query_length: Maximum batched query length in characters
+            cache: On-disk cache consulted before querying package groups (None to disable)
+            metrics: Run metrics to record requests, retries and 429s in
+            timeout: Seconds to wait for a connection or response before retrying
+            page_size: Groups per page when listing a whole format (at most MAX_PAGE_SIZE)
+        """
+        super().__init__(base_url, api_key, org, repo, rate_limiter, max_retries, batch_size, max_query_length,
+                         cache, metrics, timeout, page_size)
+        self.mock_api = mock_api
+        self.session = self._create_session(pool_size, max_connections_per_host)
+
+    def _create_session(self, pool_size: int, max_connections_per_host: int) -> requests.Session:
+        """
+        Create a pooled HTTP session that lives as long as the client.
+        
+        Connections are kept alive and reused across requests, so only the
+        first request to a host pays for the TCP and TLS handshake.
+        
+        Args:
+            pool_size: Number of per-host connection pools to keep
+            max_connections_per_host: Maximum concurrent keep-alive connections to a single host
+        
+        Returns:
+            Configured requests session
+        """
+        session = requests.Session()
+        # pool_block makes callers wait for a free connection instead of
+        # opening (and then discarding) connections beyond the per-host cap
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_connections_per_host, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Connection": "keep-alive"
+        })
+        return session
+
+    def close(self) -> None:
+        """Release pooled connections held by the client."""
+        self.session.close()
+
+    def __enter__(self) -> "CloudsmithClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def list_package_groups(self, format_type: str, ignore_tag: str | None = None) -> List[Dict]:
+        """
+        Get all package groups from Cloudsmith.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Returns:
+            List of package groups
+        """
+        return list(self.iter_package_groups(format_type, ignore_tag=ignore_tag))
+
+    def iter_package_groups(self, format_type: str, ignore_tag: str | None = None) -> Iterator[Dict]:
+        """
+        Page through package groups from Cloudsmith, most recently pushed first.
+        
+        Pages are fetched lazily, so callers can stop early without requesting
+        the rest of the listing.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag to ignore when listing package groups
+        
+        Yields:
+            Package groups sorted by -last_push
+        """
+        yield from self._iter_pages(list_groups_params(format_type, ignore_tag, self.page_size))
+
+    def _iter_pages(self, params: Dict[str, Any]) -> Iterator[Dict]:
+        """Yield the groups of every page of a listing, starting at the page in `params`."""
+        params = dict(params)
+        has_more = True
+        while has_more:
+            results, has_more = self._next_page(*self._make_request(self.groups_endpoint, params), params)
+            yield from results
+
+    def get_last_updated_date(self, identifier: Dict[str, str], format_type: str, ignore_tag: str) -> Optional[int]:
+        """
+        Get the last updated date for a package group.
+        
+        Args:
+            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag to ignore when fetching the last updated date
+
+        Returns:
+            Last updated date as epoch seconds
+        """
+        query = package_group_query(identifier, format_type, ignore_tag)
+        hit, last_push = self._cached_date(format_type, query)
+        if hit:
+            return last_push
+        response, _ = self._make_request(self.groups_endpoint, {"query": query})
+        return self._date_from_response(response, format_type, query)
+
+    def get_last_updated_dates(self, format_type: str, ignore_tag: str, since: Optional[int] = None) -> Dict[Tuple[str, ...], int]:
+        """
+        Get the last updated date of every package group of a format in one listing.
+        
+        Pages through iter_package_groups() once and indexes the groups by
+        group_key(), so callers can join against it locally instead of issuing
+        one query per package.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag to ignore when fetching the last updated date
+            since: Only return groups pushed at or after this time (epoch seconds);
+                paging stops at the first older group
+        
+        Returns:
+            Mapping of package key to last updated date as epoch seconds
+        """
+        dates = {}
+        for group in self.iter_package_groups(format_type, ignore_tag=ignore_tag):
+            if not self._index_group(dates, group, format_type, since):
+                break
+        logger.info(f"Indexed {len(dates)} {format_type} package groups from Cloudsmith")
+        return dates
+
+    def get_last_updated_dates_batched(self, identifiers: List[Dict[str, str]], format_type: str, ignore_tag: str) -> Dict[Tuple[str, ...], Optional[int]]:
+        """
+        Get the last updated dates of several package groups with OR-combined queries.
+        
+        Identities are packed into queries of up to batch_size clauses (and at
+        most max_query_length characters), so each request resolves many packages.
+        
+        Args:
+            identifiers: Package identifiers (groupId:artifactId for Maven, name for npm/python)
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag to ignore when fetching the last updated date
+        
+        Returns:
+            Mapping of package key to last updated date as epoch seconds (None if not found)
+        """
+        dates, misses = self._cached_batch_dates(identifiers, format_type, ignore_tag)
+        for params, batch in self._batch_queries(misses, format_type, ignore_tag):
+            groups = list(islice(self._iter_pages(params), len(batch)))
+            dates.update(self._dates_from_batch_response(groups, batch, format_type, ignore_tag))
+        return dates
+
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[Dict, Any]:
+        """
+        Make a request to the Cloudsmith API.
+        
+        Requests are paced by the rate limiter; 429 and 5xx responses,
+        connection errors and timeouts are retried with jittered exponential
+        backoff up to max_retries times.
+        
+        Args:
+            endpoint: API endpoint path
+            params: Query parameters
+            
+        Returns:
+            Tuple of (API response as a dictionary, response headers)
+        """
+        if self.mock_api is not None:
+            logger.debug("Using mock data for Cloudsmith API request to %s", endpoint)
+            started = time.perf_counter()
+            status, headers, body = self.mock_api.request(endpoint, params)
+            if self.metrics is not None:
+                self.metrics.observe_request(status, time.perf_counter() - started)
+            if status >= 400:
+                raise requests.HTTPError(f"{status} mock Cloudsmith API error: {body.get('detail')}")
+            return body, headers
+        
+        url = self._url(endpoint)
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry = self._check_error(e, time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                retry = self._check_response(attempt, response.status_code, response.headers,
+                                             time.perf_counter() - started)
+                if retry is None:
+                    break
+            time.sleep(self._retry_delay(attempt, *retry))
+
+        response.raise_for_status()
+        self.rate_limiter.record_success()
+        return response.json(), response.headers
+
+
+class IncrementalState:
+    """
+    Cloudsmith dates and high-water mark carried between incremental runs.
+    
+    For each org/repo/format/ignore-tag the state keeps the last_push date of
+    every package group seen so far plus the newest last_push (the high-water
+    mark). An incremental run only pages the -last_push sorted listing down to
+    the mark and merges the changed groups into the stored dates; everything
+    older is reused. Groups that are deleted or newly tagged with the ignored
+    tag are not detected, so schedule an occasional --full-refresh.
+    """
+    # Bumped whenever the stored layout changes; older files trigger a full listing
+    VERSION = 2
+
+    def __init__(self, path: str):
+        """
+        Load the state file if it exists.
+        
+        Args:
+            path: Path of the JSON state file
+        """
+        self.path = path
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+            if state.get("version") == self.VERSION:
+                self.sections = state["sections"]
+                logger.info(f"Loaded incremental state from {path}")
+            else:
+                logger.warning(f"Incremental state at {path} uses an older format, starting with a full listing")
+        except FileNotFoundError:
+            logger.info(f"No incremental state at {path}, starting with a full listing")
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse incremental state file, starting with a full listing: {path}")
+
+    @staticmethod
+    def section_key(cloudsmith_client: Any, format_type: str, ignore_tag: str) -> str:
+        """Build the state key for a repository, format and ignored tag."""
+        return f"{cloudsmith_client.org}/{cloudsmith_client.repo}/{format_type}/{ignore_tag}"
+
+    def since(self, cloudsmith_client: Any, format_type: str, ignore_tag: str) -> Optional[int]:
+        """
+        Return the high-water mark from the previous run.
+        
+        Args:
+            cloudsmith_client: Client the listing is fetched with
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag ignored by the listing
+        
+        Returns:
+            Newest last_push seen as epoch seconds, or None for a full listing
+        """
+        section = self.sections.get(self.section_key(cloudsmith_client, format_type, ignore_tag))
+        return section["high_water_mark"] if section else None
+
+    def merge(self, cloudsmith_client: Any, format_type: str, ignore_tag: str,
+              changed: Dict[Tuple[str, ...], int]) -> Dict[Tuple[str, ...], int]:
+        """
+        Merge changed groups into the stored dates, advance the mark and save.
+        
+        Args:
+            cloudsmith_client: Client the listing was fetched with
+            format_type: Package format (maven, npm, or python)
+            ignore_tag: Tag ignored by the listing
+            changed: Dates of groups pushed since the high-water mark
+        
+        Returns:
+            Dates of every known package group
+        """
+        key = self.section_key(cloudsmith_client, format_type, ignore_tag)
+        section = self.sections.get(key, {"high_water_mark": None, "dates": []})
+        dates = {tuple(group): last_push for group, last_push in section["dates"]}
+        logger.info(f"Merging {len(changed)} {format_type} package groups pushed since "
+                    f"{format_date_for_display(section['high_water_mark'])} into {len(dates)} previously known")
+        dates.update(changed)
+
+        marks = [last_push for last_push in changed.values() if last_push is not None]
+        if section["high_water_mark"] is not None:
+            marks.append(section["high_water_mark"])
+        self.sections[key] = {
+            "high_water_mark": max(marks) if marks else None,
+            "dates": [[list(group), last_push] for group, last_push in dates.items()]
+        }
+        self.save()
+        return dates
+
+    def discard(self) -> None:
+        """Forget all stored state, forcing a full listing."""
+        self.sections = {}
+
+    def save(self) -> None:
+        """Atomically write the state file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": self.VERSION, "sections": self.sections}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def prefetch_since(cloudsmith_client: "CloudsmithClientBase", format_type: str, ignore_tag: str, mode: str,
+                   incremental_state: Optional[IncrementalState]) -> Optional[int]:
+    """Log and return the lower bound of a prefetch listing (None to list every group)."""
+    if mode == 'incremental':
+        since = incremental_state.since(cloudsmith_client, format_type, ignore_tag)
+        logger.info(f"Fetching {format_type} package groups pushed since {format_date_for_display(since)} from Cloudsmith")
+        return since
+    logger.info(f"Fetching all {format_type} package groups from Cloudsmith")
+    return None
+
+
+def merge_prefetched(cloudsmith_client: "CloudsmithClientBase", format_type: str, ignore_tag: str, mode: str,
+                     incremental_state: Optional[IncrementalState],
+                     dates: Dict[Tuple[str, ...], int]) -> Dict[Tuple[str, ...], int]:
+    """Complete a prefetch listing, merging it into the stored dates in incremental mode."""
+    if mode == 'incremental':
+        return incremental_state.merge(cloudsmith_client, format_type, ignore_tag, dates)
+    return dates
+
+
+def prefetch_cloudsmith_dates(cloudsmith_client: "CloudsmithClient", format_type: str, ignore_tag: str, mode: str,
+                              incremental_state: Optional[IncrementalState] = None,
+                              timings: Optional["StageTimings"] = None) -> Optional[Dict[Tuple[str, ...], int]]:
+    """
+    Fetch Cloudsmith dates for a whole format up front (bulk and incremental modes).
+    
+    Args:
+        cloudsmith_client: Cloudsmith client
+        format_type: Package format (maven, npm, or python)
+        ignore_tag: Tag to ignore when fetching Cloudsmith dates
+        mode: Cloudsmith lookup mode
+        incremental_state: State carried between runs (incremental mode)
+        timings: Stage timings to record the fetch in (as one Cloudsmith query)
+    
+    Returns:
+        Dates by package key, or None if the mode looks packages up individually
+    """
+    if mode not in PREFETCH_MODES:
+        return None
+    with stage_timer(timings, 'cloudsmith_query'):
+        since = prefetch_since(cloudsmith_client, format_type, ignore_tag, mode, incremental_state)
+        dates = cloudsmith_client.get_last_updated_dates(format_type, ignore_tag=ignore_tag, since=since)
+        return merge_prefetched(cloudsmith_client, format_type, ignore_tag, mode, incremental_state, dates)
+
+
+async def prefetch_cloudsmith_dates_async(cloudsmith_client: "AsyncCloudsmithClient", format_type: str, ignore_tag: str, mode: str,
+                                          incremental_state: Optional[IncrementalState] = None,
+                                          timings: Optional["StageTimings"] = None) -> Optional[Dict[Tuple[str, ...], int]]:
+    """Async counterpart of prefetch_cloudsmith_dates()."""
+    if mode not in PREFETCH_MODES:
+        return None
+    with stage_timer(timings, 'cloudsmith_query'):
+        since = prefetch_since(cloudsmith_client, format_type, ignore_tag, mode, incremental_state)
+        dates = await cloudsmith_client.get_last_updated_dates(format_type, ignore_tag=ignore_tag, since=since)
+        return merge_prefetched(cloudsmith_client, format_type, ignore_tag, mode, incremental_state, dates)
+
+
+class Checkpoint:
+    """
+    Append-only log of completed result records for resuming long runs.
+    
+    The first line records the run parameters and the fingerprint of each
+    format's Nexus catalog; every following line is one result record,
+    appended in Nexus listing order, so the number of records per format is
+    also the position to resume from. A checkpoint is only resumed while the
+    catalogs are unchanged, since positions in another listing would skip the
+    wrong packages. Records are fsynced every
+    `interval` results. A run killed mid-write leaves at most one torn trailing
+    line, which is discarded (and truncated) on load, so the checkpoint never
+    becomes unreadable.
+    """
+    def __init__(self, path: str, run_params: Dict[str, Any], resume: bool = False,
+                 interval: int = DEFAULT_CHECKPOINT_INTERVAL, catalog: Optional[Dict[str, Optional[str]]] = None):
+        """
+        Open the checkpoint, loading completed records when resuming.
+        
+        Args:
+            path: Path of the JSONL checkpoint file
+            run_params: Parameters that must match for a checkpoint to be resumed
+            resume: Load completed records instead of starting a new checkpoint
+            interval: Number of records between fsyncs
+            catalog: Fingerprint of each format's Nexus catalog (see NexusCatalog.fingerprint()),
+                which must also match for the checkpoint to be resumed
+        """
+        self.path = path
+        self.interval = interval
+        self.completed_count = 0
+        self._completed_length = 0
+        self._positions: Dict[str, int] = {}
+        self._unsynced = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load(run_params, catalog)
+            self._file = open(path, 'a')
+            logger.info(f"Resuming from checkpoint {path} with {self.completed_count} completed packages")
+        else:
+            if resume:
+                logger.info(f"No checkpoint at {path}, starting from the beginning")
+            # Write the header to a temporary file and rename it into place, so an
+            # existing checkpoint is only replaced by a valid one
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(json.dumps({"run": run_params, "catalog": catalog}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self._file = open(path, 'a')
+
+    def _load(self, run_params: Dict[str, Any], catalog: Optional[Dict[str, Optional[str]]]) -> None:
+        """Count completed records per format, truncating a torn trailing line."""
+        valid_length = 0
+        for line_number, (record, line_length) in enumerate(self._iter_lines()):
+            if line_number == 0:
+                if record.get("run") != run_params:
+                    raise ValueError(f"Checkpoint {self.path} was written by a run with different parameters: "
+                                     f"{record.get('run')}")
+                if record.get("catalog") != catalog:
+                    raise ValueError(f"Checkpoint {self.path} was written against a different Nexus catalog; "
+                                     f"re-run without --resume")
+            else:
+                self._positions[record['format']] = self._positions.get(record['format'], 0) + 1
+                self.completed_count += 1
+            valid_length += line_length
+        self._completed_length = valid_length
+
+        if valid_length < os.path.getsize(self.path):
+            logger.warning(f"Discarding incomplete trailing record in checkpoint {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_length)
+
+    def _iter_lines(self) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Yield (record, line length) for each intact line, stopping at the first torn one."""
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    return
+                yield record, len(line)
+
+    def completed_records(self) -> Iterator["FreshnessResult"]:
+        """
+        Stream the result records completed before this run resumed.
+        
+        Yields:
+            Result records in the order they were checkpointed
+        """
+        remaining = self._completed_length
+        for line_number, (record, line_length) in enumerate(self._iter_lines()):
+            if remaining <= 0:
+                return
+            remaining -= line_length
+            if line_number > 0:
+                yield FreshnessResult.from_dict(record)
+
+    def positions(self) -> Dict[str, int]:
+        """
+        Return how many packages of each format are already completed.
+        
+        Returns:
+            Mapping of format to number of completed packages
+        """
+        return dict(self._positions)
+
+    def record(self, result: "FreshnessResult") -> None:
+        """
+        Append a completed result record.
+        
+        Args:
+            result: Result record
+        """
+        self._file.write(json.dumps(result.to_dict()) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush appended records to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync and close the checkpoint file."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def finish(self) -> None:
+        """Close and remove the checkpoint after a successful run."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            # Already removed, e.g. by another run sharing an explicit --checkpoint-file
+            pass
+
+    @staticmethod
+    def default_path(directory: str, run_params: Dict[str, Any]) -> str:
+        """
+        Build the default checkpoint path for a set of run parameters.
+        
+        Runs with different parameters (e.g. overlapping cron jobs for different
+        formats) get different files, so they never overwrite each other's checkpoint.
+        
+        Args:
+            directory: Directory to place the checkpoint in
+            run_params: Parameters that must match for a checkpoint to be resumed
+            
+        Returns:
+            Path of the checkpoint file
+        """
+        digest = hashlib.sha1(json.dumps(run_params, sort_keys=True).encode('utf-8')).hexdigest()
+        return os.path.join(directory, f"checkpoint-{digest[:12]}.jsonl")
+
+
+class AsyncNexusClient:
+    """
+    Asyncio facade over NexusClient.
+    
+    Nexus data is served from the in-memory NexusCatalog, so lookups complete
+    immediately; the coroutine interface lets the async pipeline treat both
+    sources uniformly.
+    """
+    def __init__(self, client: Optional[NexusClient] = None):
+        """
+        Initialize the async Nexus client.
+        
+        Args:
+            client: Synchronous client to delegate to (a new one is created if omitted)
+        """
+        self.client = client if client is not None else NexusClient()
+
+    async def list_package_groups(self, format_type: str) -> List[PackageIdentity]:
+        """See NexusClient.list_package_groups."""
+        return self.client.list_package_groups(format_type)
+
+    def iter_package_groups(self, format_type: str) -> Iterator[PackageIdentity]:
+        """See NexusClient.iter_package_groups (reads the local catalog file)."""
+        return self.client.iter_package_groups(format_type)
+
+    async def count_package_groups(self, format_type: str) -> int:
+        """See NexusClient.count_package_groups."""
+        return self.client.count_package_groups(format_type)
+
+    def key_id(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """See NexusCatalog.key_id (an in-memory lookup)."""
+        return self.client.key_id(identifier, format_type)
+
+    def join_dates(self, dates: Dict[Tuple[str, ...], Optional[int]], format_type: str) -> Dict[int, Optional[int]]:
+        """See NexusCatalog.join_dates (an in-memory join)."""
+        return self.client.join_dates(dates, format_type)
+
+    async def get_last_updated_date(self, identifier: Dict[str, str], format_type: str) -> Optional[int]:
+        """See NexusClient.get_last_updated_date."""
+        return self.client.get_last_updated_date(identifier, format_type)
+
+
+class AsyncCloudsmithClient(CloudsmithClientBase):
+    """
+    Asyncio client for interacting with Cloudsmith API.
+    
+    Mirrors CloudsmithClient on top of an aiohttp session, so many package
+    group queries can be in flight at once. Must be used as an async context
+    manager (or closed with close()).
+    """
+
+    def __init__(self, base_url: str = CLOUDSMITH_BASE_URL, api_key: str = CLOUDSMITH_API_KEY, org: str = CLOUDSMITH_ORG, repo: str = CLOUDSMITH_REPO,
+                 pool_size: int = DEFAULT_POOL_SIZE, max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_query_length: int = DEFAULT_MAX_QUERY_LENGTH,
+                 cache: Optional[ResponseCache] = None, metrics: Optional[RunMetrics] = None,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT, page_size: int = MAX_PAGE_SIZE):
+        """
+        Initialize the async Cloudsmith client.
+        
+        Args:
+            base_url: Base URL for Cloudsmith API
+            api_key: Cloudsmith API key
+            org: Organization name
+            repo: Repository name
+            pool_size: Maximum number of open connections across all hosts
+            max_connections_per_host: Maximum concurrent keep-alive connections to a single host
+            rate_limiter: Shared rate limiter (a new one is created if omitted)
+            max_retries: Retries for 429 and 5xx responses, connection errors and timeouts before giving up
+            batch_size: Maximum package identities per batched query
+            max_query_length: Maximum batched query length in characters
+            cache: On-disk cache consulted before querying package groups (None to disable)
+            metrics: Run metrics to record requests, retries and 429s in
+            timeout: Seconds to wait for a connection or response before retrying
+            page_size: Groups per page when listing a whole format (at most MAX_PAGE_SIZE)
+        """
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for the asyncio engine: pip install aiohttp")
+        super().__init__(base_url, api_key, org, repo, rate_limiter, max_retries, batch_size, max_query_length,
+                         cache, metrics, timeout, page_size)
+        self.pool_size = pool_size
+        self.max_connections_per_host = max_connections_per_host
+        self.session = None
+
+    async def __aenter__(self) -> "AsyncCloudsmithClient":
+        connector = aiohttp.TCPConnector(limit=max(self.pool_size, self.max_connections_per_host),
+                                         limit_per_host=self.max_connections_per_host)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout), headers={
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        })
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Release pooled connections held by the client."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def list_package_groups(self, format_type: str, ignore_tag: str | None = None) -> List[Dict]:
+        """See CloudsmithClient.list_package_groups."""
+        return [group async for group in self.iter_package_groups(format_type, ignore_tag=ignore_tag)]
+
+    async def iter_package_groups(self, format_type: str, ignore_tag: str | None = None) -> AsyncIterator[Dict]:
+        """See CloudsmithClient.iter_package_groups."""
+        async for group in self._iter_pages(list_groups_params(format_type, ignore_tag, self.page_size)):
+            yield group
+
+    async def _iter_pages(self, params: Dict[str, Any]) -> AsyncIterator[Dict]:
+        """See CloudsmithClient._iter_pages."""
+        params = dict(params)
+        has_more = True
+        while has_more:
+            results, has_more = self._next_page(*await self._make_request(self.groups_endpoint, params), params)
+            for group in results:
+                yield group
+
+    async def get_last_updated_date(self, identifier: Dict[str, str], format_type: str, ignore_tag: str) -> Optional[int]:
+        """See CloudsmithClient.get_last_updated_date."""
+        query = package_group_query(identifier, format_type, ignore_tag)
+        hit, last_push = self._cached_date(format_type, query)
+        if hit:
+            return last_push
+        response, _ = await self._make_request(self.groups_endpoint, {"query": query})
+        return self._date_from_response(response, format_type, query)
+
+    async def get_last_updated_dates(self, format_type: str, ignore_tag: str, since: Optional[int] = None) -> Dict[Tuple[str, ...], int]:
+        """See CloudsmithClient.get_last_updated_dates."""
+        dates = {}
+        async for group in self.iter_package_groups(format_type, ignore_tag=ignore_tag):
+            if not self._index_group(dates, group, format_type, since):
+                break
+        logger.info(f"Indexed {len(dates)} {format_type} package groups from Cloudsmith")
+        return dates
+
+    async def get_last_updated_dates_batched(self, identifiers: List[Dict[str, str]], format_type: str, ignore_tag: str) -> Dict[Tuple[str, ...], Optional[int]]:
+        """See CloudsmithClient.get_last_updated_dates_batched."""
+        dates, misses = self._cached_batch_dates(identifiers, format_type, ignore_tag)
+        for params, batch in self._batch_queries(misses, format_type, ignore_tag):
+            groups = []
+            async for group in self._iter_pages(params):
+                groups.append(group)
+                if len(groups) == len(batch):
+                    break
+            dates.update(self._dates_from_batch_response(groups, batch, format_type, ignore_tag))
+        return dates
+
+    async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[Dict, Any]:
+        """
+        Make a request to the Cloudsmith API.
+        
+        Requests are paced by the rate limiter; 429 and 5xx responses,
+        connection errors and timeouts are retried with jittered exponential
+        backoff up to max_retries times.
+        
+        Args:
+            endpoint: API endpoint path
+            params: Query parameters
+            
+        Returns:
+            Tuple of (API response as a dictionary, response headers)
+        """
+        url = self._url(endpoint)
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire_async()
+            started = time.perf_counter()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    retry = self._check_response(attempt, response.status, response.headers,
+                                                 time.perf_counter() - started)
+                    if retry is None:
+                        response.raise_for_status()
+                        body = await response.json()
+                        self.rate_limiter.record_success()
+                        return body, response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                retry = self._check_error(e, time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self._retry_delay(attempt, *retry))
+
+
+@functools.lru_cache(maxsize=DISPLAY_CACHE_SIZE)
+def format_date_for_display(epoch: Optional[int]) -> str:
+    """
+    Format a timestamp for display.
+    
+    Results are memoized in a bounded LRU cache, so dates shared by many
+    packages are only formatted once.
+    
+    Args:
+        epoch: Date as epoch seconds
+        
+    Returns:
+        Formatted date string as YYYY-MM-DD HH:MM:SS (UTC)
+    """
+    if epoch is None:
+        return "N/A"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+class DisplayDate:
+    """
+    Log argument that formats a timestamp only when the message is emitted.
+    
+    Pass it as a %-style logging argument; if the log level drops the message,
+    format_date_for_display() is never called.
+    """
+    __slots__ = ('epoch',)
+
+    def __init__(self, epoch: Optional[int]):
+        self.epoch = epoch
+
+    def __str__(self) -> str:
+        return format_date_for_display(self.epoch)
+
+
+def compare_dates(nexus_date: Optional[int], cloudsmith_date: Optional[int]) -> Tuple[Optional[int], str]:
+    """
+    Compare two dates and return the older one along with the source.
+    
+    Args:
+        nexus_date: Date from Nexus as epoch seconds
+        cloudsmith_date: Date from Cloudsmith as epoch seconds
+        
+    Returns:
+        Tuple of (older_date, source)
+    """
+    if nexus_date is None and cloudsmith_date is None:
+        return None, "unknown"
+    
+    if nexus_date is None:
+        return cloudsmith_date, "cloudsmith"
+    
+    if cloudsmith_date is None:
+        return nexus_date, "nexus"
+    
+    # Compare dates and return the older one (larger value)
+    if nexus_date > cloudsmith_date:
+        return nexus_date, "nexus"
+    else:
+        return cloudsmith_date, "cloudsmith"
+
+
+def to_timestamp_array(dates: List[Optional[int]]) -> "numpy.ndarray":
+    """
+    Pack epoch dates into an int64 array, using MISSING_TIMESTAMP for None.
+    
+    Args:
+        dates: Dates as epoch seconds (None for missing)
+    
+    Returns:
+        int64 array aligned with `dates`
+    """
+    if numpy is None:
+        raise RuntimeError("numpy is required for the vectorized batch API: pip install numpy")
+    return numpy.fromiter((MISSING_TIMESTAMP if date is None else date for date in dates),
+                          dtype=numpy.int64, count=len(dates))
+
+
+def compare_dates_vectorized(nexus_dates: "numpy.ndarray",
+                             cloudsmith_dates: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+    """
+    Vectorized compare_dates() over aligned arrays of a whole format.
+    
+    Args:
+        nexus_dates: int64 epoch dates from Nexus, MISSING_TIMESTAMP where missing
+        cloudsmith_dates: int64 epoch dates from Cloudsmith, aligned with nexus_dates
+    
+    Returns:
+        Tuple of (freshness dates as int64, source codes as int8 SOURCE_* values)
+    """
+    if numpy is None:
+        raise RuntimeError("numpy is required for the vectorized batch API: pip install numpy")
+    nexus_dates = numpy.asarray(nexus_dates, dtype=numpy.int64)
+    cloudsmith_dates = numpy.asarray(cloudsmith_dates, dtype=numpy.int64)
+
+    has_nexus = nexus_dates != MISSING_TIMESTAMP
+    has_cloudsmith = cloudsmith_dates != MISSING_TIMESTAMP
+    # Ties go to Cloudsmith, matching compare_dates()
+    use_nexus = has_nexus & (nexus_dates > cloudsmith_dates)
+
+    sources = numpy.full(nexus_dates.shape, SOURCE_UNKNOWN, dtype=numpy.int8)
+    sources[has_cloudsmith] = SOURCE_CLOUDSMITH
+    sources[use_nexus] = SOURCE_NEXUS
+    # MISSING_TIMESTAMP is the smallest int64, so the later date always wins the maximum
+    return numpy.maximum(nexus_dates, cloudsmith_dates), sources
+
+
+def summarize_sources(sources: "numpy.ndarray") -> Dict[str, int]:
+    """
+    Count packages per date source with a vectorized reduction.
+    
+    Args:
+        sources: Source codes from compare_dates_vectorized()
+    
+    Returns:
+        Mapping of source name to package count
+    """
+    if numpy is None:
+        raise RuntimeError("numpy is required for the vectorized batch API: pip install numpy")
+    counts = numpy.bincount(numpy.asarray(sources, dtype=numpy.int64), minlength=len(SOURCE_NAMES))
+    return {name: int(counts[code]) for code, name in SOURCE_NAMES.items()}
+
+
+RESULT_FIELDS = ['format', 'name', 'nexus_date', 'cloudsmith_date', 'freshness_date', 'source']
+DATE_FIELDS = ['nexus_date', 'cloudsmith_date', 'freshness_date']
+
+
+class FreshnessResult:
+    """
+    Freshness result record for one package group.
+    
+    Fields are RESULT_FIELDS, held in __slots__ rather than a per-package dict;
+    dates are epoch seconds and the format and source strings are interned.
+    """
+    __slots__ = tuple(RESULT_FIELDS)
+
+    def __init__(self, format: str, name: str, nexus_date: Optional[int], cloudsmith_date: Optional[int],
+                 freshness_date: Optional[int], source: str):
+        self.format = intern_string(format)
+        self.name = name
+        self.nexus_date = nexus_date
+        self.cloudsmith_date = cloudsmith_date
+        self.freshness_date = freshness_date
+        self.source = intern_string(source)
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "FreshnessResult":
+        """
+        Build a result from a record dictionary (e.g. a checkpoint line).
+        
+        Args:
+            record: Dictionary with RESULT_FIELDS keys, dates as epoch seconds
+        
+        Returns:
+            Result record
+        """
+        return cls(**{field: record.get(field) for field in RESULT_FIELDS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the result to a dictionary keyed by RESULT_FIELDS.
+        
+        Returns:
+            Result dictionary with dates as epoch seconds
+        """
+        return {field: getattr(self, field) for field in RESULT_FIELDS}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FreshnessResult):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"FreshnessResult({self.to_dict()!r})"
+
+
+def external_record(result: FreshnessResult) -> Dict[str, Any]:
+    """
+    Format a result record's epoch dates as YYYYMMDDHHMMSS strings for text output.
+    
+    Args:
+        result: Result record with dates as epoch seconds
+    
+    Returns:
+        Dictionary of the record with formatted dates
+    """
+    record = result.to_dict()
+    for field in DATE_FIELDS:
+        record[field] = format_timestamp(record.get(field))
+    return record
+
+
+class ResultSink:
+    """
+    Destination that result records are streamed to as they are computed.
+    
+    Subclasses implement write() and close(); register them in RESULT_SINKS
+    under the file extension they handle.
+    """
+    def __init__(self, path: str):
+        """
+        Initialize the sink.
+        
+        Args:
+            path: Output file path
+        """
+        self.path = path
+
+    def write(self, result: FreshnessResult) -> None:
+        """Write a single result record."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush and close the output."""
+        raise NotImplementedError
+
+
+class JsonlSink(ResultSink):
+    """Writes one JSON object per line."""
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w')
+
+    def write(self, result: FreshnessResult) -> None:
+        self._file.write(json.dumps(external_record(result)) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CsvSink(ResultSink):
+    """Writes a CSV file with a header row of RESULT_FIELDS."""
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, result: FreshnessResult) -> None:
+        self._writer.writerow(external_record(result))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ColumnarSink(ResultSink):
+    """
+    Buffers records column-wise and writes them as Arrow record batches.
+    
+    At most `row_group_size` records are held in memory; each full buffer is
+    written as one row group (Parquet) or record batch (Arrow IPC). Epoch
+    dates go straight into timestamp columns.
+    """
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if pyarrow is None:
+            raise RuntimeError(f"pyarrow is required for {os.path.splitext(path)[1]} output: pip install pyarrow")
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema([
+            ('format', pyarrow.dictionary(pyarrow.int8(), pyarrow.string())),
+            ('name', pyarrow.string()),
+            ('nexus_date', pyarrow.timestamp('s', tz='UTC')),
+            ('cloudsmith_date', pyarrow.timestamp('s', tz='UTC')),
+            ('freshness_date', pyarrow.timestamp('s', tz='UTC')),
+            ('source', pyarrow.dictionary(pyarrow.int8(), pyarrow.string())),
+        ])
+        self._columns = {field: [] for field in RESULT_FIELDS}
+        self._writer = self._open_writer()
+
+    def _open_writer(self) -> Any:
+        """Open the underlying Arrow writer."""
+        raise NotImplementedError
+
+    def write(self, result: FreshnessResult) -> None:
+        for field in RESULT_FIELDS:
+            self._columns[field].append(getattr(result, field))
+        if len(self._columns['name']) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write buffered records as one batch and reset the buffer."""
+        if not self._columns['name']:
+            return
+        batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(self._columns[field], type=self.schema.field(field).type) for field in RESULT_FIELDS],
+            schema=self.schema
+        )
+        self._writer.write_batch(batch)
+        self._columns = {field: [] for field in RESULT_FIELDS}
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+class ParquetSink(ColumnarSink):
+    """Writes a Parquet file with one row group per buffered batch."""
+    def _open_writer(self) -> Any:
+        return pyarrow.parquet.ParquetWriter(self.path, self.schema)
+
+
+class ArrowSink(ColumnarSink):
+    """Writes an Arrow IPC (Feather v2) file with one record batch per buffered batch."""
+    def _open_writer(self) -> Any:
+        return pyarrow.ipc.new_file(self.path, self.schema)
+
+
+RESULT_SINKS = {
+    '.jsonl': JsonlSink,
+    '.csv': CsvSink,
+    '.parquet': ParquetSink,
+    '.arrow': ArrowSink,
+}
+
+
+def open_result_sink(path: str) -> ResultSink:
+    """
+    Open the sink registered for a path's file extension.
+    
+    Args:
+        path: Output file path
+    
+    Returns:
+        Result sink writing to the path
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in RESULT_SINKS:
+        raise ValueError(f"Unsupported output type '{extension}' for {path}, expected one of: {', '.join(RESULT_SINKS)}")
+    return RESULT_SINKS[extension](path)
+
 
-# Environment variables
-CLOUDSMITH_BASE_URL = os.getenv("CLOUDSMITH_BASE_URL", "https://api.cloudsmith.io")
-CLOUDSMITH_API_KEY = os.getenv("CLOUDSMITH_API_KEY")
-CLOUDSMITH_ORG = os.getenv("CLOUDSMITH_ORG", "customer-org")
-CLOUDSMITH_REPO = os.getenv("CLOUDSMITH_REPO", "maven-repo")
+class ResultSummary:
+    """Running counts of result records by date source."""
+    def __init__(self):
+        self.total = 0
+        self.by_source = {'nexus': 0, 'cloudsmith': 0, 'unknown': 0}
 
-# Constants
-FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+    def add(self, result: FreshnessResult) -> None:
+        """Count a result record."""
+        self.total += 1
+        self.by_source[result.source] = self.by_source.get(result.source, 0) + 1
 
-class NexusClient:
+
+def format_duration(seconds: float) -> str:
     """
-    Client for interacting with Nexus repositories.
-    For testing purposes, this mocks the Nexus API responses.
+    Format a duration as H:MM:SS.
+    
+    Args:
+        seconds: Duration in seconds
+    
+    Returns:
+        Formatted duration
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class ProgressReporter:
     """
-    def list_package_groups(self, format_type: str) -> List[Dict[str, str]]:
+    Throttled progress line for quiet runs.
+    
+    Logs done/total, the processing rate and an ETA at most once per interval,
+    in place of the per-package detail lines.
+    """
+    def __init__(self, total: Optional[int] = None, completed: int = 0,
+                 interval: float = DEFAULT_PROGRESS_INTERVAL):
         """
-        List all package groups (versionless packages) from Nexus.
+        Initialize the progress reporter.
         
         Args:
-            format_type: Package format (maven, npm, or python)
-        
-        Returns:
-            List of dictionaries with package identifiers.
+            total: Number of packages the run will produce, if known
+            completed: Packages already completed by an earlier run (excluded from the rate)
+            interval: Minimum seconds between progress lines
         """
-        fixtures_file = os.path.join(FIXTURES_DIR, format_type, "packages.json")
-        try:
-            with open(fixtures_file, 'r') as f:
-                fixture_data = json.load(f)
-            logger.info(f"Loaded {len(fixture_data)} {format_type} packages from fixtures")
-        except FileNotFoundError:
-            logger.error(f"Fixtures file not found: {fixtures_file}")
-            return []
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse fixtures file: {fixtures_file}")
-            return []
+        self.total = total
+        self.completed = completed
+        self.done = 0
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last_report = self.started
 
-        if format_type == "maven":
-            return fixture_data
-        elif format_type in ["npm", "python"]:
-            return [{"name": pkg["name"]} for pkg in fixture_data]
+    def update(self, count: int = 1) -> None:
+        """Count finished packages and log a progress line if the interval has passed."""
+        self.done += count
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report(now)
+
+    def report(self, now: Optional[float] = None) -> None:
+        """Log the current progress line."""
+        elapsed = (time.monotonic() if now is None else now) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        done = self.completed + self.done
+        if self.total:
+            eta = format_duration(max(self.total - done, 0) / rate) if rate > 0 else "unknown"
+            logger.info("Progress: %d/%d packages (%.1f%%), %.1f packages/s, ETA %s",
+                        done, self.total, 100.0 * done / self.total, rate, eta)
         else:
-            logger.warning(f"Unsupported format type: {format_type}")
-            return []
+            logger.info("Progress: %d packages, %.1f packages/s", done, rate)
+
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram of durations with log-spaced buckets.
+    
+    Bucket i holds durations up to TIMING_MIN_SECONDS * TIMING_BUCKET_GROWTH ** i,
+    so a percentile read from it overestimates the exact one by at most
+    TIMING_BUCKET_GROWTH - 1. Memory stays the same however many durations
+    are added. Not thread-safe; StageTimings serializes access.
+    """
+    __slots__ = ('counts', 'calls', 'total', 'max')
+
+    LOG_GROWTH = math.log(TIMING_BUCKET_GROWTH)
+    BUCKETS = math.ceil(math.log(TIMING_MAX_SECONDS / TIMING_MIN_SECONDS) / LOG_GROWTH) + 1
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * self.BUCKETS))
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Count one duration."""
+        if seconds <= TIMING_MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = min(self.BUCKETS - 1, math.ceil(math.log(seconds / TIMING_MIN_SECONDS) / self.LOG_GROWTH))
+        self.counts[bucket] += 1
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
 
-    def get_last_updated_date(self, identifier: Dict[str, str], format_type: str) -> str:
+    def percentile(self, percentile: float) -> Optional[float]:
         """
-        Get the lastUpdated date for a specific package group.
+        Estimate a nearest-rank percentile.
         
         Args:
-            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
-            format_type: Package format (maven, npm, or python)
+            percentile: Percentile between 0 and 100
         
         Returns:
-            lastUpdated date string in format YYYYMMDDHHMMSS
+            Upper bound of the bucket holding the percentile (never above the
+            largest duration) in seconds, or None if nothing was added
         """
-        fixtures_file = os.path.join(FIXTURES_DIR, format_type, "packages.json")
-        try:
-            with open(fixtures_file, 'r') as f:
-                fixture_data = json.load(f)
-        except FileNotFoundError:
-            logger.error(f"Fixtures file not found: {fixtures_file}")
-            return None
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse fixtures file: {fixtures_file}")
+        if not self.calls:
             return None
+        rank = max(1, -(-percentile * self.calls // 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max, TIMING_MIN_SECONDS * TIMING_BUCKET_GROWTH ** bucket)
+        return self.max
 
-        if format_type == "maven":
-            group_id = identifier.get("groupId")
-            artifact_id = identifier.get("artifactId")
-            for pkg in fixture_data:
-                if pkg.get("groupId") == group_id and pkg.get("artifactId") == artifact_id:
-                    return pkg.get("lastUpdated")
-        elif format_type in ["npm", "python"]:
-            name = identifier.get("name")
-            for pkg in fixture_data:
-                if pkg.get("name") == name:
-                    return pkg.get("lastUpdated")
-        else:
-            logger.warning(f"Unsupported format type: {format_type}")
-            return None
 
-        logger.warning(f"Package not found in Nexus fixtures")
-        return None
+class StageTimer:
+    """Context manager recording one timed call of a stage into StageTimings."""
+    __slots__ = ('timings', 'stage', 'started')
 
+    def __init__(self, timings: "StageTimings", stage: str):
+        self.timings = timings
+        self.stage = stage
+        self.started = 0.0
 
-class CloudsmithClient:
-    """
-    Client for interacting with Cloudsmith API.
+    def __enter__(self) -> "StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.timings.record(self.stage, time.perf_counter() - self.started)
+
+
+class StageTimings:
     """
+    Wall time, call counts and latency percentiles for each step of a run.
     
-    def __init__(self, base_url: str = CLOUDSMITH_BASE_URL, api_key: str = CLOUDSMITH_API_KEY, org: str = CLOUDSMITH_ORG, repo: str = CLOUDSMITH_REPO, mock: bool = False):
+    Durations are counted in a fixed-size LatencyHistogram per stage, so memory
+    stays flat however many packages are checked; percentiles are within 1%
+    of the exact values. In threaded and async runs calls overlap, and a
+    stage's total time can exceed the run's wall time. Safe to share across
+    threads and asyncio tasks.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in TIMED_STAGES}
+        self._lock = threading.Lock()
+
+    def measure(self, stage: str) -> StageTimer:
         """
-        Initialize the Cloudsmith client.
+        Time a block as one call of a stage.
         
         Args:
-            base_url: Base URL for Cloudsmith API
-            api_key: Cloudsmith API key
-            org: Organization name
-            repo: Repository name
-            mock: Whether to use mock data instead of real API
+            stage: Stage name (a key of TIMED_STAGES)
+        
+        Returns:
+            Context manager recording the block's duration
         """
-        self.base_url = base_url
-        self.api_key = api_key
-        self.org = org
-        self.repo = repo
-        self.mock = mock
+        return StageTimer(self, stage)
 
-    def list_package_groups(self, format_type: str, ignore_tag: str | None = None) -> List[Dict]:
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one call of a stage that took `seconds`."""
+        with self._lock:
+            self._histograms[stage].add(seconds)
+
+    def iter_timed(self, items: Iterable[Any], stage: str) -> Iterator[Any]:
         """
-        Get all package groups from Cloudsmith.
+        Yield from `items`, timing the production of each item as one call of a stage.
         
         Args:
-            format_type: Package format (maven, npm, or python)
+            items: Iterable to consume lazily, e.g. a streamed Nexus listing
+            stage: Stage name (a key of TIMED_STAGES)
         
-        Returns:
-            List of package groups
+        Yields:
+            The items
         """
-        endpoint = f"/packages/{self.org}/{self.repo}/groups/"
-        params = {
-            "page": 1,
-            "page_size": 100,
-            "query": f"format:{format_type} AND NOT tag:{ignore_tag}",
-            "sort": "-last_push"
-        }
-
-        all_groups = []
+        iterator = iter(items)
         while True:
-            response = self._make_request(endpoint, params)
-            results = response.get("results", [])
-            if not results:
-                break
-            all_groups.extend(results)
-            if len(results) < params.get("page_size", 100):
-                break
-            params["page"] += 1
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(stage, time.perf_counter() - started)
+            yield item
 
-        return all_groups
-
-    def get_last_updated_date(self, identifier: Dict[str, str], format_type: str, ignore_tag: str) -> str:
+    def report(self) -> Dict[str, Any]:
         """
-        Get the last updated date for a package group.
+        Summarize the recorded calls.
         
-        Args:
-            identifier: Package identifier (groupId:artifactId for Maven, name for npm/python)
-            format_type: Package format (maven, npm, or python)
-            ignore_tag: Tag to ignore when fetching the last updated date
-
         Returns:
-            Last updated date as YYYYMMDDHHMMSS string
+            Run wall time and, per stage, its label, call count, total seconds
+            and mean/p50/p95/p99/max latency in milliseconds
         """
-        if format_type == "maven":
-            group_id = identifier.get("groupId")
-            artifact_id = identifier.get("artifactId")
-            pakage_query = f'maven_group_id:^{group_id}$ AND name:^{artifact_id}$'
-        else:
-            name = identifier.get("name")
-            pakage_query = f'name:^{name}$'
+        stages = {}
+        with self._lock:
+            for stage, histogram in self._histograms.items():
+                calls = histogram.calls
+                stats = {'label': TIMED_STAGES[stage], 'calls': calls, 'total_seconds': histogram.total,
+                         'mean_ms': 1000 * histogram.total / calls if calls else None}
+                for percentile in TIMING_PERCENTILES:
+                    stats[f'p{percentile}_ms'] = 1000 * histogram.percentile(percentile) if calls else None
+                stats['max_ms'] = 1000 * histogram.max if calls else None
+                stages[stage] = stats
+        return {'wall_seconds': time.perf_counter() - self.started, 'stages': stages}
 
-        endpoint = f"/packages/{self.org}/{self.repo}/groups/"
-        params = {
-            "query": f"format:{format_type} AND {pakage_query} AND NOT tag:{ignore_tag}",
-        }
 
-        response = self._make_request(endpoint, params)
-        results = response.get("results", [])
-        assert len(results) <= 1, f"Expected at most one package for query: {params['query']}"
-        if results:
-            last_push = results[0].get("last_push")
-            return datetime.fromisoformat(last_push).strftime("%Y%m%d%H%M%S")
-        return None
+def stage_timer(timings: Optional[StageTimings], stage: str) -> Any:
+    """Time a block as one call of a stage, or do nothing if `timings` is None."""
+    return nullcontext() if timings is None else timings.measure(stage)
 
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """
-        Make a request to the Cloudsmith API.
-        
-        Args:
-            endpoint: API endpoint path
-            params: Query parameters
-            
-        Returns:
-            API response as a dictionary
-        """
-        if self.mock:
-            logger.info(f"Using mock data for Cloudsmith API request to {endpoint}")
-            return self.fixture_data
-        
-        url = f"{self.base_url}/v1{endpoint}"
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+def package_display_name(pkg: PackageIdentity, format_type: str) -> str:
+    """
+    Build the human-readable name of a package group.
+    
+    Args:
+        pkg: Package identifier
+        format_type: Package format (maven, npm, or python)
+    
+    Returns:
+        groupId:artifactId for Maven, name for npm/python
+    """
+    return pkg.name if format_type != "maven" else f"{pkg.group_id}:{pkg.artifact_id}"
 
 
-def format_date_for_display(date_str: str) -> str:
+def resolve_freshness(format_type: str, pkg_name: str, nexus_date: Optional[int], cloudsmith_date: Optional[int]) -> FreshnessResult:
     """
-    Format date string for display.
+    Pick the freshness date for a package from its two source dates (step 4).
     
     Args:
-        date_str: Date in format YYYYMMDDHHMMSS
-        
+        format_type: Package format (maven, npm, or python)
+        pkg_name: Display name of the package
+        nexus_date: Date from Nexus as epoch seconds
+        cloudsmith_date: Date from Cloudsmith as epoch seconds
+    
     Returns:
-        Formatted date string as YYYY-MM-DD HH:MM:SS
+        Result record for the package (dates as epoch seconds)
     """
-    if not date_str:
-        return "N/A"
+    # Step 4: Pick older of the 2 dates
+    freshness_date, date_source = compare_dates(nexus_date, cloudsmith_date)
+
+    # Print details (per-package, so only at DEBUG)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Cloudsmith date for %s: %s", pkg_name, DisplayDate(cloudsmith_date))
+        logger.debug("Step 4: Comparing dates and selecting the older one")
+        logger.debug("Freshness date for %s: %s (from %s)", pkg_name, DisplayDate(freshness_date), date_source)
+        logger.debug("Package: %s", pkg_name)
+        logger.debug("  Nexus date: %s", DisplayDate(nexus_date))
+        logger.debug("  Cloudsmith date: %s", DisplayDate(cloudsmith_date))
+        logger.debug("  Freshness date: %s (from %s)", DisplayDate(freshness_date), date_source)
+        logger.debug("")
+
+    return FreshnessResult(format_type, pkg_name, nexus_date, cloudsmith_date, freshness_date, date_source)
+
+
+def check_package(pkg: PackageIdentity, format_type: str, nexus_client: NexusClient, cloudsmith_client: CloudsmithClient,
+                  ignore_tag: str, cloudsmith_dates: Optional[Dict[int, int]] = None,
+                  timings: Optional[StageTimings] = None) -> FreshnessResult:
+    """
+    Run steps 2-4 of the freshness check for a single package.
     
-    try:
-        # Check if the string matches the expected pattern (14 digits)
-        if not re.match(r'^\d{14}$', date_str):
-            return date_str
-            
-        year = date_str[0:4]
-        month = date_str[4:6]
-        day = date_str[6:8]
-        hour = date_str[8:10]
-        minute = date_str[10:12]
-        second = date_str[12:14]
-        return f"{year}-{month}-{day} {hour}:{minute}:{second}"
-    except (IndexError, ValueError):
-        return date_str
+    Args:
+        pkg: Package identifier from Nexus
+        format_type: Package format (maven, npm, or python)
+        nexus_client: Nexus client
+        cloudsmith_client: Cloudsmith client
+        ignore_tag: Tag to ignore when fetching the Cloudsmith date
+        cloudsmith_dates: Pre-fetched Cloudsmith dates keyed by Nexus key ID (see NexusCatalog.join_dates),
+            or None to query per package
+        timings: Stage timings to record steps 2-4 in
+    
+    Returns:
+        Result record for the package
+    """
+    # Step 2: Get lastUpdated date from Nexus for each package
+    pkg_name = package_display_name(pkg, format_type)
+    logger.debug("Step 2: Getting lastUpdated date from Nexus for %s", pkg_name)
+    with stage_timer(timings, 'nexus_lookup'):
+        nexus_date = nexus_client.get_last_updated_date(pkg, format_type=format_type)
+
+    logger.debug("Nexus date for %s: %s", pkg_name, DisplayDate(nexus_date))
+
+    if cloudsmith_dates is not None:
+        logger.debug("Step 3: Looking up %s in pre-fetched Cloudsmith dates", pkg_name)
+        cloudsmith_date = cloudsmith_dates.get(nexus_client.key_id(pkg, format_type))
+    else:
+        logger.debug("Step 3: Querying Cloudsmith Package Group API for %s", pkg_name)
+        with stage_timer(timings, 'cloudsmith_query'):
+            cloudsmith_date = cloudsmith_client.get_last_updated_date(pkg, format_type=format_type, ignore_tag=ignore_tag)
+
+    with stage_timer(timings, 'comparison'):
+        return resolve_freshness(format_type, pkg_name, nexus_date, cloudsmith_date)
+
+
+async def check_package_async(pkg: PackageIdentity, format_type: str, nexus_client: AsyncNexusClient, cloudsmith_client: AsyncCloudsmithClient,
+                              ignore_tag: str, cloudsmith_dates: Optional[Dict[int, int]] = None,
+                              timings: Optional[StageTimings] = None) -> FreshnessResult:
+    """Async counterpart of check_package()."""
+    pkg_name = package_display_name(pkg, format_type)
+    logger.debug("Step 2: Getting lastUpdated date from Nexus for %s", pkg_name)
+    with stage_timer(timings, 'nexus_lookup'):
+        nexus_date = await nexus_client.get_last_updated_date(pkg, format_type=format_type)
+
+    logger.debug("Nexus date for %s: %s", pkg_name, DisplayDate(nexus_date))
+
+    if cloudsmith_dates is not None:
+        logger.debug("Step 3: Looking up %s in pre-fetched Cloudsmith dates", pkg_name)
+        cloudsmith_date = cloudsmith_dates.get(nexus_client.key_id(pkg, format_type))
+    else:
+        logger.debug("Step 3: Querying Cloudsmith Package Group API for %s", pkg_name)
+        with stage_timer(timings, 'cloudsmith_query'):
+            cloudsmith_date = await cloudsmith_client.get_last_updated_date(pkg, format_type=format_type, ignore_tag=ignore_tag)
+
+    with stage_timer(timings, 'comparison'):
+        return resolve_freshness(format_type, pkg_name, nexus_date, cloudsmith_date)
 
 
-def compare_dates(nexus_date: str, cloudsmith_date: str) -> Tuple[str, str]:
+def check_batch(batch: List[PackageIdentity], format_type: str, nexus_client: NexusClient, cloudsmith_client: CloudsmithClient,
+                ignore_tag: str, cloudsmith_dates: Optional[Dict[int, int]] = None,
+                batched: bool = False, timings: Optional[StageTimings] = None) -> List[FreshnessResult]:
     """
-    Compare two dates and return the older one along with the source.
+    Run steps 2-4 of the freshness check for a batch of packages.
     
     Args:
-        nexus_date: Date from Nexus in YYYYMMDDHHMMSS format
-        cloudsmith_date: Date from Cloudsmith in YYYYMMDDHHMMSS format
-        
+        batch: Package identifiers from Nexus
+        format_type: Package format (maven, npm, or python)
+        nexus_client: Nexus client
+        cloudsmith_client: Cloudsmith client
+        ignore_tag: Tag to ignore when fetching the Cloudsmith date
+        cloudsmith_dates: Pre-fetched Cloudsmith dates keyed by Nexus key ID (bulk mode), or None
+        batched: Resolve the whole batch with OR-combined Cloudsmith queries
+        timings: Stage timings to record steps 2-4 in
+    
     Returns:
-        Tuple of (older_date, source)
+        Result records in batch order
     """
-    if not nexus_date and not cloudsmith_date:
-        return None, "unknown"
+    if batched:
+        logger.debug("Step 3: Querying Cloudsmith Package Group API for a batch of %d %s packages", len(batch), format_type)
+        with stage_timer(timings, 'cloudsmith_query'):
+            dates = cloudsmith_client.get_last_updated_dates_batched(batch, format_type, ignore_tag=ignore_tag)
+        cloudsmith_dates = nexus_client.join_dates(dates, format_type)
+    return [check_package(pkg, format_type, nexus_client, cloudsmith_client, ignore_tag, cloudsmith_dates, timings)
+            for pkg in batch]
+
+
+async def check_batch_async(batch: List[PackageIdentity], format_type: str, nexus_client: AsyncNexusClient, cloudsmith_client: AsyncCloudsmithClient,
+                            ignore_tag: str, cloudsmith_dates: Optional[Dict[int, int]] = None,
+                            batched: bool = False, timings: Optional[StageTimings] = None) -> List[FreshnessResult]:
+    """Async counterpart of check_batch()."""
+    if batched:
+        logger.debug("Step 3: Querying Cloudsmith Package Group API for a batch of %d %s packages", len(batch), format_type)
+        with stage_timer(timings, 'cloudsmith_query'):
+            dates = await cloudsmith_client.get_last_updated_dates_batched(batch, format_type, ignore_tag=ignore_tag)
+        cloudsmith_dates = nexus_client.join_dates(dates, format_type)
+    return [await check_package_async(pkg, format_type, nexus_client, cloudsmith_client, ignore_tag, cloudsmith_dates, timings)
+            for pkg in batch]
+
+
+def prepare_format(format_type: str, nexus_client: NexusClient,
+                   cloudsmith_dates: Optional[Dict[Tuple[str, ...], int]],
+                   resume_from: Optional[Dict[str, int]] = None,
+                   timings: Optional[StageTimings] = None) -> Tuple[Iterator[PackageIdentity], Optional[Dict[int, int]]]:
+    """
+    Set up step 1 for a format: stream the Nexus listing and join prefetched dates.
     
-    if not nexus_date:
-        return cloudsmith_date, "cloudsmith"
+    Shared by every engine, so they list, skip and join identically.
     
-    if not cloudsmith_date:
-        return nexus_date, "nexus"
+    Args:
+        format_type: Package format (maven, npm, or python)
+        nexus_client: Nexus client
+        cloudsmith_dates: Dates from prefetch_cloudsmith_dates(), or None
+        resume_from: Number of leading packages to skip per format (already completed)
+        timings: Stage timings to record the Nexus listing in
     
-    # Compare dates and return the older one (larger value)
-    if int(nexus_date) > int(cloudsmith_date):
-        return nexus_date, "nexus"
-    else:
-        return cloudsmith_date, "cloudsmith"
+    Returns:
+        (Nexus packages still to check, prefetched dates keyed by key ID or None)
+    """
+    logger.info(f"Step 1: Fetching all versionless {format_type} packages from Nexus")
+    nexus_packages = nexus_client.iter_package_groups(format_type=format_type)
+    if timings is not None:
+        nexus_packages = timings.iter_timed(nexus_packages, 'nexus_listing')
+    logger.info(f"Found {nexus_client.count_package_groups(format_type)} {format_type} packages in Nexus")
+    if resume_from and resume_from.get(format_type):
+        logger.info(f"Skipping {resume_from[format_type]} already completed {format_type} packages")
+        nexus_packages = islice(nexus_packages, resume_from[format_type], None)
 
+    if cloudsmith_dates is not None:
+        cloudsmith_dates = nexus_client.join_dates(cloudsmith_dates, format_type)
+    return nexus_packages, cloudsmith_dates
 
-def main():
-    """Main function to run the freshness check script."""
-    parser = argparse.ArgumentParser(description='Check package freshness during migration')
-    parser.add_argument('--format', choices=['maven', 'npm', 'python', 'all'], default='maven',
-                      help='Package format to check (default: maven)')
-    parser.add_argument('--upstream-tag-to-exclude', default='upstream',
-                      help='Tag to use for excluding packages from Cloudsmith fetch')
-    args = parser.parse_args()
+
+def iter_results(formats_to_check: List[str], nexus_client: NexusClient, cloudsmith_client: CloudsmithClient,
+                 ignore_tag: str, mode: str, incremental_state: Optional[IncrementalState] = None,
+                 resume_from: Optional[Dict[str, int]] = None,
+                 timings: Optional[StageTimings] = None) -> Iterator[FreshnessResult]:
+    """
+    Run the freshness check sequentially, one package at a time.
     
-    formats_to_check = [args.format] if args.format != 'all' else ['maven', 'npm', 'python']
-    results = []
+    Args:
+        formats_to_check: Package formats to check
+        nexus_client: Nexus client
+        cloudsmith_client: Cloudsmith client
+        ignore_tag: Tag to ignore when fetching Cloudsmith dates
+        mode: Cloudsmith lookup mode (per-package, batched, bulk or incremental)
+        incremental_state: State carried between runs (incremental mode)
+        resume_from: Number of leading packages to skip per format (already completed)
+        timings: Stage timings to record steps 1-4 in
+    
+    Yields:
+        Result records in Nexus listing order
+    """
+    for format_type in formats_to_check:
+        logger.info(f"Starting freshness check for {format_type} packages")
+        cloudsmith_dates = prefetch_cloudsmith_dates(cloudsmith_client, format_type, ignore_tag, mode, incremental_state,
+                                                     timings)
+        nexus_packages, cloudsmith_dates = prepare_format(format_type, nexus_client, cloudsmith_dates, resume_from, timings)
+
+        # Get Latest updatedAt for each package
+        batched = mode == 'batched'
+        for batch in chunked(nexus_packages, cloudsmith_client.batch_size if batched else 1):
+            yield from check_batch(batch, format_type, nexus_client, cloudsmith_client, ignore_tag, cloudsmith_dates,
+                                   batched, timings)
+
+
+def iter_results_threaded(formats_to_check: List[str], nexus_client: NexusClient, cloudsmith_client: CloudsmithClient,
+                          ignore_tag: str, mode: str, workers: int,
+                          incremental_state: Optional[IncrementalState] = None,
+                          resume_from: Optional[Dict[str, int]] = None,
+                          timings: Optional[StageTimings] = None) -> Iterator[FreshnessResult]:
+    """
+    Run the freshness check on a thread pool of `workers` threads.
+    
+    All workers share the pooled session of `cloudsmith_client`; its connection
+    pool hands each thread its own connection, so the pool should allow at
+    least `workers` connections per host. At most 2 * `workers` packages (or
+    batches, in batched mode) are queued at a time and results are yielded in Nexus listing order, so output
+    matches iter_results().
+    
+    Args:
+        formats_to_check: Package formats to check
+        nexus_client: Nexus client
+        cloudsmith_client: Cloudsmith client shared by all workers
+        ignore_tag: Tag to ignore when fetching Cloudsmith dates
+        mode: Cloudsmith lookup mode (per-package, batched, bulk or incremental)
+        workers: Number of worker threads
+        incremental_state: State carried between runs (incremental mode)
+        resume_from: Number of leading packages to skip per format (already completed)
+        timings: Stage timings to record steps 1-4 in
+    
+    Yields:
+        Result records in Nexus listing order
+    """
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="freshness-worker")
+    try:
+        for format_type in formats_to_check:
+            logger.info(f"Starting freshness check for {format_type} packages")
+            cloudsmith_dates = prefetch_cloudsmith_dates(cloudsmith_client, format_type, ignore_tag, mode, incremental_state,
+                                                         timings)
+            nexus_packages, cloudsmith_dates = prepare_format(format_type, nexus_client, cloudsmith_dates, resume_from,
+                                                              timings)
 
-    nexus_client = NexusClient()
-    cloudsmith_client = CloudsmithClient()
+            batched = mode == 'batched'
+            pending = deque()
+            for batch in chunked(nexus_packages, cloudsmith_client.batch_size if batched else 1):
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(check_batch, batch, format_type, nexus_client, cloudsmith_client,
+                                               ignore_tag, cloudsmith_dates, batched, timings))
+            while pending:
+                yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def iter_results_async(formats_to_check: List[str], nexus_client: AsyncNexusClient, cloudsmith_client: AsyncCloudsmithClient,
+                             ignore_tag: str, mode: str, concurrency: int,
+                             incremental_state: Optional[IncrementalState] = None,
+                             resume_from: Optional[Dict[str, int]] = None,
+                             timings: Optional[StageTimings] = None) -> AsyncIterator[FreshnessResult]:
+    """
+    Run the freshness check with up to `concurrency` packages (or batches, in
+    batched mode) in flight.
+    
+    A semaphore bounds the number of outstanding Cloudsmith queries and at
+    most 2 * `concurrency` tasks are kept pending; results are yielded in
+    Nexus listing order, so output matches iter_results().
+    
+    Args:
+        formats_to_check: Package formats to check
+        nexus_client: Async Nexus client
+        cloudsmith_client: Async Cloudsmith client
+        ignore_tag: Tag to ignore when fetching Cloudsmith dates
+        mode: Cloudsmith lookup mode (per-package, batched, bulk or incremental)
+        concurrency: Maximum number of packages or batches processed concurrently
+        incremental_state: State carried between runs (incremental mode)
+        resume_from: Number of leading packages to skip per format (already completed)
+        timings: Stage timings to record steps 1-4 in
+    
+    Yields:
+        Result records in Nexus listing order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded_check(batch, format_type, cloudsmith_dates, batched):
+        try:
+            return await check_batch_async(batch, format_type, nexus_client, cloudsmith_client, ignore_tag,
+                                           cloudsmith_dates, batched, timings)
+        finally:
+            semaphore.release()
 
     for format_type in formats_to_check:
         logger.info(f"Starting freshness check for {format_type} packages")
-        
-        # Step 1: Get all versionless packages from Nexus
-        nexus_packages = []
-        logger.info(f"Step 1: Fetching all versionless {format_type} packages from Nexus")
-        nexus_packages = nexus_client.list_package_groups(format_type=format_type)
-        logger.info(f"Found {len(nexus_packages)} {format_type} packages in Nexus")
-        
-        # Get Latest updatedAt for each package
-        for pkg in nexus_packages:
-            # Step 2: Get lastUpdated date from Nexus for each package
-            pkg_name = pkg.get("name") if format_type != "maven" else f"{pkg.get('groupId')}:{pkg.get('artifactId')}"
-            logger.info(f"Step 2: Getting lastUpdated date from Nexus for {pkg_name}")
-            nexus_date = nexus_client.get_last_updated_date(pkg, format_type=format_type)
+        cloudsmith_dates = await prefetch_cloudsmith_dates_async(cloudsmith_client, format_type, ignore_tag, mode,
+                                                                 incremental_state, timings)
+        # The Nexus catalog is local, so the listing is set up with the synchronous client
+        nexus_packages, cloudsmith_dates = prepare_format(format_type, nexus_client.client, cloudsmith_dates,
+                                                          resume_from, timings)
+
+        batched = mode == 'batched'
+        pending = deque()
+        try:
+            for batch in chunked(nexus_packages, cloudsmith_client.batch_size if batched else 1):
+                # Bound finished-but-unyielded results behind a slow head task, as the
+                # threaded engine does
+                if len(pending) >= 2 * concurrency:
+                    for result in await pending.popleft():
+                        yield result
+                await semaphore.acquire()
+                pending.append(asyncio.create_task(bounded_check(batch, format_type, cloudsmith_dates, batched)))
+                while pending and pending[0].done():
+                    for result in pending.popleft().result():
+                        yield result
+            while pending:
+                for result in await pending.popleft():
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
 
-            logger.info(f"Nexus date for {pkg_name}: {format_date_for_display(nexus_date)}")
 
-            logger.info(f"Step 3: Querying Cloudsmith Package Group API for {pkg_name}")
-            cloudsmith_date = cloudsmith_client.get_last_updated_date(pkg, format_type=format_type, ignore_tag=args.upstream_tag_to_exclude)
+async def run_async(formats_to_check: List[str], ignore_tag: str, mode: str, concurrency: int,
+                    client_options: Dict[str, Any], on_result: Callable[[FreshnessResult], None],
+                    incremental_state: Optional[IncrementalState] = None,
+                    resume_from: Optional[Dict[str, int]] = None,
+                    nexus_client: Optional[NexusClient] = None,
+                    timings: Optional[StageTimings] = None) -> None:
+    """
+    Run the asyncio engine, handing each result to `on_result` as it completes.
+    
+    Args:
+        formats_to_check: Package formats to check
+        ignore_tag: Tag to ignore when fetching Cloudsmith dates
+        mode: Cloudsmith lookup mode (per-package, batched, bulk or incremental)
+        concurrency: Maximum number of packages or batches processed concurrently
+        client_options: Keyword arguments for AsyncCloudsmithClient
+        on_result: Callback invoked with each result record, in Nexus listing order
+        incremental_state: State carried between runs (incremental mode)
+        resume_from: Number of leading packages to skip per format (already completed)
+        nexus_client: Nexus client to serve package data from (a new one is created if omitted)
+        timings: Stage timings to record steps 1-4 in
+    """
+    nexus_client = AsyncNexusClient(nexus_client)
+    async with AsyncCloudsmithClient(**client_options) as cloudsmith_client:
+        async for result in iter_results_async(formats_to_check, nexus_client, cloudsmith_client,
+                                               ignore_tag, mode, concurrency, incremental_state, resume_from,
+                                               timings):
+            on_result(result)
 
-            logger.info(f"Cloudsmith date for {pkg_name}: {format_date_for_display(cloudsmith_date)}")
 
-            # Step 4: Pick older of the 2 dates
-            logger.info("Step 4: Comparing dates and selecting the older one")
-            freshness_date, date_source = compare_dates(nexus_date, cloudsmith_date)            
-            
-            logger.info(f"Freshness date for {pkg_name}: {format_date_for_display(freshness_date)} (from {date_source})")
-            
-            # Store the results
-            results.append({
-                'format': format_type,
-                'name': pkg_name,
-                'nexus_date': nexus_date,
-                'cloudsmith_date': cloudsmith_date,
-                'freshness_date': freshness_date,
-                'source': date_source
-            })
-            
-            # Print details
-            logger.info(f"Package: {pkg_name}")
-            logger.info(f"  Nexus date: {format_date_for_display(nexus_date)}")
-            logger.info(f"  Cloudsmith date: {format_date_for_display(cloudsmith_date)}")
-            logger.info(f"  Freshness date: {format_date_for_display(freshness_date)} (from {date_source})")
-            logger.info("")
-        
+def log_summary(summary: ResultSummary) -> None:
+    """
+    Log the results summary (step 5).
+    
+    Args:
+        summary: Running counts for all checked packages
+    """
     # Step 5: Log results
     logger.info("Step 5: Logging results summary")
     
@@ -352,10 +3635,266 @@ def main():
     logger.info("-" * 40)
     logger.info("Summary:")
     logger.info("-" * 40)
-    logger.info(f"Total packages: {len(results)}")
-    logger.info(f"Using Nexus date: {sum(1 for r in results if r['source'] == 'nexus')}")
-    logger.info(f"Using Cloudsmith date: {sum(1 for r in results if r['source'] == 'cloudsmith')}")
-    logger.info(f"Missing date: {sum(1 for r in results if r['source'] == 'unknown')}")
+    logger.info(f"Total packages: {summary.total}")
+    logger.info(f"Using Nexus date: {summary.by_source['nexus']}")
+    logger.info(f"Using Cloudsmith date: {summary.by_source['cloudsmith']}")
+    logger.info(f"Missing date: {summary.by_source['unknown']}")
+
+
+def format_milliseconds(value: Optional[float]) -> str:
+    """Format a latency in milliseconds for the timing table."""
+    return "-" if value is None else f"{value:.3f}"
+
+
+def log_timings(report: Dict[str, Any]) -> None:
+    """
+    Log where the run spent its time, one row per step.
+    
+    Args:
+        report: Report produced by StageTimings.report()
+    """
+    wall = report['wall_seconds']
+    logger.info("")
+    logger.info("-" * 40)
+    logger.info(f"Timings (wall time {format_duration(wall)}, {wall:.1f}s):")
+    logger.info("-" * 40)
+    logger.info(f"{'Step':<27} {'Calls':>10} {'Total s':>10} {'% run':>7} {'Mean ms':>10} "
+                f"{'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stats in report['stages'].values():
+        share = 100.0 * stats['total_seconds'] / wall if wall > 0 else 0.0
+        logger.info(f"{stats['label']:<27} {stats['calls']:>10} {stats['total_seconds']:>10.3f} {share:>6.1f}% "
+                    f"{format_milliseconds(stats['mean_ms']):>10} {format_milliseconds(stats['p50_ms']):>10} "
+                    f"{format_milliseconds(stats['p95_ms']):>10} {format_milliseconds(stats['p99_ms']):>10}")
+
+
+def main():
+    """Main function to run the freshness check script."""
+    parser = argparse.ArgumentParser(description='Check package freshness during migration')
+    parser.add_argument('--format', choices=['maven', 'npm', 'python', 'all'], default='maven',
+                      help='Package format to check (default: maven)')
+    parser.add_argument('--upstream-tag-to-exclude', default='upstream',
+                      help='Tag to use for excluding packages from Cloudsmith fetch')
+    parser.add_argument('--mode', choices=['per-package', 'batched', 'bulk', 'incremental'], default='per-package',
+                      help='Cloudsmith lookup mode: one query per package, OR-combined queries for '
+                           'batches of packages, one paged listing per format joined locally, or a '
+                           'listing of only the groups pushed since the previous incremental run '
+                           '(default: per-package)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                      help=f'Packages per Cloudsmith query in batched mode (default: {DEFAULT_BATCH_SIZE}, '
+                           f'maximum: {MAX_PAGE_SIZE})')
+    parser.add_argument('--max-query-length', type=int, default=DEFAULT_MAX_QUERY_LENGTH,
+                      help=f'Maximum Cloudsmith query length in batched mode (default: {DEFAULT_MAX_QUERY_LENGTH})')
+    parser.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE,
+                      help=f'Package groups requested per page when listing a whole format (bulk and incremental '
+                           f'modes; default and maximum: {MAX_PAGE_SIZE}). The server may serve smaller pages')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                      help=f'Number of Cloudsmith connection pools to keep (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--max-connections-per-host', type=int, default=DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                      help=f'Maximum keep-alive connections per Cloudsmith host (default: {DEFAULT_MAX_CONNECTIONS_PER_HOST})')
+    parser.add_argument('--concurrency', type=int, default=None,
+                      help='Use the asyncio engine with up to N Cloudsmith queries in flight '
+                           '(default: sequential; requires aiohttp)')
+    parser.add_argument('--workers', type=int, default=None,
+                      help='Process packages on a pool of N threads sharing one Cloudsmith session '
+                           '(default: sequential)')
+    parser.add_argument('--max-requests-per-second', type=float, default=DEFAULT_MAX_REQUESTS_PER_SECOND,
+                      help='Ceiling for the adaptive Cloudsmith rate limiter '
+                           f'(default: {DEFAULT_MAX_REQUESTS_PER_SECOND:g})')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                      help=f'Retries for 429 and 5xx Cloudsmith responses, connection errors and timeouts '
+                           f'(default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--request-timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                      help=f'Seconds to wait for a Cloudsmith connection or response (default: {DEFAULT_REQUEST_TIMEOUT:g})')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                      help=f'Directory for the on-disk Cloudsmith response cache (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_SECONDS,
+                      help=f'Seconds a cached Cloudsmith lookup stays valid (default: {DEFAULT_CACHE_TTL_SECONDS})')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Always query Cloudsmith instead of using the on-disk cache; runs are only '
+                           'checkpointed with an explicit --checkpoint-file')
+    parser.add_argument('--state-file', default=None,
+                      help='State file for incremental mode (default: incremental-state.json in --cache-dir)')
+    parser.add_argument('--full-refresh', action='store_true',
+                      help='In incremental mode, discard the stored state and list every package group')
+    parser.add_argument('--checkpoint-file', default=None,
+                      help='File completed results are checkpointed to (default: checkpoint-<hash of the run '
+                           'parameters>.jsonl in --cache-dir, none with --no-cache)')
+    parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_CHECKPOINT_INTERVAL,
+                      help=f'Packages between checkpoint syncs (default: {DEFAULT_CHECKPOINT_INTERVAL})')
+    parser.add_argument('--resume', action='store_true',
+                      help='Resume an interrupted run from its checkpoint, skipping completed packages')
+    parser.add_argument('--output', action='append', default=[],
+                      help='Stream result records to a file as they are computed; the type is chosen by '
+                           f'extension ({", ".join(RESULT_SINKS)}). May be given more than once')
+    parser.add_argument('--catalog-dir', default=FIXTURES_DIR,
+                      help='Directory holding the Nexus {format}/packages.json catalogs, e.g. one written by '
+                           f'generate_catalog.py (default: {FIXTURES_DIR})')
+    parser.add_argument('--compile-catalog', action='store_true',
+                      help='Compile {format}/packages.json in --catalog-dir into a memory-mapped packages.bin '
+                           'for the selected formats and exit')
+    parser.add_argument('--quiet', action='store_true',
+                      help='Replace the per-package detail log with a periodic progress line')
+    parser.add_argument('--progress-interval', type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                      help=f'Seconds between progress lines with --quiet (default: {DEFAULT_PROGRESS_INTERVAL:g})')
+    parser.add_argument('--timing-report', default=None,
+                      help='Write per-step wall time, call counts and latency percentiles to this JSON file')
+    parser.add_argument('--metrics-file', default=None,
+                      help='Write Prometheus metrics for the run to this file, e.g. in the node-exporter '
+                           'textfile collector directory as freshness_checker.prom')
+    args = parser.parse_args()
+    for option in ('batch_size', 'max_query_length', 'checkpoint_interval', 'workers', 'concurrency'):
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if not 1 <= args.page_size <= MAX_PAGE_SIZE:
+        parser.error(f"--page-size must be between 1 and {MAX_PAGE_SIZE}")
+    # A batch's matches come back as one page of len(batch) groups
+    if args.batch_size > MAX_PAGE_SIZE:
+        parser.error(f"--batch-size must be at most {MAX_PAGE_SIZE}")
+    if args.concurrency and args.workers:
+        parser.error("--concurrency and --workers are mutually exclusive")
+    if args.concurrency and aiohttp is None:
+        parser.error("--concurrency requires aiohttp: pip install aiohttp")
+    if args.resume and args.no_cache and not args.checkpoint_file:
+        parser.error("--resume with --no-cache needs --checkpoint-file")
+    # Per-package details are logged at DEBUG; show them unless running quietly
+    logger.setLevel(logging.INFO if args.quiet else logging.DEBUG)
+    
+    formats_to_check = [args.format] if args.format != 'all' else ['maven', 'npm', 'python']
+    catalog = NexusCatalog(args.catalog_dir)
+    if args.compile_catalog:
+        for format_type in formats_to_check:
+            try:
+                compile_catalog(catalog.fixtures_file(format_type), catalog.compiled_file(format_type), format_type)
+            except (OSError, ValueError) as e:
+                parser.error(f"Failed to compile {format_type} catalog: {e}")
+        return
+
+    metrics = RunMetrics(formats_to_check) if args.metrics_file else None
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl)
+        except (OSError, sqlite3.Error) as e:
+            parser.error(f"Cannot open the response cache in {args.cache_dir}: {e}")
+    client_options = {
+        'pool_size': args.pool_size,
+        # Give the connection pool room for every in-flight query
+        'max_connections_per_host': max(args.max_connections_per_host, args.concurrency or 0, args.workers or 0),
+        'rate_limiter': RateLimiter(max_rate=args.max_requests_per_second),
+        'max_retries': args.max_retries,
+        'timeout': args.request_timeout,
+        'batch_size': args.batch_size,
+        'max_query_length': args.max_query_length,
+        'page_size': args.page_size,
+        'cache': cache,
+        'metrics': metrics
+    }
+
+    incremental_state = None
+    if args.mode == 'incremental':
+        incremental_state = IncrementalState(args.state_file or os.path.join(args.cache_dir, "incremental-state.json"))
+        if args.full_refresh:
+            incremental_state.discard()
+
+    try:
+        sinks = [open_result_sink(path) for path in args.output]
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+
+    nexus_client = NexusClient(catalog)
+    # Runs against different catalogs get separate default checkpoints
+    run_params = {'formats': formats_to_check, 'upstream_tag_to_exclude': args.upstream_tag_to_exclude,
+                  'catalog_dir': os.path.abspath(args.catalog_dir)}
+    checkpoint = None
+    checkpoint_file = args.checkpoint_file
+    if checkpoint_file is None and not args.no_cache:
+        checkpoint_file = Checkpoint.default_path(args.cache_dir, run_params)
+    if checkpoint_file is not None:
+        try:
+            checkpoint = Checkpoint(
+                checkpoint_file,
+                run_params=run_params,
+                resume=args.resume,
+                interval=args.checkpoint_interval,
+                catalog={format_type: nexus_client.catalog.fingerprint(format_type) for format_type in formats_to_check}
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        except OSError as e:
+            parser.error(f"Cannot write checkpoint {checkpoint_file}: {e}")
+    resume_from = checkpoint.positions() if checkpoint is not None else {}
+    summary = ResultSummary()
+    timings = StageTimings()
+    progress = None
+    if args.quiet:
+        progress = ProgressReporter(
+            total=sum(nexus_client.count_package_groups(format_type) for format_type in formats_to_check),
+            completed=checkpoint.completed_count if checkpoint is not None else 0,
+            interval=args.progress_interval
+        )
+
+    def handle_result(result, checkpointed=False):
+        with timings.measure('output'):
+            if not checkpointed and checkpoint is not None:
+                checkpoint.record(result)
+            summary.add(result)
+            if metrics is not None:
+                metrics.record_result(result)
+            for sink in sinks:
+                sink.write(result)
+        if not checkpointed and progress is not None:
+            progress.update()
+
+    try:
+        if checkpoint is not None:
+            for record in checkpoint.completed_records():
+                handle_result(record, checkpointed=True)
+
+        if args.concurrency:
+            asyncio.run(run_async(formats_to_check, args.upstream_tag_to_exclude, args.mode, args.concurrency,
+                                  client_options, handle_result, incremental_state, resume_from, nexus_client,
+                                  timings))
+        elif args.workers:
+            with CloudsmithClient(**client_options) as cloudsmith_client:
+                for result in iter_results_threaded(formats_to_check, nexus_client, cloudsmith_client,
+                                                    args.upstream_tag_to_exclude, args.mode, args.workers,
+                                                    incremental_state, resume_from, timings):
+                    handle_result(result)
+        else:
+            with CloudsmithClient(**client_options) as cloudsmith_client:
+                for result in iter_results(formats_to_check, nexus_client, cloudsmith_client,
+                                           args.upstream_tag_to_exclude, args.mode, incremental_state,
+                                           resume_from, timings):
+                    handle_result(result)
+        if progress is not None:
+            progress.report()
+    except BaseException:
+        if checkpoint is not None:
+            checkpoint.close()
+            logger.error(f"Run interrupted; {summary.total} completed packages are checkpointed in {checkpoint.path}, "
+                         f"re-run with --resume to continue")
+        if metrics is not None:
+            metrics.write(args.metrics_file, client_options['cache'], success=False)
+        raise
+    else:
+        if checkpoint is not None:
+            checkpoint.finish()
+        if metrics is not None:
+            metrics.write(args.metrics_file, client_options['cache'])
+    finally:
+        for sink in sinks:
+            sink.close()
+        if client_options['cache'] is not None:
+            client_options['cache'].close()
+
+    log_summary(summary)
+    timing_report = timings.report()
+    log_timings(timing_report)
+    if args.timing_report:
+        with open(args.timing_report, 'w') as f:
+            json.dump(timing_report, f, indent=2)
+        logger.info(f"Wrote timing report to {args.timing_report}")
 
 
 if __name__ == "__main__":
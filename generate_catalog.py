@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Synthetic Catalog Generator
+
+Writes realistic Nexus catalogs and a matching Cloudsmith package groups
+dataset at configurable sizes, for scale benchmarks. The output directory is
+laid out like ./fixtures, so it works directly with
+NexusCatalog(fixtures_dir=...) and with mock_cloudsmith_server.py --groups.
+
+Maven groupIds and npm scopes follow a Zipf-like distribution (a few very
+common groups, a long tail of rare ones), the share of packages present in
+both sources is tunable, and dates are spread with most packages updated
+recently and a long tail of old ones.
+"""
+
+import os
+import json
+import bisect
+import argparse
+import logging
+import random
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+from freshness_checker import compile_catalog, format_timestamp
+
+logger = logging.getLogger("catalog-generator")
+
+# Constants
+FORMATS = ['maven', 'npm', 'python']
+DEFAULT_PACKAGES = 10_000
+DEFAULT_OVERLAP = 0.6
+DEFAULT_CLOUDSMITH_ONLY = 0.05
+DEFAULT_UPSTREAM_FRACTION = 0.3
+DEFAULT_NEWER_FRACTION = 0.4
+DEFAULT_ZIPF_EXPONENT = 1.1
+# Packages per distinct groupId (Maven) or scope (npm), on average
+PACKAGES_PER_GROUP = 20
+DEFAULT_MEAN_AGE_DAYS = 365.0
+DEFAULT_MAX_AGE_DAYS = 10 * 365
+DEFAULT_END_DATE = "2025-06-01"
+SECONDS_PER_DAY = 86400
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+WORDS = [
+    "core", "api", "client", "server", "utils", "common", "data", "auth", "cache", "config", "logging",
+    "metrics", "search", "storage", "stream", "test", "web", "ui", "http", "json", "xml", "sql", "crypto",
+    "event", "batch", "cli", "parser", "schema", "model", "service", "gateway", "worker", "queue", "mail",
+    "pdf", "image", "report", "billing", "payments", "orders", "inventory", "users", "admin", "plugin",
+]
+ORGS = [
+    "customer", "google", "apache", "fasterxml", "springframework", "eclipse", "squareup", "netflix",
+    "example", "acme", "internal", "platform", "analytics", "mobile", "infra", "security",
+]
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a package count such as 10000, 100k or 1M.
+    
+    Args:
+        value: Count, optionally with a k or M suffix
+    
+    Returns:
+        Number of packages
+    """
+    value = value.strip().lower()
+    multiplier = SIZE_SUFFIXES.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    try:
+        count = int(float(value) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"size must not be negative: {value}")
+    return count
+
+
+def word_name(index: int, separator: str = "-") -> str:
+    """
+    Build a unique, readable name from an index (words as base-N digits).
+    
+    Args:
+        index: Non-negative index
+        separator: String placed between words
+    
+    Returns:
+        Name such as "core" or "core-api-data"
+    """
+    parts = [WORDS[index % len(WORDS)]]
+    index //= len(WORDS)
+    while index:
+        index -= 1
+        parts.append(WORDS[index % len(WORDS)])
+        index //= len(WORDS)
+    return separator.join(parts)
+
+
+class ZipfSampler:
+    """Draws ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** exponent."""
+    def __init__(self, n: int, exponent: float, rng: random.Random):
+        self._cumulative = list(accumulate(1.0 / (rank + 1) ** exponent for rank in range(n)))
+        self._rng = rng
+
+    def sample(self) -> int:
+        """Draw one rank."""
+        return bisect.bisect_left(self._cumulative, self._rng.random() * self._cumulative[-1])
+
+
+class CatalogGenerator:
+    """
+    Generates Nexus package listings and matching Cloudsmith groups.
+    
+    Each Nexus package also exists in Cloudsmith with probability `overlap`.
+    A fraction `upstream_fraction` of those groups is tagged `upstream`
+    (cached from Nexus), and a fraction `newer_fraction` has a Cloudsmith
+    push newer than the Nexus date. `cloudsmith_only` adds groups (relative
+    to the Nexus size) that exist only in Cloudsmith.
+    """
+    def __init__(self, packages: int, overlap: float = DEFAULT_OVERLAP,
+                 cloudsmith_only: float = DEFAULT_CLOUDSMITH_ONLY,
+                 upstream_fraction: float = DEFAULT_UPSTREAM_FRACTION,
+                 newer_fraction: float = DEFAULT_NEWER_FRACTION,
+                 zipf_exponent: float = DEFAULT_ZIPF_EXPONENT,
+                 mean_age_days: float = DEFAULT_MEAN_AGE_DAYS,
+                 end_date: str = DEFAULT_END_DATE, seed: Optional[int] = None):
+        """
+        Initialize the generator.
+        
+        Args:
+            packages: Nexus packages per format
+            overlap: Fraction of Nexus packages that also exist in Cloudsmith
+            cloudsmith_only: Cloudsmith-only groups per format, as a fraction of `packages`
+            upstream_fraction: Fraction of overlapping groups tagged upstream
+            newer_fraction: Fraction of overlapping groups pushed to Cloudsmith after the Nexus date
+            zipf_exponent: Skew of the groupId / scope distribution
+            mean_age_days: Mean package age; ages are exponentially distributed
+            end_date: Newest possible date (YYYY-MM-DD, UTC)
+            seed: Random seed for reproducible output
+        """
+        self.packages = packages
+        self.overlap = overlap
+        self.cloudsmith_only = cloudsmith_only
+        self.upstream_fraction = upstream_fraction
+        self.newer_fraction = newer_fraction
+        self.zipf_exponent = zipf_exponent
+        self.mean_age_days = mean_age_days
+        self.end = int(datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        self.rng = random.Random(seed)
+        self.expected: Dict[str, Dict[str, int]] = {}
+
+    def _age_seconds(self) -> int:
+        """Draw a package age: mostly recent, with a long tail capped at DEFAULT_MAX_AGE_DAYS."""
+        days = min(self.rng.expovariate(1.0 / self.mean_age_days), DEFAULT_MAX_AGE_DAYS)
+        return int(days * SECONDS_PER_DAY) + self.rng.randrange(SECONDS_PER_DAY)
+
+    def _identities(self, format_type: str, count: int, offset: int = 0) -> Iterator[Dict[str, str]]:
+        """
+        Yield `count` unique package identities for a format.
+        
+        Maven groupIds and npm scopes are drawn from a Zipf distribution;
+        names within a group are numbered, so identities never repeat.
+        A non-zero `offset` is appended to every name, keeping a second
+        call's identities distinct from the first's.
+        """
+        groups = max(1, count // PACKAGES_PER_GROUP)
+        sampler = ZipfSampler(groups, self.zipf_exponent, self.rng)
+        suffix = f"-{offset}" if offset else ""
+        used: Dict[int, int] = {}
+        for index in range(count):
+            if format_type == "python":
+                yield {"name": f"{word_name(index)}{suffix}-py"}
+                continue
+            group = sampler.sample()
+            number = used.get(group, 0)
+            used[group] = number + 1
+            name = word_name(number) + suffix
+            org = ORGS[group % len(ORGS)]
+            if format_type == "maven":
+                yield {"groupId": f"com.{org}.{word_name(group, '.')}", "artifactId": name}
+            elif group % 3:
+                yield {"name": f"@{org}-{word_name(group)}/{name}"}
+            else:
+                yield {"name": f"{word_name(group)}.{name}"}
+
+    def _group(self, identity: Dict[str, str], format_type: str, last_push: int, upstream: bool) -> Dict[str, Any]:
+        """Build a Cloudsmith package group record for an identity."""
+        group = {
+            "name": identity.get("artifactId", identity.get("name")),
+            "format": format_type,
+            "backend_kind": format_type,
+            "count": self.rng.randint(1, 40),
+            "num_downloads": int(self.rng.paretovariate(1.2) * 10),
+            "size": self.rng.randint(2_000, 50_000_000),
+            "last_push": datetime.fromtimestamp(last_push, timezone.utc).isoformat(),
+            "tags": ["upstream"] if upstream else [],
+        }
+        if format_type == "maven":
+            group["maven_group_id"] = identity["groupId"]
+        return group
+
+    def generate(self, format_type: str) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Generate one format's Nexus entries and Cloudsmith groups.
+        
+        Also records the expected freshness source counts in `expected`.
+        
+        Args:
+            format_type: Package format (maven, npm, or python)
+        
+        Yields:
+            Tuples of (Nexus entry or None, Cloudsmith group or None)
+        """
+        expected = self.expected[format_type] = {'nexus': 0, 'cloudsmith': 0, 'unknown': 0}
+        for identity in self._identities(format_type, self.packages):
+            updated = self.end - self._age_seconds()
+            entry = dict(identity, lastUpdated=format_timestamp(updated))
+            group = None
+            source = 'nexus'
+            if self.rng.random() < self.overlap:
+                upstream = self.rng.random() < self.upstream_fraction
+                if self.rng.random() < self.newer_fraction:
+                    pushed = min(updated + 1 + int(self.rng.expovariate(1.0 / 30) * SECONDS_PER_DAY), self.end)
+                else:
+                    pushed = updated - int(self.rng.expovariate(1.0 / 90) * SECONDS_PER_DAY)
+                group = self._group(identity, format_type, pushed, upstream)
+                if not upstream and pushed >= updated:
+                    source = 'cloudsmith'
+            expected[source] += 1
+            yield entry, group
+
+        for identity in self._identities(format_type, int(self.packages * self.cloudsmith_only), offset=1):
+            yield None, self._group(identity, format_type, self.end - self._age_seconds(), False)
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time, so output size is not bounded by memory."""
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w')
+        self._file.write("[")
+
+    def write(self, item: Dict[str, Any]) -> None:
+        """Append one element to the array."""
+        self._file.write(",\n  " if self.count else "\n  ")
+        self._file.write(json.dumps(item))
+        self.count += 1
+
+    def close(self) -> None:
+        """Terminate the array and close the file."""
+        self._file.write("\n]\n" if self.count else "]\n")
+        self._file.close()
+
+
+def write_catalog(output_dir: str, formats: List[str], generator: CatalogGenerator,
+                  compile_catalogs: bool = False, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write a generated dataset and its manifest.json to a directory.
+    
+    Args:
+        output_dir: Directory to write {format}/packages.json and cloudsmith/groups.json to
+        formats: Package formats to generate
+        generator: Catalog generator
+        compile_catalogs: Also compile each catalog into a memory-mapped packages.bin
+        parameters: Generator settings to record in the manifest
+    
+    Returns:
+        The manifest
+    """
+    groups = JsonArrayWriter(os.path.join(output_dir, "cloudsmith", "groups.json"))
+    try:
+        for format_type in formats:
+            catalog = JsonArrayWriter(os.path.join(output_dir, format_type, "packages.json"))
+            try:
+                for entry, group in generator.generate(format_type):
+                    if entry is not None:
+                        catalog.write(entry)
+                    if group is not None:
+                        groups.write(group)
+            finally:
+                catalog.close()
+            logger.info(f"Wrote {catalog.count} {format_type} packages to {catalog.path}")
+            if compile_catalogs:
+                compile_catalog(catalog.path, os.path.join(output_dir, format_type, "packages.bin"), format_type)
+    finally:
+        groups.close()
+    logger.info(f"Wrote {groups.count} Cloudsmith package groups to {groups.path}")
+
+    manifest = {
+        'parameters': parameters or {},
+        'formats': formats,
+        # Source counts a run with the default upstream tag should report
+        'expected_sources': generator.expected,
+    }
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Wrote expected results to {manifest_path}")
+    return manifest
+
+
+def main():
+    """Main function to run the catalog generator."""
+    parser = argparse.ArgumentParser(description='Generate synthetic Nexus catalogs and Cloudsmith groups')
+    parser.add_argument('--output-dir', required=True,
+                      help='Directory to write {format}/packages.json and cloudsmith/groups.json to')
+    parser.add_argument('--packages', type=parse_size, default=DEFAULT_PACKAGES,
+                      help=f'Nexus packages per format, e.g. 10k, 100k or 1M (default: {DEFAULT_PACKAGES})')
+    parser.add_argument('--format', choices=FORMATS + ['all'], default='all',
+                      help='Package format to generate (default: all)')
+    parser.add_argument('--overlap', type=float, default=DEFAULT_OVERLAP,
+                      help=f'Fraction of Nexus packages also in Cloudsmith (default: {DEFAULT_OVERLAP})')
+    parser.add_argument('--cloudsmith-only', type=float, default=DEFAULT_CLOUDSMITH_ONLY,
+                      help='Cloudsmith-only groups as a fraction of --packages '
+                           f'(default: {DEFAULT_CLOUDSMITH_ONLY})')
+    parser.add_argument('--upstream-fraction', type=float, default=DEFAULT_UPSTREAM_FRACTION,
+                      help='Fraction of overlapping groups tagged upstream '
+                           f'(default: {DEFAULT_UPSTREAM_FRACTION})')
+    parser.add_argument('--newer-fraction', type=float, default=DEFAULT_NEWER_FRACTION,
+                      help='Fraction of overlapping groups pushed to Cloudsmith after the Nexus date '
+                           f'(default: {DEFAULT_NEWER_FRACTION})')
+    parser.add_argument('--zipf-exponent', type=float, default=DEFAULT_ZIPF_EXPONENT,
+                      help=f'Skew of the groupId/scope distribution (default: {DEFAULT_ZIPF_EXPONENT})')
+    parser.add_argument('--mean-age-days', type=float, default=DEFAULT_MEAN_AGE_DAYS,
+                      help=f'Mean package age in days (default: {DEFAULT_MEAN_AGE_DAYS:g})')
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE,
+                      help=f'Newest generated date, YYYY-MM-DD (default: {DEFAULT_END_DATE})')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--compile', action='store_true',
+                      help='Also compile each catalog into a memory-mapped packages.bin')
+    args = parser.parse_args()
+    for name in ('overlap', 'upstream_fraction', 'newer_fraction'):
+        if not 0 <= getattr(args, name) <= 1:
+            parser.error(f"--{name.replace('_', '-')} must be between 0 and 1")
+
+    formats = FORMATS if args.format == 'all' else [args.format]
+    generator = CatalogGenerator(args.packages, overlap=args.overlap, cloudsmith_only=args.cloudsmith_only,
+                                 upstream_fraction=args.upstream_fraction, newer_fraction=args.newer_fraction,
+                                 zipf_exponent=args.zipf_exponent, mean_age_days=args.mean_age_days,
+                                 end_date=args.end_date, seed=args.seed)
+    write_catalog(args.output_dir, formats, generator, compile_catalogs=args.compile,
+                  parameters={key: value for key, value in vars(args).items() if key not in ('output_dir', 'compile')})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Mock Cloudsmith API Server
+
+Local stand-in for the Cloudsmith package groups endpoint
+(/v1/packages/{owner}/{repo}/groups/), so CloudsmithClient throughput, retry
+behavior and pagination can be benchmarked reproducibly without the real
+service. Groups are served from a JSON file and support the `page`,
+`page_size`, `query` and `sort` parameters described in
+cloudsmith_package_group_api.md. Latency, server errors and 429 responses can
+be injected.
+"""
+
+import os
+import json
+import argparse
+import logging
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, List, Optional, Tuple, Any, Iterable, Callable
+
+from freshness_checker import FIXTURES_DIR, iter_json_array, parse_last_push
+
+logger = logging.getLogger("mock-cloudsmith")
+
+# Constants
+DEFAULT_GROUPS_FILE = os.path.join(FIXTURES_DIR, "cloudsmith", "groups.json")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_PAGE_SIZE = 30
+# Larger page_size values are clamped to this, like the real API clamps oversized pages
+DEFAULT_MAX_PAGE_SIZE = 1000
+DEFAULT_SORT = "name"
+SORT_FIELDS = ["name", "count", "num_downloads", "size", "last_push", "backend_kind"]
+# Sorted listings kept per (query, sort), so paging a large listing sorts it once
+LISTING_CACHE_SIZE = 32
+
+Response = Tuple[int, Dict[str, str], Dict[str, Any]]
+
+
+class QueryError(ValueError):
+    """Raised for a search query the mock cannot parse."""
+
+
+def tokenize_query(query: str) -> List[str]:
+    """
+    Split a search query into terms, operators and parentheses.
+    
+    Args:
+        query: Cloudsmith search query
+    
+    Returns:
+        List of tokens
+    """
+    return query.replace("(", " ( ").replace(")", " ) ").split()
+
+
+def term_matcher(term: str) -> Tuple[Callable[[Dict[str, Any]], bool], Optional[str]]:
+    """
+    Build the predicate for a single `field:value` search term.
+    
+    `^value$` matches exactly, `^value` and `value$` match a prefix or suffix,
+    and a bare value matches a substring. Terms without a field search names.
+    
+    Args:
+        term: Search term
+    
+    Returns:
+        Tuple of (predicate over a group, exact name the term requires or None)
+    """
+    field, _, value = term.partition(":") if ":" in term else ("name", "", term)
+    value = value.strip('"')
+    exact = value.startswith("^") and value.endswith("$") and len(value) > 1
+    if exact:
+        value = value[1:-1]
+        compare = lambda candidate: candidate == value
+    elif value.startswith("^"):
+        value = value[1:]
+        compare = lambda candidate: candidate.startswith(value)
+    elif value.endswith("$"):
+        value = value[:-1]
+        compare = lambda candidate: candidate.endswith(value)
+    else:
+        compare = lambda candidate: value in candidate
+
+    if field == "tag":
+        def predicate(group):
+            return any(compare(tag) for tag in group.get("tags") or [])
+    else:
+        def predicate(group):
+            candidate = group.get(field)
+            return candidate is not None and compare(str(candidate))
+    return predicate, value if exact and field == "name" else None
+
+
+class QueryParser:
+    """
+    Recursive-descent parser for the subset of Cloudsmith search syntax the
+    checker uses: field terms combined with AND, OR, NOT and parentheses.
+    
+    NOT binds tighter than AND, which binds tighter than OR; adjacent terms are
+    ANDed. Alongside the predicate, the parser works out which exact names a
+    query can match, so lookups by name need not scan every group.
+    """
+    def __init__(self, query: str):
+        self.tokens = tokenize_query(query)
+        self.pos = 0
+
+    def parse(self) -> Tuple[Callable[[Dict[str, Any]], bool], Optional[frozenset]]:
+        """
+        Parse the whole query.
+        
+        Returns:
+            Tuple of (predicate over a group, names the query is limited to or None)
+        
+        Raises:
+            QueryError: If the query is malformed
+        """
+        if not self.tokens:
+            return (lambda group: True), None
+        result = self._parse_or()
+        if self.pos != len(self.tokens):
+            raise QueryError(f"Unexpected token: {self.tokens[self.pos]}")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _parse_or(self):
+        predicates, names = [], []
+        while True:
+            predicate, limit = self._parse_and()
+            predicates.append(predicate)
+            names.append(limit)
+            if self._peek() != "OR":
+                break
+            self.pos += 1
+        if len(predicates) == 1:
+            return predicates[0], names[0]
+        limit = None if any(limit is None for limit in names) else frozenset().union(*names)
+        return (lambda group: any(predicate(group) for predicate in predicates)), limit
+
+    def _parse_and(self):
+        predicates, limit = [], None
+        while True:
+            predicate, term_limit = self._parse_not()
+            predicates.append(predicate)
+            if term_limit is not None:
+                limit = term_limit if limit is None else limit & term_limit
+            token = self._peek()
+            if token == "AND":
+                self.pos += 1
+            elif token is None or token in ("OR", ")"):
+                break
+        if len(predicates) == 1:
+            return predicates[0], limit
+        return (lambda group: all(predicate(group) for predicate in predicates)), limit
+
+    def _parse_not(self):
+        if self._peek() == "NOT":
+            self.pos += 1
+            predicate, _ = self._parse_not()
+            return (lambda group: not predicate(group)), None
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        token = self._peek()
+        if token is None or token in ("AND", "OR", ")"):
+            raise QueryError(f"Expected a search term, got {token or 'end of query'}")
+        self.pos += 1
+        if token == "(":
+            result = self._parse_or()
+            if self._peek() != ")":
+                raise QueryError("Missing closing parenthesis")
+            self.pos += 1
+            return result
+        predicate, name = term_matcher(token)
+        return predicate, None if name is None else frozenset([name])
+
+
+class MockCloudsmithAPI:
+    """
+    In-memory package groups dataset answering groups endpoint requests.
+    
+    Used by the HTTP server below, and passed to CloudsmithClient(mock_api=...) to answer
+    requests in-process.
+    """
+    def __init__(self, groups: Iterable[Dict[str, Any]], owner: Optional[str] = None, repo: Optional[str] = None,
+                 max_page_size: int = DEFAULT_MAX_PAGE_SIZE):
+        """
+        Initialize the mock API.
+        
+        Args:
+            groups: Package groups (name, format, last_push and optionally
+                maven_group_id, tags, count, num_downloads, size, backend_kind)
+            owner: Only serve this owner namespace (None to accept any)
+            repo: Only serve this repository (None to accept any)
+            max_page_size: Largest page served; larger page_size requests are clamped to it
+        """
+        self.owner = owner
+        self.repo = repo
+        self.max_page_size = max_page_size
+        self.groups = list(groups)
+        self._by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for group in self.groups:
+            group.setdefault("backend_kind", group.get("format"))
+            group.setdefault("tags", [])
+            self._by_name.setdefault(group.get("name"), []).append(group)
+        self._listing = lru_cache(maxsize=LISTING_CACHE_SIZE)(self._sorted_listing)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_GROUPS_FILE, owner: Optional[str] = None,
+                  repo: Optional[str] = None, max_page_size: int = DEFAULT_MAX_PAGE_SIZE) -> "MockCloudsmithAPI":
+        """
+        Load the groups dataset from a JSON array file.
+        
+        Args:
+            path: Groups file
+            owner: Only serve this owner namespace (None to accept any)
+            repo: Only serve this repository (None to accept any)
+            max_page_size: Largest page served; larger page_size requests are clamped to it
+        
+        Returns:
+            Mock API serving the file's groups
+        """
+        api = cls(iter_json_array(path), owner=owner, repo=repo, max_page_size=max_page_size)
+        logger.info(f"Loaded {len(api.groups)} package groups from {path}")
+        return api
+
+    def _sorted_listing(self, query: str, sort: str) -> List[Dict[str, Any]]:
+        """Filter and sort the groups for a query (cached per query and sort)."""
+        predicate, names = QueryParser(query).parse()
+        if names is not None:
+            candidates = [group for name in sorted(names) for group in self._by_name.get(name, [])]
+        else:
+            candidates = self.groups
+        matches = [group for group in candidates if predicate(group)]
+
+        field = sort.lstrip("-")
+        if field == "last_push":
+            value = lambda group: parse_last_push(group.get("last_push")) or 0
+        elif field in ("count", "num_downloads", "size"):
+            value = lambda group: group.get(field) or 0
+        else:
+            value = lambda group: group.get(field) or ""
+        # Tie-break on identity so paging is deterministic
+        matches.sort(key=lambda group: (group.get("maven_group_id") or "", group.get("name") or ""))
+        matches.sort(key=value, reverse=sort.startswith("-"))
+        return matches
+
+    def request(self, path: str, params: Dict[str, Any]) -> Response:
+        """
+        Answer a groups endpoint request.
+        
+        Args:
+            path: Endpoint path without the /v1 prefix, e.g. /packages/{owner}/{repo}/groups/
+            params: Query parameters
+        
+        Returns:
+            Tuple of (HTTP status, extra response headers, decoded JSON body)
+        """
+        parts = [part for part in path.split("/") if part]
+        if len(parts) != 4 or parts[0] != "packages" or parts[3] != "groups":
+            return 404, {}, {"detail": "Not found."}
+        if (self.owner and parts[1] != self.owner) or (self.repo and parts[2] != self.repo):
+            return 404, {}, {"detail": "Owner namespace or repository not found"}
+
+        try:
+            page = int(params.get("page") or 1)
+            page_size = int(params.get("page_size") or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return 422, {}, {"detail": "page and page_size must be integers"}
+        if page < 1 or page_size < 1:
+            return 422, {}, {"detail": "page and page_size must be positive"}
+        page_size = min(page_size, self.max_page_size)
+        sort = params.get("sort") or DEFAULT_SORT
+        if sort.lstrip("-") not in SORT_FIELDS:
+            return 422, {}, {"detail": f"Invalid sort field: {sort}"}
+
+        try:
+            listing = self._listing(params.get("query") or "", sort)
+        except QueryError as e:
+            return 400, {}, {"detail": f"Invalid query: {e}"}
+
+        start = (page - 1) * page_size
+        headers = {
+            "X-Pagination-Count": str(len(listing)),
+            "X-Pagination-Page": str(page),
+            "X-Pagination-PageSize": str(page_size),
+            "X-Pagination-PageTotal": str(max(1, -(-len(listing) // page_size))),
+        }
+        return 200, headers, {"results": listing[start:start + page_size]}
+
+
+class FaultInjector:
+    """
+    Injected latency, errors and rate limiting for the mock server.
+    
+    Every request is delayed by `latency` plus up to `latency_jitter` seconds.
+    A fraction `error_rate` of requests fail with 503 and a fraction
+    `throttle_rate` with 429. With `rate_limit` set, a fixed window of that
+    many requests per `rate_limit_window` seconds is enforced and advertised
+    through X-RateLimit-* headers, like the real API.
+    """
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, rate_limit: int = 0,
+                 rate_limit_window: float = 60.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_count = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def before_request(self) -> Tuple[Optional[Response], Dict[str, str]]:
+        """
+        Apply latency and decide whether to fail the request.
+        
+        Returns:
+            Tuple of (injected response or None to serve normally, rate limit headers)
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.latency_jitter) if self.latency_jitter else self.latency
+            roll = self._random.random()
+            headers = {}
+            limited = False
+            if self.rate_limit > 0:
+                now = time.time()
+                if now - self._window_start >= self.rate_limit_window:
+                    self._window_start, self._window_count = now, 0
+                self._window_count += 1
+                limited = self._window_count > self.rate_limit
+                reset = self._window_start + self.rate_limit_window
+                headers = {
+                    "X-RateLimit-Limit": str(self.rate_limit),
+                    "X-RateLimit-Remaining": str(max(self.rate_limit - self._window_count, 0)),
+                    "X-RateLimit-Reset": str(int(reset)),
+                }
+                if limited:
+                    headers["Retry-After"] = str(max(int(reset - now + 0.999), 1))
+
+        if delay > 0:
+            time.sleep(delay)
+        if limited:
+            return self._throttle(headers), headers
+        if roll < self.throttle_rate:
+            return self._throttle({"Retry-After": f"{self.retry_after:g}"}), headers
+        if roll < self.throttle_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return (503, {}, {"detail": "Service temporarily unavailable (injected)"}), headers
+        return None, headers
+
+    def _throttle(self, headers: Dict[str, str]) -> Response:
+        with self._lock:
+            self.throttled += 1
+        return 429, headers, {"detail": "Request was throttled."}
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler delegating to the server's MockCloudsmithAPI and FaultInjector."""
+    # Keep-alive, so pooled client sessions behave as they do against the real API
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body waits on the client's delayed ACK, adding ~40ms to every response
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        injected, headers = self.server.faults.before_request()
+        if injected is not None:
+            status, extra_headers, body = injected
+        elif url.path.startswith("/v1/"):
+            status, extra_headers, body = self.server.api.request(url.path[len("/v1"):], params)
+        else:
+            status, extra_headers, body = 404, {}, {"detail": "Not found."}
+        headers.update(extra_headers)
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threading HTTP server carrying the mock API and fault injection settings."""
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], api: MockCloudsmithAPI, faults: FaultInjector):
+        super().__init__(address, MockRequestHandler)
+        self.api = api
+        self.faults = faults
+
+    def handle_error(self, request: Any, client_address: Tuple[str, int]) -> None:
+        # Clients dropping keep-alive connections is routine, not an error
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def create_server(api: MockCloudsmithAPI, faults: Optional[FaultInjector] = None,
+                  host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> MockServer:
+    """
+    Create the mock HTTP server (not yet serving).
+    
+    Args:
+        api: Groups dataset to serve
+        faults: Fault injection settings (None for none)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+    
+    Returns:
+        Server; its base URL is http://{host}:{server.server_port}
+    """
+    return MockServer((host, port), api, faults if faults is not None else FaultInjector())
+
+
+def serve_in_background(api: MockCloudsmithAPI, faults: Optional[FaultInjector] = None,
+                        host: str = DEFAULT_HOST, port: int = 0) -> MockServer:
+    """
+    Start the mock server on a daemon thread, e.g. from a benchmark.
+    
+    Call shutdown() and server_close() on the returned server to stop it.
+    
+    Args:
+        api: Groups dataset to serve
+        faults: Fault injection settings (None for none)
+        host: Interface to bind
+        port: Port to bind (default 0, a free port)
+    
+    Returns:
+        Running server
+    """
+    server = create_server(api, faults, host, port)
+    threading.Thread(target=server.serve_forever, name="mock-cloudsmith", daemon=True).start()
+    return server
+
+
+def main():
+    """Main function to run the mock Cloudsmith API server."""
+    parser = argparse.ArgumentParser(description='Serve a local mock of the Cloudsmith package groups API')
+    parser.add_argument('--groups', default=DEFAULT_GROUPS_FILE,
+                      help=f'JSON array of package groups to serve (default: {DEFAULT_GROUPS_FILE})')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Interface to bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to bind (default: {DEFAULT_PORT})')
+    parser.add_argument('--owner', default=None, help='Only serve this owner namespace (default: any)')
+    parser.add_argument('--repo', default=None, help='Only serve this repository (default: any)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--latency-jitter', type=float, default=0.0,
+                      help='Up to this many extra random seconds per response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                      help='Fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                      help='Fraction of requests answered with 429 (default: 0)')
+    parser.add_argument('--retry-after', type=float, default=1.0,
+                      help='Retry-After seconds sent with injected 429s (default: 1)')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                      help='Requests allowed per rate limit window, advertised via X-RateLimit-* headers '
+                           '(default: 0, unlimited)')
+    parser.add_argument('--rate-limit-window', type=float, default=60.0,
+                      help='Rate limit window in seconds (default: 60)')
+    parser.add_argument('--max-page-size', type=int, default=DEFAULT_MAX_PAGE_SIZE,
+                      help=f'Clamp page_size to this many groups per page (default: {DEFAULT_MAX_PAGE_SIZE})')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible fault injection')
+    args = parser.parse_args()
+    if not 0 <= args.error_rate + args.throttle_rate <= 1:
+        parser.error("--error-rate and --throttle-rate must add up to between 0 and 1")
+    if args.max_page_size < 1:
+        parser.error("--max-page-size must be at least 1")
+
+    try:
+        api = MockCloudsmithAPI.from_file(args.groups, owner=args.owner, repo=args.repo,
+                                          max_page_size=args.max_page_size)
+    except (OSError, ValueError) as e:
+        parser.error(f"Failed to load groups from {args.groups}: {e}")
+    faults = FaultInjector(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+                           rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window, seed=args.seed)
+    server = create_server(api, faults, args.host, args.port)
+    logger.info(f"Serving mock Cloudsmith API on http://{args.host}:{server.server_port} "
+                f"(set CLOUDSMITH_BASE_URL to this URL)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Served {faults.requests} requests ({faults.errors} injected errors, "
+                    f"{faults.throttled} throttled)")
+
+
+if __name__ == "__main__":
+    main()
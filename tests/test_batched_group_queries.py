@@ -0,0 +1,86 @@
+import pytest
+
+from freshness_checker import (CloudsmithClient, batched_group_queries, dates_from_batch_response, package_key,
+                               parse_last_push)
+from mock_cloudsmith_server import MockCloudsmithAPI
+
+
+def maven_identifiers(count):
+    return [{"groupId": f"com.example.team{index % 3}", "artifactId": f"lib-{index}"} for index in range(count)]
+
+
+def test_every_identifier_is_covered_once_in_order():
+    identifiers = maven_identifiers(23)
+
+    batches = [batch for _, batch in batched_group_queries(identifiers, "maven", "upstream", batch_size=5)]
+
+    assert [identifier for batch in batches for identifier in batch] == identifiers
+    assert [len(batch) for batch in batches] == [5, 5, 5, 5, 3]
+
+
+def test_batch_size_one_sends_one_identifier_per_query():
+    identifiers = maven_identifiers(4)
+
+    queries = list(batched_group_queries(identifiers, "maven", "upstream", batch_size=1))
+
+    assert [batch for _, batch in queries] == [[identifier] for identifier in identifiers]
+
+
+@pytest.mark.parametrize("max_query_length", [150, 300, 1000])
+def test_queries_stay_within_the_length_limit(max_query_length):
+    queries = list(batched_group_queries(maven_identifiers(40), "maven", "upstream",
+                                         batch_size=50, max_query_length=max_query_length))
+
+    assert len(queries) > 1
+    for query, batch in queries:
+        assert len(query) <= max_query_length
+        assert len(batch) <= 50
+
+
+def test_oversized_clause_gets_a_query_of_its_own():
+    identifiers = [{"name": "small"}, {"name": "x" * 500}, {"name": "after"}]
+
+    queries = list(batched_group_queries(identifiers, "npm", "upstream", max_query_length=200))
+
+    assert [batch for _, batch in queries] == [[identifiers[0]], [identifiers[1]], [identifiers[2]]]
+    assert len(queries[1][0]) > 200
+
+
+def test_no_identifiers_no_queries():
+    assert list(batched_group_queries([], "python", "upstream")) == []
+
+
+def test_queries_match_exactly_their_batch():
+    identifiers = maven_identifiers(12)
+    groups = [{"name": identifier["artifactId"], "maven_group_id": identifier["groupId"], "format": "maven",
+               "last_push": f"2024-01-{index + 1:02d}T00:00:00Z"}
+              for index, identifier in enumerate(identifiers)]
+    # Same names under another groupId, an upstream copy and another format must not match
+    groups.append({"name": "lib-0", "maven_group_id": "org.other", "format": "maven", "last_push": "2025-01-01T00:00:00Z"})
+    groups.append({"name": "lib-1", "maven_group_id": "com.example.team1", "format": "maven",
+                   "last_push": "2025-01-01T00:00:00Z", "tags": ["upstream"]})
+    groups.append({"name": "lib-2", "format": "npm", "last_push": "2025-01-01T00:00:00Z"})
+    api = MockCloudsmithAPI(groups)
+
+    for query, batch in batched_group_queries(identifiers, "maven", "upstream", batch_size=5):
+        status, _, body = api.request("/packages/org/repo/groups/", {"query": query, "page_size": len(batch)})
+        assert status == 200
+        dates = dates_from_batch_response(body, batch, "maven")
+        assert set(dates) == {package_key(identifier, "maven") for identifier in batch}
+        for identifier in batch:
+            index = identifiers.index(identifier)
+            assert dates[package_key(identifier, "maven")] == parse_last_push(groups[index]["last_push"])
+
+
+@pytest.mark.parametrize("batch_size,server_limit", [(1500, 1000), (50, 7)])
+def test_batch_larger_than_the_server_page_is_paged(batch_size, server_limit):
+    identifiers = [{"name": f"pkg-{index:04d}"} for index in range(1500)]
+    groups = [{"name": identifier["name"], "format": "npm", "last_push": f"2024-01-{index % 28 + 1:02d}T00:00:00Z"}
+              for index, identifier in enumerate(identifiers)]
+    client = CloudsmithClient(mock_api=MockCloudsmithAPI(groups, max_page_size=server_limit),
+                              batch_size=batch_size, max_query_length=100_000)
+
+    dates = client.get_last_updated_dates_batched(identifiers, "npm", "upstream")
+
+    assert len(dates) == 1500
+    assert all(dates[(group["name"],)] == parse_last_push(group["last_push"]) for group in groups)
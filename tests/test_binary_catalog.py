@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from freshness_checker import (BinaryCatalog, CATALOG_BLOCK_SIZE, CATALOG_MAX_KEY_LENGTH, compile_catalog,
+                               format_timestamp, package_key)
+
+
+def compile_entries(tmp_path, entries, format_type="maven"):
+    source = tmp_path / "packages.json"
+    source.write_text(json.dumps(entries), encoding="utf-8")
+    destination = str(tmp_path / "packages.bin")
+    compile_catalog(str(source), destination, format_type)
+    return BinaryCatalog(destination)
+
+
+def maven_entries(count):
+    # Long shared groupId prefixes, so most keys in a block are prefix-compressed
+    return [{"groupId": f"com.example.platform.{index % 7}", "artifactId": f"service-{index:04d}",
+             "lastUpdated": format_timestamp(1700000000 + index)} for index in range(count)]
+
+
+def test_prefix_compressed_blocks_decode_every_key(tmp_path):
+    entries = maven_entries(5 * CATALOG_BLOCK_SIZE + 3)
+    catalog = compile_entries(tmp_path, entries)
+
+    assert len(catalog) == len(entries)
+    assert catalog.block_count == 6
+    for index, entry in enumerate(entries):
+        key = package_key(entry, "maven")
+        key_id = catalog.key_id(key)
+        assert key_id is not None
+        assert catalog.key_at(key_id) == key
+        assert catalog.get(key) == 1700000000 + index
+    # Key IDs are sorted positions
+    assert [catalog.key_at(key_id) for key_id in range(len(catalog))] == sorted(
+        package_key(entry, "maven") for entry in entries)
+
+
+def test_listing_order_and_first_duplicate_wins(tmp_path):
+    entries = [
+        {"name": "zeta", "lastUpdated": "20240101000000"},
+        {"name": "alpha", "lastUpdated": "20240102000000"},
+        {"name": "zeta", "lastUpdated": "20240103000000"},
+        {"name": "undated"},
+    ]
+    catalog = compile_entries(tmp_path, entries, "npm")
+
+    assert catalog.listing_count == 4
+    assert len(catalog) == 3
+    assert list(catalog.iter_keys()) == [("zeta",), ("alpha",), ("zeta",), ("undated",)]
+    assert format_timestamp(catalog.get(("zeta",))) == "20240101000000"
+    assert ("undated",) in catalog
+    assert catalog.get(("undated",), default=-1) is None
+
+
+@pytest.mark.parametrize("key", [
+    ("com.example.platform.0", "service-0000x"),
+    ("com.example.platform.0", "service-000"),
+    ("com.example.platform.3", "service-0001"),
+    ("aaa", "first"),
+    ("zzz", "last"),
+    ("com.example.platform.9", "service-0000"),
+])
+def test_absent_keys(tmp_path, key):
+    catalog = compile_entries(tmp_path, maven_entries(3 * CATALOG_BLOCK_SIZE))
+
+    assert catalog.key_id(key) is None
+    assert key not in catalog
+    assert catalog.get(key, default="missing") == "missing"
+
+
+def test_empty_catalog(tmp_path):
+    catalog = compile_entries(tmp_path, [])
+
+    assert len(catalog) == 0
+    assert catalog.listing_count == 0
+    assert catalog.block_count == 0
+    assert list(catalog.iter_keys()) == []
+    assert ("anything",) not in catalog
+
+
+def test_key_at_the_length_limit(tmp_path):
+    name = "n" * CATALOG_MAX_KEY_LENGTH
+    catalog = compile_entries(tmp_path, [{"name": name, "lastUpdated": "20240101000000"},
+                                         {"name": name[:-1] + "m"}], "npm")
+
+    assert catalog.key_at(catalog.key_id((name,))) == (name,)
+    assert (name[:-1] + "m",) in catalog
+
+
+def test_rejects_keys_longer_than_the_limit(tmp_path):
+    with pytest.raises(ValueError, match="at most"):
+        compile_entries(tmp_path, [{"name": "n" * (CATALOG_MAX_KEY_LENGTH + 1)}], "npm")
+    assert not (tmp_path / "packages.bin").exists()
+
+
+@pytest.mark.parametrize("content", [b"", b"NXCATLG\x01" + bytes(24), b"not a catalog at all, clearly"])
+def test_rejects_files_that_are_not_catalogs(tmp_path, content):
+    path = tmp_path / "packages.bin"
+    path.write_bytes(content)
+
+    with pytest.raises((ValueError, OSError)):
+        BinaryCatalog(str(path))
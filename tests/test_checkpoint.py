@@ -0,0 +1,134 @@
+import os
+import sys
+
+import pytest
+
+from freshness_checker import Checkpoint, FreshnessResult, NexusCatalog, main
+
+
+RUN = {"formats": ["maven", "npm"], "upstream_tag_to_exclude": "upstream"}
+
+
+def result(index, format_type="maven"):
+    return FreshnessResult(format_type, f"com.example:lib-{index}", 1700000000 + index, None,
+                           1700000000 + index, "nexus")
+
+
+def write_checkpoint(path, results):
+    checkpoint = Checkpoint(path, RUN, interval=2)
+    for record in results:
+        checkpoint.record(record)
+    checkpoint.close()
+
+
+@pytest.mark.parametrize("torn_line", [b'{"format": "maven", "na', b'{"format": "npm"}', b'not json\n'])
+def test_resume_discards_torn_last_line(tmp_path, torn_line):
+    path = str(tmp_path / "checkpoint.jsonl")
+    records = [result(0), result(1), result(0, "npm")]
+    write_checkpoint(path, records)
+    intact_size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(torn_line)
+
+    checkpoint = Checkpoint(path, RUN, resume=True)
+
+    assert checkpoint.completed_count == 3
+    assert checkpoint.positions() == {"maven": 2, "npm": 1}
+    assert os.path.getsize(path) == intact_size
+    assert [record.to_dict() for record in checkpoint.completed_records()] == [record.to_dict() for record in records]
+
+    # Records appended after recovery are readable on the next resume
+    checkpoint.record(result(1, "npm"))
+    checkpoint.close()
+    resumed = Checkpoint(path, RUN, resume=True)
+    assert resumed.positions() == {"maven": 2, "npm": 2}
+    resumed.close()
+
+
+def test_resume_rejects_different_run_parameters(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    write_checkpoint(path, [result(0)])
+
+    with pytest.raises(ValueError, match="different parameters"):
+        Checkpoint(path, {**RUN, "formats": ["python"]}, resume=True)
+
+
+def test_resume_without_checkpoint_starts_fresh(tmp_path):
+    path = str(tmp_path / "missing" / "checkpoint.jsonl")
+
+    checkpoint = Checkpoint(path, RUN, resume=True)
+
+    assert checkpoint.completed_count == 0
+    assert list(checkpoint.completed_records()) == []
+    checkpoint.finish()
+    assert not os.path.exists(path)
+
+
+def test_finish_tolerates_an_already_removed_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"), RUN)
+    os.remove(checkpoint.path)
+
+    checkpoint.finish()
+
+
+def test_default_path_depends_only_on_run_parameters(tmp_path):
+    same = Checkpoint.default_path(str(tmp_path), {"upstream_tag_to_exclude": "upstream", "formats": ["maven", "npm"]})
+
+    assert same == Checkpoint.default_path(str(tmp_path), RUN)
+    assert Checkpoint.default_path(str(tmp_path), {**RUN, "formats": ["maven"]}) != same
+    assert os.path.dirname(same) == str(tmp_path)
+
+
+def test_resume_rejects_a_changed_catalog(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path, RUN, catalog={"maven": "100-1", "npm": "200-1"})
+    checkpoint.record(result(0))
+    checkpoint.close()
+
+    with pytest.raises(ValueError, match="different Nexus catalog"):
+        Checkpoint(path, RUN, resume=True, catalog={"maven": "100-2", "npm": "200-1"})
+    resumed = Checkpoint(path, RUN, resume=True, catalog={"maven": "100-1", "npm": "200-1"})
+    assert resumed.positions() == {"maven": 1}
+    resumed.close()
+
+
+def test_catalog_fingerprint_follows_the_file(tmp_path):
+    (tmp_path / "npm").mkdir()
+    source = tmp_path / "npm" / "packages.json"
+    catalog = NexusCatalog(str(tmp_path))
+    assert catalog.fingerprint("npm") is None
+
+    source.write_text('[{"name": "a"}]', encoding="utf-8")
+    first = catalog.fingerprint("npm")
+    source.write_text('[{"name": "a"}, {"name": "b"}]', encoding="utf-8")
+
+    assert first is not None
+    assert catalog.fingerprint("npm") != first
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["freshness_checker.py", *args])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    return exit_info.value.code
+
+
+def test_unwritable_checkpoint_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+
+    assert run_main(monkeypatch, "--no-cache", "--checkpoint-file", str(blocker / "checkpoint.jsonl")) == 2
+    assert "Cannot write checkpoint" in capsys.readouterr().err
+
+
+def test_unwritable_cache_dir_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+
+    assert run_main(monkeypatch, "--cache-dir", str(blocker / "cache")) == 2
+    assert "Cannot open the response cache" in capsys.readouterr().err
+
+
+def test_resume_without_cache_needs_a_checkpoint_file(monkeypatch, capsys):
+    assert run_main(monkeypatch, "--no-cache", "--resume") == 2
+    assert "--checkpoint-file" in capsys.readouterr().err
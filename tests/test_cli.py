@@ -0,0 +1,44 @@
+import sys
+
+import pytest
+
+import freshness_checker
+from freshness_checker import MAX_PAGE_SIZE, main
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["freshness_checker.py", *args])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    return exit_info.value.code
+
+
+def test_concurrency_without_aiohttp_is_a_usage_error(monkeypatch, capsys):
+    monkeypatch.setattr(freshness_checker, "aiohttp", None)
+
+    assert run_main(monkeypatch, "--no-cache", "--concurrency", "4") == 2
+    assert "pip install aiohttp" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("args,message", [
+    (["--batch-size", "0"], "--batch-size must be at least 1"),
+    (["--batch-size", str(MAX_PAGE_SIZE + 1)], f"--batch-size must be at most {MAX_PAGE_SIZE}"),
+    (["--page-size", str(MAX_PAGE_SIZE + 1)], "--page-size must be between"),
+    (["--workers", "2", "--concurrency", "2"], "mutually exclusive"),
+])
+def test_invalid_options_are_usage_errors(monkeypatch, capsys, args, message):
+    assert run_main(monkeypatch, "--no-cache", *args) == 2
+    assert message in capsys.readouterr().err
+
+
+def test_compile_catalog_uses_catalog_dir(monkeypatch, tmp_path):
+    (tmp_path / "npm").mkdir()
+    (tmp_path / "npm" / "packages.json").write_text('[{"name": "left-pad", "lastUpdated": "20240101000000"}]',
+                                                   encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["freshness_checker.py", "--compile-catalog", "--catalog-dir", str(tmp_path),
+                                      "--format", "npm"])
+
+    main()
+
+    assert (tmp_path / "npm" / "packages.bin").exists()
+    assert freshness_checker.NexusCatalog(str(tmp_path)).count("npm") == 1
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from freshness_checker import (CloudsmithClient, NexusCatalog, NexusClient, RateLimiter, ResultSummary, iter_results,
+                               iter_results_threaded, run_async)
+from generate_catalog import FORMATS, CatalogGenerator, write_catalog
+from mock_cloudsmith_server import FaultInjector, MockCloudsmithAPI, serve_in_background
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    catalog_dir = tmp_path_factory.mktemp("catalog")
+    manifest = write_catalog(str(catalog_dir), FORMATS, CatalogGenerator(120, seed=7))
+    api = MockCloudsmithAPI.from_file(str(catalog_dir / "cloudsmith" / "groups.json"), max_page_size=50)
+    # Jittered latency makes queries complete out of order
+    server = serve_in_background(api, FaultInjector(latency_jitter=0.003, seed=7))
+    try:
+        yield str(catalog_dir), f"http://127.0.0.1:{server.server_port}", manifest
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def client_options(base_url):
+    return {'base_url': base_url, 'api_key': "test", 'rate_limiter': RateLimiter(max_rate=10_000), 'batch_size': 7,
+            'page_size': 50}
+
+
+def run_engine(engine, mode, dataset):
+    catalog_dir, base_url, _ = dataset
+    nexus_client = NexusClient(NexusCatalog(catalog_dir))
+    if engine == "async":
+        pytest.importorskip("aiohttp")
+        results = []
+        asyncio.run(run_async(FORMATS, "upstream", mode, 8, client_options(base_url), results.append,
+                              nexus_client=nexus_client))
+        return results
+    with CloudsmithClient(**client_options(base_url)) as cloudsmith_client:
+        if engine == "threaded":
+            return list(iter_results_threaded(FORMATS, nexus_client, cloudsmith_client, "upstream", mode, workers=8))
+        return list(iter_results(FORMATS, nexus_client, cloudsmith_client, "upstream", mode))
+
+
+@pytest.mark.parametrize("mode", ["per-package", "batched", "bulk"])
+def test_engines_produce_identical_output(dataset, mode):
+    sequential = run_engine("sequential", mode, dataset)
+
+    assert run_engine("threaded", mode, dataset) == sequential
+    assert run_engine("async", mode, dataset) == sequential
+
+    # Results follow the Nexus listing order
+    catalog = NexusCatalog(dataset[0])
+    assert len(sequential) == sum(catalog.count(format_type) for format_type in FORMATS)
+    assert [result.format for result in sequential] == sorted((result.format for result in sequential),
+                                                               key=FORMATS.index)
+
+
+def test_sources_match_the_generated_expectations(dataset):
+    summary = ResultSummary()
+    for result in run_engine("sequential", "bulk", dataset):
+        summary.add(result)
+
+    expected = dataset[2]["expected_sources"]
+    for source in ("nexus", "cloudsmith", "unknown"):
+        assert summary.by_source[source] == sum(counts[source] for counts in expected.values())
@@ -0,0 +1,57 @@
+import pytest
+
+from freshness_checker import CloudsmithClient, parse_page_total
+from mock_cloudsmith_server import MockCloudsmithAPI
+
+
+def npm_groups(count):
+    return [{"name": f"pkg-{index:04d}", "format": "npm", "last_push": f"2024-01-{index % 28 + 1:02d}T00:00:00Z"}
+            for index in range(count)]
+
+
+class HeaderlessAPI:
+    """Mock API that drops the X-Pagination-* headers, like a proxy stripping them."""
+
+    def __init__(self, api):
+        self.api = api
+        self.pages = []
+
+    def request(self, endpoint, params):
+        status, _, body = self.api.request(endpoint, params)
+        self.pages.append(len(body.get("results", [])))
+        return status, {}, body
+
+
+@pytest.mark.parametrize("server_limit,page_size", [(7, 20), (500, 1000), (1000, 1000), (1000, 7)])
+def test_listing_survives_a_server_page_clamp(server_limit, page_size):
+    groups = npm_groups(1500)
+    client = CloudsmithClient(mock_api=MockCloudsmithAPI(groups, max_page_size=server_limit), page_size=page_size)
+
+    listed = list(client.iter_package_groups("npm", ignore_tag="upstream"))
+
+    assert sorted(group["name"] for group in listed) == sorted(group["name"] for group in groups)
+    assert len(client.get_last_updated_dates("npm", "upstream")) == 1500
+
+
+def test_listing_without_pagination_headers_pages_until_empty():
+    api = HeaderlessAPI(MockCloudsmithAPI(npm_groups(25), max_page_size=10))
+    client = CloudsmithClient(mock_api=api, page_size=1000)
+
+    assert len(client.list_package_groups("npm", ignore_tag="upstream")) == 25
+    assert api.pages == [10, 10, 5, 0]
+
+
+def test_clamped_page_size_is_reported_in_headers():
+    api = MockCloudsmithAPI(npm_groups(25), max_page_size=10)
+
+    status, headers, body = api.request("/packages/org/repo/groups/", {"page_size": 1000, "page": 3})
+
+    assert status == 200
+    assert len(body["results"]) == 5
+    assert headers["X-Pagination-PageSize"] == "10"
+    assert parse_page_total(headers) == 3
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Pagination-PageTotal": "many"}, None])
+def test_page_total_missing_or_malformed(headers):
+    assert parse_page_total(headers) is None
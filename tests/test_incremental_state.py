@@ -0,0 +1,80 @@
+import json
+
+from freshness_checker import CloudsmithClient, IncrementalState, prefetch_cloudsmith_dates
+from mock_cloudsmith_server import MockCloudsmithAPI
+
+
+def npm_group(name, day, tags=()):
+    return {"name": name, "format": "npm", "last_push": f"2024-01-{day:02d}T00:00:00Z", "tags": list(tags)}
+
+
+def day(number):
+    return 1704067200 + (number - 1) * 86400
+
+
+def test_first_run_lists_everything_and_records_the_mark(tmp_path):
+    client = CloudsmithClient(mock_api=MockCloudsmithAPI([npm_group("a", 1), npm_group("b", 3)]))
+    state = IncrementalState(str(tmp_path / "state.json"))
+
+    assert state.since(client, "npm", "upstream") is None
+    dates = prefetch_cloudsmith_dates(client, "npm", "upstream", "incremental", state)
+
+    assert dates == {("a",): day(1), ("b",): day(3)}
+    assert IncrementalState(str(tmp_path / "state.json")).since(client, "npm", "upstream") == day(3)
+
+
+def test_later_runs_merge_groups_pushed_since_the_mark(tmp_path):
+    path = str(tmp_path / "state.json")
+    api = MockCloudsmithAPI([npm_group("a", 1), npm_group("b", 3)])
+    prefetch_cloudsmith_dates(CloudsmithClient(mock_api=api), "npm", "upstream", "incremental", IncrementalState(path))
+
+    # "a" is republished and "c" is new; "b" is unchanged
+    api = MockCloudsmithAPI([npm_group("a", 5), npm_group("b", 3), npm_group("c", 4)])
+    dates = prefetch_cloudsmith_dates(CloudsmithClient(mock_api=api), "npm", "upstream", "incremental",
+                                      IncrementalState(path))
+
+    assert dates == {("a",): day(5), ("b",): day(3), ("c",): day(4)}
+    assert IncrementalState(path).since(CloudsmithClient(mock_api=api), "npm", "upstream") == day(5)
+
+
+def test_sections_are_kept_per_repository_format_and_tag(tmp_path):
+    state = IncrementalState(str(tmp_path / "state.json"))
+    client = CloudsmithClient(mock_api=None, repo="repo")
+    other = CloudsmithClient(mock_api=None, repo="other")
+
+    state.merge(client, "npm", "upstream", {("a",): day(2)})
+
+    assert state.since(client, "npm", "upstream") == day(2)
+    assert state.since(client, "npm", "internal") is None
+    assert state.since(client, "python", "upstream") is None
+    assert state.since(other, "npm", "upstream") is None
+
+
+def test_merge_without_changes_keeps_the_mark(tmp_path):
+    state = IncrementalState(str(tmp_path / "state.json"))
+    client = CloudsmithClient(mock_api=None)
+    state.merge(client, "npm", "upstream", {("a",): day(2)})
+
+    assert state.merge(client, "npm", "upstream", {}) == {("a",): day(2)}
+    assert state.since(client, "npm", "upstream") == day(2)
+
+
+def test_outdated_or_corrupt_state_starts_over(tmp_path):
+    path = tmp_path / "state.json"
+    client = CloudsmithClient(mock_api=None)
+
+    path.write_text(json.dumps({"version": IncrementalState.VERSION - 1, "sections": {"x": {}}}), encoding="utf-8")
+    assert IncrementalState(str(path)).sections == {}
+
+    path.write_text("{", encoding="utf-8")
+    assert IncrementalState(str(path)).since(client, "npm", "upstream") is None
+
+
+def test_discard_forces_a_full_listing(tmp_path):
+    state = IncrementalState(str(tmp_path / "state.json"))
+    client = CloudsmithClient(mock_api=None)
+    state.merge(client, "npm", "upstream", {("a",): day(2)})
+
+    state.discard()
+
+    assert state.since(client, "npm", "upstream") is None
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from freshness_checker import iter_json_array
+
+
+SAMPLE = [
+    {"groupId": "com.example", "artifactId": "core", "lastUpdated": "20240101120000"},
+    {"name": "café \"quoted\" \\ back\\slash, [not] a delimiter", "size": 1234567890},
+    -12.5e-3,
+    12345678901234567890,
+    True,
+    None,
+    [],
+    {},
+    "",
+]
+
+
+def write(tmp_path, text):
+    path = tmp_path / "packages.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16, 64 * 1024])
+def test_chunk_boundaries_inside_strings_and_numbers(tmp_path, chunk_size):
+    path = write(tmp_path, json.dumps(SAMPLE, indent=2))
+
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == SAMPLE
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_compact_array_with_surrounding_whitespace(tmp_path, chunk_size):
+    path = write(tmp_path, " \n[1,22,333,\"a,b\"]\n ")
+
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == [1, 22, 333, "a,b"]
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] \n"])
+def test_empty_array(tmp_path, text):
+    assert list(iter_json_array(write(tmp_path, text))) == []
+
+
+@pytest.mark.parametrize("text", ["[1]x", "[1] x", "[]x", "[1]]", "[1][2]"])
+@pytest.mark.parametrize("chunk_size", [1, 64 * 1024])
+def test_rejects_trailing_garbage(tmp_path, text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(write(tmp_path, text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[1 2]", "[1,]", "[1", "[\"unterminated]"])
+def test_rejects_malformed_arrays(tmp_path, text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(write(tmp_path, text), chunk_size=2))
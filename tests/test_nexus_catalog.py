@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from freshness_checker import NexusCatalog, compile_catalog, package_key
+
+
+ENTRIES = [
+    {"groupId": "com.example", "artifactId": "core", "lastUpdated": "20240101000000"},
+    {"groupId": "com.example", "artifactId": "api", "lastUpdated": "20240102000000"},
+    {"groupId": "org.other", "artifactId": "core", "lastUpdated": "20240103000000"},
+    {"groupId": "com.example", "artifactId": "core", "lastUpdated": "20240104000000"},
+]
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    (tmp_path / "maven").mkdir()
+    write_entries(tmp_path, ENTRIES)
+    return tmp_path
+
+
+def write_entries(directory, entries):
+    (directory / "maven" / "packages.json").write_text(json.dumps(entries), encoding="utf-8")
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_identities_follow_file_order_with_duplicates(catalog_dir, compiled):
+    if compiled:
+        compile_catalog(str(catalog_dir / "maven" / "packages.json"), str(catalog_dir / "maven" / "packages.bin"), "maven")
+    catalog = NexusCatalog(str(catalog_dir))
+
+    identities = list(catalog.iter_identities("maven"))
+
+    assert [package_key(identity, "maven") for identity in identities] == [package_key(entry, "maven") for entry in ENTRIES]
+    assert catalog.count("maven") == 4
+    # The first of duplicated entries wins
+    assert [catalog.get_last_updated_date(identity, "maven") for identity in identities] == [
+        1704067200, 1704153600, 1704240000, 1704067200]
+    assert [catalog.key_id(identity, "maven") for identity in identities] == [identity.key_id for identity in identities]
+
+
+def test_listing_matches_the_loaded_index_after_the_file_changes(catalog_dir):
+    catalog = NexusCatalog(str(catalog_dir))
+    assert catalog.load("maven")
+    write_entries(catalog_dir, [{"groupId": "com.new", "artifactId": f"lib-{index}"} for index in range(3)])
+
+    identities = list(catalog.iter_identities("maven"))
+
+    assert [package_key(identity, "maven") for identity in identities] == [package_key(entry, "maven") for entry in ENTRIES]
+    assert catalog.get_last_updated_date(identities[2], "maven") == 1704240000
+    assert catalog.get_last_updated_date({"groupId": "com.new", "artifactId": "lib-0"}, "maven") is None
+
+    assert catalog.reload("maven")
+    assert catalog.get_last_updated_date(identities[2], "maven") is None
+    assert [identity.artifact_id for identity in catalog.iter_identities("maven")] == ["lib-0", "lib-1", "lib-2"]
+
+
+def test_key_ids_from_another_catalog_are_not_trusted(catalog_dir, tmp_path_factory):
+    other_dir = tmp_path_factory.mktemp("other")
+    (other_dir / "maven").mkdir()
+    write_entries(other_dir, list(reversed(ENTRIES)))
+    other = NexusCatalog(str(other_dir))
+    catalog = NexusCatalog(str(catalog_dir))
+
+    for identity in other.iter_identities("maven"):
+        assert catalog.get_last_updated_date(identity, "maven") == catalog.get_last_updated_date(
+            {"groupId": identity.group_id, "artifactId": identity.artifact_id}, "maven")
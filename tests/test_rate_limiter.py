@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+import freshness_checker
+from freshness_checker import RATE_RECOVERY_STEP, RATE_RECOVERY_SUCCESSES, RateLimiter
+
+
+class FakeClock:
+    """Stands in for the time module, so waits are measured without sleeping."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # Real time always moves on; don't let a sub-ulp sleep stall the clock
+        self.now += max(seconds, 1e-6)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(freshness_checker, "time", clock)
+
+    async def fake_sleep(seconds):
+        clock.sleep(seconds)
+    monkeypatch.setattr(freshness_checker.asyncio, "sleep", fake_sleep)
+    return clock
+
+
+def headers(remaining, reset_in, clock):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(clock.now + reset_in)}
+
+
+def elapsed(clock, action):
+    started = clock.now
+    action()
+    return clock.now - started
+
+
+def test_paces_requests_at_max_rate(clock):
+    limiter = RateLimiter(max_rate=10)
+
+    # A full bucket lets the first second of requests through at once
+    assert elapsed(clock, lambda: [limiter.acquire() for _ in range(10)]) == 0
+    assert elapsed(clock, lambda: [limiter.acquire() for _ in range(10)]) == pytest.approx(1.0)
+
+
+def test_spreads_the_remaining_budget_over_the_window(clock):
+    limiter = RateLimiter(max_rate=10, min_rate=0.01)
+    limiter.update_from_headers(headers(3, 60, clock))
+
+    assert limiter.rate == pytest.approx(3 / 60)
+    assert elapsed(clock, limiter.acquire) == 0
+    assert elapsed(clock, limiter.acquire) == pytest.approx(20.0)
+
+
+def test_exhausted_budget_waits_for_the_window_reset_and_recovers(clock):
+    limiter = RateLimiter(max_rate=10)
+    limiter.update_from_headers(headers(0, 2, clock))
+
+    # Waits for the reset, not 1 / min_rate seconds
+    assert elapsed(clock, limiter.acquire) == pytest.approx(2.0, abs=0.2)
+    assert limiter.rate == 10
+    assert elapsed(clock, lambda: [limiter.acquire() for _ in range(10)]) == pytest.approx(1.0, abs=0.2)
+
+
+def test_waits_never_run_past_the_window_reset(clock):
+    limiter = RateLimiter(max_rate=10, min_rate=0.01)
+    limiter.update_from_headers(headers(1, 5, clock))
+    limiter.acquire()
+
+    # One request left over 5s is 0.2 requests per second, but the window resets sooner
+    assert elapsed(clock, limiter.acquire) == pytest.approx(5.0, abs=0.1)
+
+
+def test_waiting_callers_pick_up_a_raised_rate(clock):
+    limiter = RateLimiter(max_rate=10)
+    limiter.update_from_headers(headers(1, 10, clock))
+    limiter.acquire()
+    assert limiter._try_acquire() == pytest.approx(10.0)
+
+    # A response from another caller reports a larger budget
+    limiter.update_from_headers(headers(50, 10, clock))
+
+    assert limiter._try_acquire() == pytest.approx(0.2)
+
+
+def test_async_acquire_waits_like_acquire(clock):
+    limiter = RateLimiter(max_rate=10)
+    limiter.update_from_headers(headers(0, 3, clock))
+
+    assert elapsed(clock, lambda: asyncio.run(limiter.acquire_async())) == pytest.approx(3.0, abs=0.2)
+
+
+def test_throttle_backs_off_and_successes_recover(clock):
+    limiter = RateLimiter(max_rate=10)
+
+    limiter.throttle(retry_after=4)
+
+    assert limiter.rate == 5
+    assert elapsed(clock, limiter.acquire) == pytest.approx(4.0)
+    for _ in range(RATE_RECOVERY_SUCCESSES):
+        limiter.record_success()
+    assert limiter.rate == pytest.approx(5 + 10 * RATE_RECOVERY_STEP)
+
+
+def test_successes_do_not_override_header_rates(clock):
+    limiter = RateLimiter(max_rate=10)
+    limiter.update_from_headers(headers(20, 10, clock))
+
+    for _ in range(RATE_RECOVERY_SUCCESSES * 5):
+        limiter.record_success()
+
+    assert limiter.rate == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize("response_headers", [{}, {"X-RateLimit-Remaining": "5"}, {"X-RateLimit-Remaining": "x",
+                                                                                    "X-RateLimit-Reset": "1"}])
+def test_missing_or_malformed_headers_are_ignored(clock, response_headers):
+    limiter = RateLimiter(max_rate=10)
+
+    limiter.update_from_headers(response_headers)
+
+    assert limiter.rate == 10
+    assert not limiter.header_limited
@@ -0,0 +1,129 @@
+import pytest
+
+import freshness_checker
+from freshness_checker import CloudsmithClient, ResponseCache, package_key
+from mock_cloudsmith_server import MockCloudsmithAPI
+
+
+GROUPS = [
+    {"name": "left-pad", "format": "npm", "last_push": "2024-01-01T00:00:00Z"},
+    {"name": "right-pad", "format": "npm", "last_push": "2024-02-01T00:00:00Z"},
+    {"name": "mid-pad", "format": "npm", "last_push": "2024-03-01T00:00:00Z", "tags": ["upstream"]},
+]
+IDENTIFIERS = [{"name": "left-pad"}, {"name": "right-pad"}, {"name": "mid-pad"}, {"name": "missing"}]
+
+
+class FakeClock:
+    """Stands in for the time module, so entries can be aged without sleeping."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class CountingAPI:
+    """Mock API that counts the requests reaching it."""
+
+    def __init__(self, groups):
+        self.api = MockCloudsmithAPI(groups)
+        self.requests = 0
+
+    def request(self, endpoint, params):
+        self.requests += 1
+        return self.api.request(endpoint, params)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(freshness_checker, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    with ResponseCache(str(tmp_path), ttl=60) as cache:
+        yield cache
+
+
+def test_repeated_lookups_are_served_from_the_cache(cache):
+    api = CountingAPI(GROUPS)
+    client = CloudsmithClient(mock_api=api, cache=cache)
+
+    first = [client.get_last_updated_date(identifier, "npm", "upstream") for identifier in IDENTIFIERS]
+    second = [client.get_last_updated_date(identifier, "npm", "upstream") for identifier in IDENTIFIERS]
+
+    assert first == second == [1704067200, 1706745600, None, None]
+    assert api.requests == 4
+    # Queries that matched nothing are cached as misses too
+    assert (cache.hits, cache.misses) == (4, 4)
+
+
+def test_batched_lookups_share_entries_with_single_lookups(cache):
+    api = CountingAPI(GROUPS)
+    client = CloudsmithClient(mock_api=api, cache=cache, batch_size=10)
+
+    dates = client.get_last_updated_dates_batched(IDENTIFIERS, "npm", "upstream")
+    requests = api.requests
+
+    assert [client.get_last_updated_date(identifier, "npm", "upstream") for identifier in IDENTIFIERS] == [
+        dates.get(package_key(identifier, "npm")) for identifier in IDENTIFIERS]
+    assert client.get_last_updated_dates_batched(IDENTIFIERS, "npm", "upstream") == dates
+    assert api.requests == requests
+
+
+def test_entries_expire_after_the_ttl(cache, clock):
+    key = cache.key("org", "repo", "npm", "left-pad")
+    cache.put(key, 1704067200)
+
+    clock.now += 59
+    assert cache.get(key) == (True, 1704067200)
+    clock.now += 2
+    assert cache.get(key) == (False, None)
+
+
+def test_entries_are_keyed_by_repository_and_ignored_tag(cache):
+    api = CountingAPI(GROUPS)
+    client = CloudsmithClient(mock_api=api, cache=cache)
+    other_repo = CloudsmithClient(mock_api=api, cache=cache, repo="other-repo")
+
+    assert client.get_last_updated_date({"name": "mid-pad"}, "npm", "upstream") is None
+    # A different ignored tag is a different query, so the cached miss does not apply
+    assert client.get_last_updated_date({"name": "mid-pad"}, "npm", "internal") == 1709251200
+    assert other_repo.get_last_updated_date({"name": "mid-pad"}, "npm", "internal") == 1709251200
+    assert api.requests == 3
+
+
+def test_entries_survive_reopening(tmp_path, clock):
+    key = ResponseCache.key("org", "repo", "npm", "left-pad")
+    with ResponseCache(str(tmp_path), ttl=60) as cache:
+        cache.put(key, None)
+
+    with ResponseCache(str(tmp_path), ttl=60) as cache:
+        assert cache.get(key) == (True, None)
+
+
+def test_flush_prunes_expired_then_oldest_entries(tmp_path, clock):
+    with ResponseCache(str(tmp_path), ttl=60, max_entries=3) as cache:
+        cache.put("expired", 1)
+        clock.now += 61
+        for index in range(4):
+            cache.put(f"key-{index}", index)
+            clock.now += 1
+
+    with ResponseCache(str(tmp_path), ttl=60) as cache:
+        assert [cache.get(key)[0] for key in ["expired", "key-0", "key-1", "key-2", "key-3"]] == [
+            False, False, True, True, True]
+        (entries,) = cache._conn.execute("SELECT COUNT(*) FROM group_epochs").fetchone()
+        assert entries == 3
@@ -0,0 +1,55 @@
+import pytest
+
+from freshness_checker import FreshnessResult, ResponseCache, RunMetrics
+
+
+def samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResponseCache(str(tmp_path)) as cache:
+        yield cache
+
+
+def test_hit_ratio_is_left_out_without_cache_lookups(cache):
+    text = RunMetrics(["maven"]).render(cache)
+
+    assert samples(text)["freshness_checker_cache_hits"] == "0"
+    assert "cache_hit_ratio" not in text
+
+
+def test_hit_ratio_counts_hits_and_misses(cache):
+    cache.put("a", 1700000000)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    values = samples(RunMetrics(["maven"]).render(cache))
+
+    assert values["freshness_checker_cache_hits"] == "2"
+    assert values["freshness_checker_cache_misses"] == "1"
+    assert float(values["freshness_checker_cache_hit_ratio"]) == pytest.approx(2 / 3)
+
+
+def test_results_requests_and_latency_histogram():
+    metrics = RunMetrics(["npm"])
+    metrics.record_result(FreshnessResult("npm", "a", 1, 2, 2, "cloudsmith"))
+    metrics.observe_request(200, 0.02)
+    metrics.observe_request(429, 0.3)
+    metrics.observe_request("error", 60.0)
+    metrics.record_retry()
+
+    values = samples(metrics.render(success=False))
+
+    assert values['freshness_checker_packages{format="npm",source="cloudsmith"}'] == "1"
+    assert values['freshness_checker_packages{format="npm",source="nexus"}'] == "0"
+    assert values['freshness_checker_cloudsmith_requests{status="429"}'] == "1"
+    assert values['freshness_checker_cloudsmith_request_duration_seconds_bucket{le="0.025"}'] == "1"
+    assert values['freshness_checker_cloudsmith_request_duration_seconds_bucket{le="0.5"}'] == "2"
+    assert values['freshness_checker_cloudsmith_request_duration_seconds_bucket{le="+Inf"}'] == "3"
+    assert values["freshness_checker_cloudsmith_throttled"] == "1"
+    assert values["freshness_checker_cloudsmith_retries"] == "1"
+    assert values["freshness_checker_last_run_success"] == "0"
+    assert "cache_hits" not in "".join(values)
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from freshness_checker import TIMED_STAGES, TIMING_BUCKET_GROWTH, LatencyHistogram, StageTimings
+
+
+def exact_percentile(values, percentile):
+    values = sorted(values)
+    return values[max(0, -(-percentile * len(values) // 100) - 1)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_percentiles_are_within_the_bucket_error(seed):
+    rng = random.Random(seed)
+    durations = [rng.lognormvariate(-6, 2) for _ in range(20_000)]
+    histogram = LatencyHistogram()
+    for seconds in durations:
+        histogram.add(seconds)
+
+    for percentile in (1, 50, 95, 99, 100):
+        exact = exact_percentile(durations, percentile)
+        assert exact <= histogram.percentile(percentile) <= exact * TIMING_BUCKET_GROWTH
+    assert histogram.calls == len(durations)
+    assert histogram.total == pytest.approx(sum(durations))
+    assert histogram.max == max(durations)
+
+
+def test_memory_does_not_grow_with_calls():
+    histogram = LatencyHistogram()
+    size = len(histogram.counts)
+
+    for index in range(100_000):
+        histogram.add(index * 1e-6)
+
+    assert len(histogram.counts) == size
+    assert histogram.calls == 100_000
+
+
+@pytest.mark.parametrize("seconds", [0.0, 1e-9])
+def test_durations_below_the_first_bucket(seconds):
+    histogram = LatencyHistogram()
+
+    histogram.add(seconds)
+
+    assert histogram.percentile(50) == seconds
+
+
+def test_durations_above_the_last_bucket_keep_an_exact_max():
+    histogram = LatencyHistogram()
+
+    histogram.add(1e6)
+
+    assert histogram.percentile(50) <= 1e6
+    assert histogram.max == 1e6
+
+
+def test_report_lists_every_stage():
+    timings = StageTimings()
+    for seconds in (0.001, 0.002, 0.003, 0.004):
+        timings.record('nexus_lookup', seconds)
+    list(timings.iter_timed(range(3), 'nexus_listing'))
+
+    stages = timings.report()['stages']
+
+    assert list(stages) == list(TIMED_STAGES)
+    lookup = stages['nexus_lookup']
+    assert lookup['calls'] == 4
+    assert lookup['total_seconds'] == pytest.approx(0.01)
+    assert lookup['mean_ms'] == pytest.approx(2.5)
+    assert lookup['p50_ms'] == pytest.approx(2.0, rel=0.01)
+    assert lookup['max_ms'] == pytest.approx(4.0)
+    assert stages['nexus_listing']['calls'] == 3
+    assert stages['output'] == {'label': TIMED_STAGES['output'], 'calls': 0, 'total_seconds': 0.0, 'mean_ms': None,
+                                'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from freshness_checker import NexusCatalog, format_timestamp, parse_last_push, parse_timestamp
+
+
+@pytest.mark.parametrize("date_str,epoch", [
+    ("19700101000000", 0),
+    ("20240229235959", 1709251199),
+    ("20251231120000", 1767182400),
+])
+def test_parse_timestamp_round_trips(date_str, epoch):
+    assert parse_timestamp(date_str) == epoch
+    assert format_timestamp(epoch) == date_str
+
+
+@pytest.mark.parametrize("date_str", [
+    "20251399000000",  # month 13
+    "20250230000000",  # February 30th
+    "20230229000000",  # not a leap year
+    "20250101250000",  # hour 25
+    "20250101006000",  # minute 60
+    "20250100000000",  # day 0
+    "2025010100000",   # too short
+    "2025-01-01T0000",
+    "",
+    None,
+])
+def test_parse_timestamp_rejects_invalid_dates(date_str):
+    assert parse_timestamp(date_str) is None
+
+
+@pytest.mark.parametrize("last_push,epoch", [
+    ("2025-01-01T00:00:00Z", 1735689600),
+    ("2025-01-01T02:00:00+02:00", 1735689600),
+    ("2025-01-01T00:00:00", 1735689600),
+])
+def test_parse_last_push(last_push, epoch):
+    assert parse_last_push(last_push) == epoch
+
+
+@pytest.mark.parametrize("last_push", ["", None, "yesterday", "2025-13-01T00:00:00Z", "2025-02-30T00:00:00Z"])
+def test_parse_last_push_rejects_invalid_dates(last_push):
+    assert parse_last_push(last_push) is None
+
+
+def test_catalog_loads_around_an_invalid_date(tmp_path):
+    (tmp_path / "npm").mkdir()
+    (tmp_path / "npm" / "packages.json").write_text(json.dumps([
+        {"name": "bad-month", "lastUpdated": "20251399000000"},
+        {"name": "good", "lastUpdated": "20250101000000"},
+    ]), encoding="utf-8")
+    catalog = NexusCatalog(str(tmp_path))
+
+    assert catalog.load("npm")
+    assert catalog.has_package({"name": "bad-month"}, "npm")
+    assert catalog.get_last_updated_date({"name": "bad-month"}, "npm") is None
+    assert catalog.get_last_updated_date({"name": "good"}, "npm") == 1735689600
@@ -0,0 +1,32 @@
+import itertools
+
+import pytest
+
+from freshness_checker import (MISSING_TIMESTAMP, SOURCE_NAMES, compare_dates, compare_dates_vectorized,
+                               summarize_sources, to_timestamp_array)
+
+numpy = pytest.importorskip("numpy")
+
+DATES = [None, 0, 1704067200, 1704067201, 1706745600]
+
+
+def test_matches_compare_dates_for_every_pair():
+    pairs = list(itertools.product(DATES, repeat=2))
+    nexus_dates = to_timestamp_array([nexus_date for nexus_date, _ in pairs])
+    cloudsmith_dates = to_timestamp_array([cloudsmith_date for _, cloudsmith_date in pairs])
+
+    freshness_dates, sources = compare_dates_vectorized(nexus_dates, cloudsmith_dates)
+
+    expected = [compare_dates(nexus_date, cloudsmith_date) for nexus_date, cloudsmith_date in pairs]
+    assert [(None if date == MISSING_TIMESTAMP else int(date), SOURCE_NAMES[int(source)])
+            for date, source in zip(freshness_dates, sources)] == expected
+
+
+def test_summary_counts_every_source():
+    nexus_dates = to_timestamp_array([None, 5, 5, None])
+    cloudsmith_dates = to_timestamp_array([None, 4, 5, 6])
+
+    _, sources = compare_dates_vectorized(nexus_dates, cloudsmith_dates)
+
+    assert summarize_sources(sources) == {"unknown": 1, "nexus": 1, "cloudsmith": 2}
+    assert summarize_sources(numpy.array([], dtype=numpy.int8)) == {"unknown": 0, "nexus": 0, "cloudsmith": 0}